@@ -89,3 +89,48 @@ def run(
     fx.load_builtin_plugins(*load_builtin_plugins)
 
     fx.run()
+
+
+@framex.group()
+def cache() -> None:
+    """Manage the request cache of a running FrameX service."""
+
+
+@cache.command()
+@click.option("--tag", "tags", multiple=True, help="Purge entries carrying this tag. Can be used multiple times.")
+@click.option("--prefix", "path_prefix", default=None, help="Purge entries whose route path starts with this prefix.")
+@click.option("--key", "keys", multiple=True, help="Purge the entry with this cache key. Can be used multiple times.")
+@click.option("--url", default=None, help="Base URL of the FrameX service. Defaults to the configured host and port.")
+@click.option("--api-key", envvar="FRAMEX_API_KEY", default=None, help="API key allowed to call the cache admin API.")
+def purge(
+    tags: tuple[str, ...],
+    path_prefix: str | None,
+    keys: tuple[str, ...],
+    url: str | None,
+    api_key: str | None,
+) -> None:
+    """Purge request cache entries by tag, route path prefix or key."""
+    import httpx
+
+    from framex.config import settings
+    from framex.consts import CACHE_ADMIN_PATH
+
+    if not tags and path_prefix is None and not keys:
+        raise click.UsageError("Provide at least one of --tag, --prefix or --key.")
+
+    base_url = (url or f"http://{settings.server.host}:{settings.server.port}").rstrip("/")
+    try:
+        response = httpx.post(
+            f"{base_url}{CACHE_ADMIN_PATH}/purge",
+            json={"tags": list(tags), "path_prefix": path_prefix, "keys": list(keys)},
+            headers={"Authorization": api_key} if api_key else None,
+            timeout=30,
+        )
+    except httpx.HTTPError as exc:
+        raise click.ClickException(f"Failed to reach {base_url}: {exc}") from exc
+    if response.status_code != 200:
+        raise click.ClickException(f"Cache purge failed ({response.status_code}): {response.text}")
+
+    payload = response.json()
+    result = payload.get("data", payload)
+    click.echo(f"Purged {result['purged']} cache entries")
@@ -47,18 +47,38 @@ class ServerConfig(StrictConfigModel):
     use_ray: bool = False
     enable_proxy: bool = False
     legal_proxy_code: list[int] = Field(default_factory=lambda: [200])
+    # Encode proxy payloads in the framed codec format; older nodes only read the legacy one.
+    framed_codec: bool = False
     num_cpus: int = -1
     excluded_log_paths: list[str] = Field(default_factory=list)
     ingress_config: dict[str, Any] = Field(default_factory=dict)
     reversion: str = ""
 
 
+class CacheWarmupConfig(StrictConfigModel):
+    path: str
+    method: Literal["GET", "POST"] = "GET"
+    requests: list[dict[str, Any]] = Field(default=[{}])
+
+
 class CacheConfig(StrictConfigModel):
     enabled: bool = False
-    mode: Literal["memory", "file"] = "memory"
+    mode: Literal["memory", "file", "sqlite", "remote", "tiered"] = "memory"
     ttl: int = 60
     max_size: int = Field(default=1000, gt=0)
+    max_bytes: int | None = Field(default=None, gt=0)
+    compress_threshold: int | None = Field(default=None, ge=0)
+    compression: Literal["auto", "zlib", "zstd"] = "auto"
+    admission: Literal["always", "tinylfu"] = "always"
     file_dir: str = ".framex/cache"
+    l1_max_size: int = Field(default=256, gt=0)
+    l2_mode: Literal["file", "sqlite", "remote"] = "file"
+    sqlite_path: str = ".framex/cache/request_cache.db"
+    remote_url: str = "redis://localhost:6379/0"
+    remote_namespace: str = "framex-request-cache"
+    snapshot_path: str | None = None
+    warmup: list[CacheWarmupConfig] = Field(default_factory=list)
+    warmup_concurrency: int = Field(default=4, gt=0)
 
     @field_validator("ttl")
     @classmethod
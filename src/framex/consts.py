@@ -13,6 +13,7 @@ APP_NAME = "default"
 
 PROXY_PLUGIN_NAME = "proxy.ProxyPlugin"
 PROXY_FUNC_HTTP_PATH = f"{API_STR}/proxy/remote"
+PROXY_FUNC_BATCH_HTTP_PATH = f"{PROXY_FUNC_HTTP_PATH}/batch"
 
 DEFAULT_ENV = {"RAY_COLOR_PREFIX": "1", "RAY_DEDUP_LOGS": "1", "RAY_SERVE_RUN_SYNC_IN_THREADPOOL": "1"}
 RAY_INGRESS_MAX_ONGOING_REQUESTS_ENV = "FRAMEX_SERVER_INGRESS_MAX_ONGOING_REQUESTS"
@@ -24,10 +25,15 @@ SEBTRY_BLOCK_URLS = [
 
 AUTH_COOKIE_NAME = "framex_token"
 
+CACHE_ADMIN_PATH = f"{API_STR}/cache"
 CACHE_REQUEST_HEADER = "X-FrameX-Cache"
 CACHE_KEY_HEADER = "X-FrameX-Cache-Key"
 CACHE_STATUS_HEADER = "X-FrameX-Cache-Status"
+CACHE_TIER_HEADER = "X-FrameX-Cache-Tier"
+CACHE_ENCODED_STATE = "framex_cache_encoded"
+CACHE_STATUS_STATE = "framex_cache_status"
 SUPPORTED_CACHE_METHODS = {"GET", "POST"}
+CACHE_CALL_METHOD = "CALL"
 
 
 class CacheAction(StrEnum):
@@ -42,3 +48,9 @@ class CacheStatus(StrEnum):
     HIT = "HIT"
     MISS = "MISS"
     REFRESH = "REFRESH"
+    STALE = "STALE"
+
+
+class CacheTier(StrEnum):
+    L1 = "L1"
+    L2 = "L2"
@@ -25,10 +25,10 @@ from starlette.exceptions import HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse, StreamingResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
 from framex.config import settings
-from framex.consts import API_PRE_STR, DOCS_URL, OPENAPI_URL, PROJECT_NAME, REDOC_URL, VERSION
+from framex.consts import API_PRE_STR, CACHE_ENCODED_STATE, DOCS_URL, OPENAPI_URL, PROJECT_NAME, REDOC_URL, VERSION
 from framex.driver.auth import authenticate, get_auth_payload, oauth_callback
 from framex.repository import (
     can_access_repository,
@@ -97,6 +97,20 @@ def _stream_error_response(
     )
 
 
+def _wrap_encoded_body(status_code: int, timestamp: str, body: bytes) -> bytes:
+    # Splice an already encoded JSON body into the response envelope without decoding it again.
+    envelope = json.dumps(
+        {
+            "status": status_code,
+            "message": "success" if status_code == 200 else "unexpected code",
+            "timestamp": timestamp,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return b"".join([envelope[:-1].encode("utf-8"), b',"data":', body, b"}"])
+
+
 def create_fastapi_application() -> FastAPI:
     """
     Create a FastAPI instance.
@@ -109,15 +123,18 @@ def create_fastapi_application() -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):  # noqa
+        import asyncio
+
         from framex.config import settings
+        from framex.driver.cache import request_cache
 
+        await request_cache.restore()
+        on_start_tasks: list[asyncio.Task[None]] = []
         if not settings.server.use_ray:
             from framex.log import logger
 
             logger.info("Starting FastAPI application...")
 
-            import asyncio
-
             deployments: list[Any] = list(app.state.deployments_dict.values())
 
             @logger.catch
@@ -125,11 +142,22 @@ def create_fastapi_application() -> FastAPI:
                 func = getattr(deployment, "on_start")
                 await func()
 
-            for deployment in deployments:
-                asyncio.create_task(_on_start(deployment))  # noqa
+            @logger.catch
+            async def _on_stop(deployment: Any) -> None:
+                if func := getattr(deployment, "on_stop", None):
+                    await func()
+
+            on_start_tasks.extend(asyncio.create_task(_on_start(deployment)) for deployment in deployments)
+        request_cache.start_warm_up(on_start_tasks)
 
         yield
 
+        if not settings.server.use_ray:
+            for deployment in deployments:
+                await _on_stop(deployment)
+        await request_cache.snapshot()
+        await request_cache.close()
+
     application = FastAPI(
         title=PROJECT_NAME,
         debug=False,
@@ -454,14 +482,21 @@ def create_fastapi_application() -> FastAPI:
         ):
             return response
         response_body = [chunk async for chunk in response.body_iterator]
-        response.body_iterator = iterate_in_threadpool(iter(response_body))
-        response_body = json.loads(response_body[0].decode())
         timestamp = pytz.timezone("Asia/Shanghai").localize(datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
         headers = {
             key: value
             for key, value in response.headers.items()
             if key.lower() not in {"content-length", "content-type"}
         }
+        if getattr(request.state, CACHE_ENCODED_STATE, False):
+            return Response(
+                content=_wrap_encoded_body(response.status_code, timestamp, b"".join(response_body)),
+                status_code=response.status_code,
+                headers=headers,
+                media_type="application/json",
+            )
+        response.body_iterator = iterate_in_threadpool(iter(response_body))
+        response_body = json.loads(response_body[0].decode())
 
         if isinstance(response_body, dict) and response_body.get("is_middleware_error", False):
             return JSONResponse(
@@ -101,6 +101,21 @@ def auth_jwt(request: Request) -> bool:
     return get_auth_payload(request) is not None
 
 
+def authenticate_admin(request: Request, api_key: str | None = Depends(api_key_header)) -> None:
+    # Admin APIs stay closed until an auth rule explicitly covers them.
+    auth_keys = settings.auth.get_auth_keys(request.url.path)
+    if auth_keys is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"API({request.url.path}) requires an auth rule",
+        )
+    if (api_key is None or api_key not in auth_keys) and not auth_jwt(request):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid API Key({api_key}) for API({request.url.path})",
+        )
+
+
 def _get_post_auth_redirect_url(state: str | None) -> str:
     if not state:
         return DOCS_URL
@@ -1,48 +1,58 @@
+import asyncio
+import contextlib
+import functools
+import gzip
 import hashlib
 import inspect
 import json
-from collections.abc import Awaitable, Callable, Mapping
+import time
+from collections import Counter
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Literal
-from zoneinfo import ZoneInfo
+from typing import Any, Literal, get_args
 
-from aiocache import Cache
 from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
+from pydantic.errors import PydanticSchemaGenerationError
 from starlette.requests import Request
 from starlette.responses import Response
 
 from framex.config import settings
 from framex.consts import (
+    CACHE_CALL_METHOD,
+    CACHE_ENCODED_STATE,
     CACHE_KEY_HEADER,
     CACHE_REQUEST_HEADER,
     CACHE_STATUS_HEADER,
+    CACHE_TIER_HEADER,
     SUPPORTED_CACHE_METHODS,
     CacheAction,
     CacheStatus,
 )
+from framex.driver.cache_backends import (
+    REQUEST_CACHE_TIMEZONE,
+    CacheAdmission,
+    CacheBackend,
+    CacheEntryMetadata,
+    CacheStore,
+    create_cache_backend,
+)
+from framex.driver.cache_stats import CacheStats
 from framex.log import logger
 
-CacheStore = Literal["memory", "file"]
-REQUEST_CACHE_TIMEZONE = ZoneInfo("Asia/Shanghai")
-
-
-class CacheEntryMetadata(BaseModel):
-    key: str
-    store_key: str
-    store: CacheStore
-    created_at: datetime
-    expires_at: datetime | None
-    ttl: int
-    path: str
-    method: str
-    request_body: dict[str, Any] = Field(default_factory=dict)
+KeyBuilderStyle = Literal["positional", "keyword", "context"]
+_JSON_SCALARS = (str, int, float, bool, type(None))
 
 
 class CacheContext:
     def __init__(self, metadata: Mapping[str, CacheEntryMetadata]) -> None:
         self._metadata: Mapping[str, CacheEntryMetadata] = metadata
+        self.tags: list[str] = []
+
+    def add_tags(self, *tags: str) -> None:
+        self.tags.extend(_validate_tags(tags))
 
     def keys(self) -> list[str]:
         return [metadata.key for metadata in self._metadata.values()]
@@ -54,10 +64,65 @@ class CacheContext:
         return self.metadata().get(key)
 
 
+class CachePurgeRequest(BaseModel):
+    tags: list[str] = Field(default_factory=list)
+    path_prefix: str | None = None
+    keys: list[str] = Field(default_factory=list)
+
+
+class StreamRecording:
+    """Chunks of one in-flight upstream stream, replayed to every subscriber as they arrive."""
+
+    def __init__(self) -> None:
+        self.chunks: list[tuple[float, Any]] = []
+        self.task: asyncio.Task[None] | None = None
+        self._done = False
+        self._error: BaseException | None = None
+        self._changed = asyncio.Event()
+
+    def append(self, offset: float, chunk: Any) -> None:
+        self.chunks.append((offset, chunk))
+        self._notify()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self._done, self._error = True, error
+        self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index][1]
+                index += 1
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                return
+            changed = self._changed
+            await changed.wait()
+
+    def _notify(self) -> None:
+        # Swap the event so waiters wake once and later waiters block until the next chunk.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+@dataclass(eq=False)
+class WarmupRoute:
+    path: str
+    cache_config: dict[str, Any]
+    params: dict[str, Any]
+    invoke: Callable[[dict[str, Any]], Awaitable[Any]]
+
+
 class RequestCache:
     def __init__(self) -> None:
-        self._memory: Cache | None = None
-        self._memory_metadata: dict[str, CacheEntryMetadata] = {}
+        self._backends: dict[CacheStore, CacheBackend] = {}
+        self._refresh_tasks: dict[str, asyncio.Task[None]] = {}
+        self._warmup_routes: dict[tuple[str, str], WarmupRoute] = {}
+        self._warmup_task: asyncio.Task[int] | None = None
+        self._recordings: dict[str, StreamRecording] = {}
+        self.stats = CacheStats()
 
     async def call(
         self,
@@ -72,6 +137,29 @@ class RequestCache:
         if cache_config is None:
             response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
             return await invoke()
+        try:
+            return await self._call(
+                request=request,
+                response=response,
+                path=path,
+                cache_config=cache_config,
+                request_kwargs=request_kwargs,
+                invoke=invoke,
+            )
+        finally:
+            if (cache_status := response.headers.get(CACHE_STATUS_HEADER)) is not None:
+                self.stats.record_status(path, cache_status)
+
+    async def _call(
+        self,
+        *,
+        request: Request,
+        response: Response,
+        path: str,
+        cache_config: dict[str, Any],
+        request_kwargs: dict[str, Any],
+        invoke: Callable[[], Awaitable[Any]],
+    ) -> Any:
         if not settings.cache.enabled:
             response.headers[CACHE_STATUS_HEADER] = CacheStatus.DISABLED
             return await invoke()
@@ -80,11 +168,9 @@ class RequestCache:
             return await invoke()
 
         try:
-            await self.cleanup()
-            ttl = _resolve_ttl(cache_config)
-            metadata = self.metadata()
-            key = _build_cache_key(request, path, request_kwargs, cache_config, metadata)
-            store_key = _hash_key(key)
+            key, store_key, build_metadata = await self._prepare(
+                request.method.upper(), path, cache_config, request_kwargs, request=request
+            )
             response.headers[CACHE_KEY_HEADER] = store_key
         except Exception as exc:
             logger.warning(f"Failed to prepare request cache for {request.method} {path}: {exc}")
@@ -96,151 +182,485 @@ class RequestCache:
         if action == CacheAction.BYPASS:
             response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
             return await invoke()
+
+        fallback: tuple[Any, CacheEntryMetadata] | None = None
         if action == CacheAction.USE:
             try:
-                cached_value = await self.get(store_key)
-                if cached_value is not None:
-                    response.headers[CACHE_STATUS_HEADER] = CacheStatus.HIT
-                    return cached_value
+                entry = await self._lookup(path, store_key)
             except Exception as exc:
                 logger.warning(f"Failed to read request cache key {key!r}: {exc}")
                 response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
                 return await invoke()
+            if entry is not None:
+                cached_value, cached_metadata = entry
+                now = datetime.now(REQUEST_CACHE_TIMEZONE)
+                if cached_metadata.is_fresh(now):
+                    response.headers[CACHE_STATUS_HEADER] = CacheStatus.HIT
+                    return _cached_response(cached_value, cached_metadata, request, response)
+                if cached_metadata.is_revalidatable(now):
+                    self._schedule_refresh(
+                        store_key,
+                        lambda: self._invoke_and_store(invoke, cache_config, build_metadata),
+                    )
+                    response.headers[CACHE_STATUS_HEADER] = CacheStatus.STALE
+                    return _cached_response(cached_value, cached_metadata, request, response)
+                if cached_metadata.is_error_fallback(now):
+                    fallback = entry
+
+        try:
+            value, entry_metadata = await self._invoke_and_store(
+                invoke, cache_config, build_metadata, fallback=fallback
+            )
+        except Exception as exc:
+            if fallback is None:
+                raise
+            logger.warning(f"Serving stale request cache key {key!r} after backend failure: {exc!r}")
+            response.headers[CACHE_STATUS_HEADER] = CacheStatus.STALE
+            return _cached_response(*fallback, request, response)
 
-        result = await invoke()
-        created_at = datetime.now(REQUEST_CACHE_TIMEZONE)
-        entry_metadata = CacheEntryMetadata(
-            key=key,
-            store_key=store_key,
-            store=settings.cache.mode,
-            created_at=created_at,
-            expires_at=None if ttl == -1 else created_at + timedelta(seconds=ttl),
-            ttl=ttl,
-            path=path,
-            method=request.method.upper(),
-            request_body=_stable_value(request_kwargs),
+        response.headers[CACHE_STATUS_HEADER] = (
+            CacheStatus.REFRESH if action == CacheAction.REFRESH else CacheStatus.MISS
         )
+        return _cached_response(value, entry_metadata, request, response)
+
+    async def memoize(
+        self,
+        *,
+        name: str,
+        cache_config: dict[str, Any] | None,
+        kwargs: dict[str, Any],
+        invoke: Callable[[], Awaitable[Any]],
+        caller: str | None = None,
+    ) -> Any:
+        """Memoize a plugin function call by `name` and its kwargs in the request cache stores.
+
+        `caller` identifies the calling plugin; entries are scoped to it when the cache config
+        sets `scope_by_caller`.
+        """
+        if cache_config is None or not settings.cache.enabled:
+            return await invoke()
+        cache_status: CacheStatus | None = None
+        try:
+            value, cache_status = await self._memoize(
+                name=name,
+                cache_config=cache_config,
+                kwargs=kwargs,
+                invoke=invoke,
+                scope=caller if cache_config.get("scope_by_caller") else None,
+            )
+        finally:
+            if cache_status is not None:
+                self.stats.record_status(name, cache_status)
+        return value
+
+    async def _memoize(
+        self,
+        *,
+        name: str,
+        cache_config: dict[str, Any],
+        kwargs: dict[str, Any],
+        invoke: Callable[[], Awaitable[Any]],
+        scope: str | None,
+    ) -> tuple[Any, CacheStatus]:
+        # Key builders receive the HTTP request, which plugin calls do not have.
+        if cache_config.get("key_builder"):
+            return await invoke(), CacheStatus.BYPASS
+        try:
+            key, store_key, build_metadata = await self._prepare(
+                CACHE_CALL_METHOD, name, cache_config, kwargs, scope=scope
+            )
+            entry = await self._lookup(name, store_key)
+        except Exception as exc:
+            logger.warning(f"Failed to read request cache for call {name}: {exc}")
+            return await invoke(), CacheStatus.BYPASS
+
+        fallback: tuple[Any, CacheEntryMetadata] | None = None
+        if entry is not None:
+            now = datetime.now(REQUEST_CACHE_TIMEZONE)
+            if entry[1].is_fresh(now):
+                return entry[0], CacheStatus.HIT
+            if entry[1].is_revalidatable(now):
+                self._schedule_refresh(
+                    store_key,
+                    lambda: self._invoke_and_store(invoke, cache_config, build_metadata, encode=False),
+                )
+                return entry[0], CacheStatus.STALE
+            if entry[1].is_error_fallback(now):
+                fallback = entry
+
+        try:
+            value, _ = await self._invoke_and_store(
+                invoke, cache_config, build_metadata, encode=False, fallback=fallback
+            )
+        except Exception as exc:
+            if fallback is None:
+                raise
+            logger.warning(f"Serving stale request cache key {key!r} after call failure: {exc!r}")
+            return fallback[0], CacheStatus.STALE
+        return value, CacheStatus.MISS
+
+    async def stream(
+        self,
+        *,
+        request: Request,
+        response: Response,
+        path: str,
+        cache_config: dict[str, Any] | None,
+        request_kwargs: dict[str, Any],
+        invoke: Callable[[], AsyncIterable[Any]],
+    ) -> AsyncIterator[Any]:
+        """Return the chunks of a stream route, replayed from the cache or recorded on a miss.
+
+        Cache headers are set on `response` before the first chunk is produced, so callers
+        can copy them onto the streaming response.
+        """
+        if cache_config is None:
+            response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
+            return aiter(invoke())
+        try:
+            return await self._stream(
+                request=request,
+                response=response,
+                path=path,
+                cache_config=cache_config,
+                request_kwargs=request_kwargs,
+                invoke=invoke,
+            )
+        finally:
+            if (cache_status := response.headers.get(CACHE_STATUS_HEADER)) is not None:
+                self.stats.record_status(path, cache_status)
+
+    async def _stream(
+        self,
+        *,
+        request: Request,
+        response: Response,
+        path: str,
+        cache_config: dict[str, Any],
+        request_kwargs: dict[str, Any],
+        invoke: Callable[[], AsyncIterable[Any]],
+    ) -> AsyncIterator[Any]:
+        if not settings.cache.enabled:
+            response.headers[CACHE_STATUS_HEADER] = CacheStatus.DISABLED
+            return aiter(invoke())
+        if request.method.upper() not in SUPPORTED_CACHE_METHODS:
+            response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
+            return aiter(invoke())
+
         try:
-            await self.set(store_key, result, entry_metadata)
+            key, store_key, build_metadata = await self._prepare(
+                request.method.upper(), path, cache_config, request_kwargs, request=request
+            )
+            response.headers[CACHE_KEY_HEADER] = store_key
         except Exception as exc:
-            logger.warning(f"Failed to write request cache key {key!r}: {exc}")
+            logger.warning(f"Failed to prepare request cache for {request.method} {path}: {exc}")
+            response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
+            return aiter(invoke())
+
+        action = _cache_action(request)
+        if action == CacheAction.BYPASS:
+            response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
+            return aiter(invoke())
 
+        if action == CacheAction.USE:
+            try:
+                entry = await self._lookup(path, store_key)
+            except Exception as exc:
+                logger.warning(f"Failed to read request cache key {key!r}: {exc}")
+                response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
+                return aiter(invoke())
+            if entry is not None and entry[1].stream and entry[1].is_fresh(datetime.now(REQUEST_CACHE_TIMEZONE)):
+                response.headers[CACHE_STATUS_HEADER] = CacheStatus.HIT
+                return _replay(entry[0], pacing=cache_config.get("replay_pacing", True))
+
+        # Identical requests arriving while a stream is recorded tee from the same upstream.
+        recording = self._recordings.get(store_key)
+        if recording is None or action == CacheAction.REFRESH:
+            recording = StreamRecording()
+            self._recordings[store_key] = recording
+            recording.task = asyncio.create_task(self._record(recording, invoke, cache_config, build_metadata))
         response.headers[CACHE_STATUS_HEADER] = (
             CacheStatus.REFRESH if action == CacheAction.REFRESH else CacheStatus.MISS
         )
-        return result
+        return recording.subscribe()
 
-    def metadata(self) -> dict[str, CacheEntryMetadata]:
-        if settings.cache.mode == "file":
-            return self._file_metadata()
-        self._drop_expired_memory()
-        return dict(self._memory_metadata)
+    async def _record(
+        self,
+        recording: StreamRecording,
+        invoke: Callable[[], AsyncIterable[Any]],
+        cache_config: dict[str, Any],
+        build_metadata: Callable[[], CacheEntryMetadata],
+    ) -> None:
+        entry_metadata = build_metadata()
+        started = time.perf_counter()
+        try:
+            async for chunk in invoke():
+                recording.append(time.perf_counter() - started, chunk)
+        except BaseException as exc:
+            recording.finish(exc)
+            if self._recordings.get(entry_metadata.store_key) is recording:
+                del self._recordings[entry_metadata.store_key]
+            if not isinstance(exc, Exception):
+                raise
+            return
+        recording.finish()
+        entry_metadata.stream = True
+        try:
+            await self._store([[offset, chunk] for offset, chunk in recording.chunks], entry_metadata, cache_config)
+        finally:
+            if self._recordings.get(entry_metadata.store_key) is recording:
+                del self._recordings[entry_metadata.store_key]
 
-    async def get(self, store_key: str) -> Any:
-        if settings.cache.mode == "file":
-            return self._file_get(store_key)
-        self._drop_expired_memory()
-        return await self._memory_cache.get(store_key)
-
-    async def set(self, store_key: str, value: Any, metadata: CacheEntryMetadata) -> bool:
-        if settings.cache.mode == "file":
-            return self._file_set(store_key, value, metadata)
-        await self._memory_cache.set(store_key, value, ttl=None if metadata.ttl == -1 else metadata.ttl)
-        self._memory_metadata[store_key] = metadata
+    async def _prepare(
+        self,
+        method: str,
+        path: str,
+        cache_config: dict[str, Any],
+        request_kwargs: dict[str, Any],
+        *,
+        request: Request | None = None,
+        scope: str | None = None,
+    ) -> tuple[str, str, Callable[[], CacheEntryMetadata]]:
         await self.cleanup()
-        return True
+        ttl = _resolve_ttl(cache_config)
+        cache_context = CacheContext(await self.metadata() if cache_config.get("key_builder") else {})
+        arguments = _stable_value(request_kwargs) if _keys_on_arguments(cache_config) else None
+        key = _build_cache_key(request, method, path, request_kwargs, arguments, cache_config, cache_context, scope)
+        tags = _resolve_tags(cache_config, request_kwargs, arguments, cache_context)
+        store_key = _hash_key(key)
+
+        def build_metadata() -> CacheEntryMetadata:
+            created_at = datetime.now(REQUEST_CACHE_TIMEZONE)
+            return CacheEntryMetadata(
+                key=key,
+                store_key=store_key,
+                store=self.backend.store,
+                created_at=created_at,
+                expires_at=None if ttl == -1 else created_at + timedelta(seconds=ttl),
+                ttl=ttl,
+                path=path,
+                method=method,
+                request_body=_stable_value(request_kwargs) if arguments is None else arguments,
+                tags=tags,
+                stale_ttl=cache_config.get("stale_ttl", 0),
+                stale_if_error=cache_config.get("stale_if_error", 0),
+            )
+
+        return key, store_key, build_metadata
+
+    async def _lookup(self, path: str, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        started = time.perf_counter()
+        entry = await self.get_entry(store_key)
+        self.stats.route(path).lookup.observe(time.perf_counter() - started)
+        return entry
+
+    async def _invoke_and_store(
+        self,
+        invoke: Callable[[], Awaitable[Any]],
+        cache_config: dict[str, Any],
+        build_metadata: Callable[[], CacheEntryMetadata],
+        *,
+        encode: bool = True,
+        fallback: tuple[Any, CacheEntryMetadata] | None = None,
+    ) -> tuple[Any, CacheEntryMetadata]:
+        # Only cut the call short when there is a stale entry to serve instead.
+        if fallback is not None and (timeout := cache_config.get("timeout")) is not None:
+            value = await asyncio.wait_for(invoke(), timeout=timeout)
+        else:
+            value = await invoke()
+        entry_metadata = build_metadata()
+        if encode and cache_config.get("serialize") and not isinstance(value, Response):
+            value = _encode_body(value)
+            entry_metadata.content_type = "application/json"
+            if cache_config.get("precompress"):
+                value = gzip.compress(value, compresslevel=6)
+                entry_metadata.content_encoding = "gzip"
+        await self._store(value, entry_metadata, cache_config)
+        return value, entry_metadata
+
+    async def _store(self, value: Any, entry_metadata: CacheEntryMetadata, cache_config: dict[str, Any]) -> None:
+        started = time.perf_counter()
+        try:
+            await self.set(
+                entry_metadata.store_key,
+                value,
+                entry_metadata,
+                max_entry_bytes=cache_config.get("max_entry_bytes"),
+                admission=cache_config.get("admission", settings.cache.admission),
+            )
+        except Exception as exc:
+            logger.warning(f"Failed to write request cache key {entry_metadata.key!r}: {exc}")
+        else:
+            self.stats.route(entry_metadata.path).store.observe(time.perf_counter() - started)
 
-    async def cleanup(self) -> None:
-        if settings.cache.mode == "file":
-            self._file_cleanup()
+    def _schedule_refresh(self, store_key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+        if store_key in self._refresh_tasks:
             return
-        self._drop_expired_memory()
-        while len(self._memory_metadata) > settings.cache.max_size:
-            oldest_key = min(self._memory_metadata, key=lambda key: self._memory_metadata[key].created_at)
-            await self._memory_cache.delete(oldest_key)
-            self._memory_metadata.pop(oldest_key, None)
 
-    async def clear(self) -> None:
-        if self._memory is not None:
-            await self._memory.clear()
-        self._memory_metadata.clear()
-        for path in self._file_dir().glob("*.json"):
-            path.unlink(missing_ok=True)
+        async def _refresh() -> None:
+            try:
+                await refresh()
+            except Exception as exc:
+                logger.warning(f"Failed to revalidate request cache key {store_key!r}: {exc!r}")
+            finally:
+                self._refresh_tasks.pop(store_key, None)
+
+        self._refresh_tasks[store_key] = asyncio.create_task(_refresh())
 
     @property
-    def _memory_cache(self) -> Cache:
-        if self._memory is None:
-            self._memory = Cache(Cache.MEMORY, namespace="framex-request-cache")
-        return self._memory
-
-    def _drop_expired_memory(self) -> None:
-        now = datetime.now(REQUEST_CACHE_TIMEZONE)
-        for key, metadata in list(self._memory_metadata.items()):
-            if metadata.expires_at is not None and metadata.expires_at <= now:
-                self._memory_metadata.pop(key, None)
-
-    def _file_get(self, store_key: str) -> Any:
-        self._file_cleanup()
-        entry = self._read_file(self._file_path(store_key))
-        if not entry:
-            return None
-        return entry["value"]
+    def backend(self) -> CacheBackend:
+        store = settings.cache.mode
+        if (backend := self._backends.get(store)) is None:
+            backend = self._backends[store] = create_cache_backend(store, self.stats)
+        return backend
 
-    def _file_set(self, store_key: str, value: Any, metadata: CacheEntryMetadata) -> bool:
-        try:
-            cache_value = jsonable_encoder(value)
-            json.dumps(cache_value)
-        except (TypeError, ValueError):
-            logger.warning(f"Cache value for key {metadata.key!r} is not JSON serializable; skip file cache write.")
-            return False
-        self._file_dir().mkdir(parents=True, exist_ok=True)
-        self._file_path(store_key).write_text(
-            json.dumps(
-                {"metadata": metadata.model_dump(mode="json"), "value": cache_value}, ensure_ascii=False, indent=2
-            ),
-            encoding="utf-8",
-        )
-        self._file_cleanup()
-        return True
-
-    def _file_metadata(self) -> dict[str, CacheEntryMetadata]:
-        self._file_cleanup()
-        metadata: dict[str, CacheEntryMetadata] = {}
-        for path in self._file_dir().glob("*.json"):
-            entry = self._read_file(path)
-            if entry:
-                metadata[entry["metadata"].store_key] = entry["metadata"]
-        return metadata
-
-    def _file_cleanup(self) -> None:
-        now = datetime.now(REQUEST_CACHE_TIMEZONE)
-        entries: list[tuple[Path, CacheEntryMetadata]] = []
-        for path in self._file_dir().glob("*.json"):
-            entry = self._read_file(path)
-            if not entry or (entry["metadata"].expires_at is not None and entry["metadata"].expires_at <= now):
-                path.unlink(missing_ok=True)
-                continue
-            entries.append((path, entry["metadata"]))
-        entries.sort(key=lambda item: item[1].created_at)
-        for path, _metadata in entries[: max(0, len(entries) - settings.cache.max_size)]:
-            path.unlink(missing_ok=True)
+    async def metadata(self) -> dict[str, CacheEntryMetadata]:
+        return await self.backend.metadata()
 
-    def _read_file(self, path: Path) -> dict[str, Any] | None:
-        if not path.exists():
-            return None
+    async def get(self, store_key: str) -> Any:
+        entry = await self.get_entry(store_key)
+        return None if entry is None else entry[0]
+
+    async def get_entry(self, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        return await self.backend.get(store_key)
+
+    async def set(
+        self,
+        store_key: str,
+        value: Any,
+        metadata: CacheEntryMetadata,
+        *,
+        max_entry_bytes: int | None = None,
+        admission: CacheAdmission = "always",
+    ) -> bool:
+        return await self.backend.set(store_key, value, metadata, max_entry_bytes=max_entry_bytes, admission=admission)
+
+    async def cleanup(self) -> None:
+        await self.backend.cleanup()
+
+    async def purge(
+        self,
+        *,
+        tags: Iterable[str] = (),
+        path_prefix: str | None = None,
+        store_keys: Iterable[str] = (),
+    ) -> list[str]:
+        tags, store_keys = set(tags), set(store_keys)
+        if not tags and path_prefix is None and not store_keys:
+            raise ValueError("purge requires at least one tag, path prefix or store key")
+        purged = await self.backend.purge(tags=tags, path_prefix=path_prefix, store_keys=store_keys)
+        logger.info(f"Purged {len(purged)} request cache entries")
+        return purged
+
+    async def stats_report(self) -> dict[str, Any]:
+        usage: dict[str, tuple[int, int]] = {}
+        for metadata in (await self.metadata()).values():
+            entries, size = usage.get(metadata.path, (0, 0))
+            usage[metadata.path] = (entries + 1, size + metadata.size)
+        return self.stats.report(usage)
+
+    async def clear(self) -> None:
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        self._refresh_tasks.clear()
+        for recording in list(self._recordings.values()):
+            if recording.task is not None:
+                recording.task.cancel()
+        self._recordings.clear()
+        for backend in self._backends.values():
+            await backend.clear()
+
+    async def close(self) -> None:
+        for backend in self._backends.values():
+            await backend.close()
+
+    async def snapshot(self) -> int:
+        if not settings.cache.enabled or settings.cache.snapshot_path is None:
+            return 0
         try:
-            payload = json.loads(path.read_text(encoding="utf-8"))
-            metadata = CacheEntryMetadata.model_validate(payload["metadata"])
-            return {"metadata": metadata, "value": payload.get("value")}
-        except (OSError, TypeError, ValueError, json.JSONDecodeError, KeyError) as exc:
-            logger.warning(f"Failed to read cache file {path}: {exc}")
-            return None
+            count = await self.backend.snapshot(Path(settings.cache.snapshot_path))
+        except Exception as exc:
+            logger.warning(f"Failed to write request cache snapshot: {exc}")
+            return 0
+        if count:
+            logger.info(f"Request cache snapshot written: {count} entries")
+        return count
+
+    async def restore(self) -> int:
+        if not settings.cache.enabled or settings.cache.snapshot_path is None:
+            return 0
+        count = await self.backend.restore(Path(settings.cache.snapshot_path))
+        if count:
+            logger.info(f"Request cache snapshot restored: {count} entries")
+        return count
+
+    def register_warmup(
+        self,
+        path: str,
+        methods: Iterable[str],
+        cache_config: dict[str, Any],
+        params: Iterable[tuple[str, Any]],
+        invoke: Callable[[dict[str, Any]], Awaitable[Any]],
+    ) -> None:
+        route = WarmupRoute(path=path, cache_config=cache_config, params=dict(params), invoke=invoke)
+        for method in methods:
+            self._warmup_routes[(method.upper(), path)] = route
+
+    def unregister_warmup(self, path: str, methods: Iterable[str]) -> None:
+        for method in methods:
+            self._warmup_routes.pop((method.upper(), path), None)
 
-    def _file_path(self, store_key: str) -> Path:
-        return self._file_dir() / f"{store_key}.json"
+    @property
+    def ready(self) -> bool:
+        return self._warmup_task is None or self._warmup_task.done()
 
-    def _file_dir(self) -> Path:
-        return Path(settings.cache.file_dir)
+    def start_warm_up(self, after: Iterable[Awaitable[Any]] = ()) -> asyncio.Task[int] | None:
+        if not settings.cache.enabled or not settings.cache.warmup:
+            return None
+
+        async def _warm_up() -> int:
+            await asyncio.gather(*after, return_exceptions=True)
+            return await self.warm_up()
+
+        self._warmup_task = asyncio.create_task(_warm_up())
+        return self._warmup_task
+
+    async def warm_up(self) -> int:
+        started_at = time.perf_counter()
+        semaphore = asyncio.Semaphore(settings.cache.warmup_concurrency)
+        statuses: Counter[str] = Counter()
+
+        async def _warm(method: str, route: WarmupRoute, raw_kwargs: dict[str, Any]) -> None:
+            async with semaphore:
+                response = Response()
+                try:
+                    request_kwargs = _validate_warmup_kwargs(route.params, raw_kwargs)
+                    await self.call(
+                        request=Request({"type": "http", "method": method, "path": route.path, "headers": []}),
+                        response=response,
+                        path=route.path,
+                        cache_config=route.cache_config,
+                        request_kwargs=request_kwargs,
+                        invoke=lambda: route.invoke(request_kwargs),
+                    )
+                except Exception as exc:
+                    logger.warning(f"Failed to warm up request cache for {method} {route.path}: {exc!r}")
+                    statuses["ERROR"] += 1
+                    return
+                statuses[response.headers.get(CACHE_STATUS_HEADER, CacheStatus.BYPASS)] += 1
+
+        jobs: list[Awaitable[None]] = []
+        for entry in settings.cache.warmup:
+            if (route := self._warmup_routes.get((entry.method, entry.path))) is None:
+                logger.warning(f"Skip request cache warm-up for {entry.method} {entry.path}: no cached route")
+                continue
+            jobs.extend(_warm(entry.method, route, raw_kwargs) for raw_kwargs in entry.requests)
+        await asyncio.gather(*jobs)
+        summary = ", ".join(f"{status} {count}" for status, count in sorted(statuses.items()))
+        logger.info(
+            f"Request cache warm-up finished in {time.perf_counter() - started_at:.2f}s: {summary or 'nothing to warm'}"
+        )
+        return statuses.total() - statuses["ERROR"]
 
 
 request_cache = RequestCache()
@@ -254,11 +674,84 @@ def normalize_cache_config(cache_config: dict[str, Any] | None) -> dict[str, Any
     normalized = dict(cache_config)
     if "ttl" in normalized:
         _validate_ttl(normalized["ttl"])
-    if (key_builder := normalized.get("key_builder")) and not callable(key_builder):
-        raise TypeError("@on_request cache['key_builder'] must be callable")
+    for option in ("stale_ttl", "stale_if_error"):
+        if option in normalized:
+            _validate_stale_window(option, normalized[option])
+    if "timeout" in normalized:
+        _validate_timeout(normalized["timeout"])
+    for option in ("serialize", "precompress", "replay_pacing", "scope_by_caller"):
+        if option in normalized and not isinstance(normalized[option], bool):
+            raise TypeError(f"@on_request cache[{option!r}] must be a bool")
+    if normalized.get("precompress") and not normalized.get("serialize"):
+        raise ValueError("@on_request cache['precompress'] requires cache['serialize']")
+    if "max_entry_bytes" in normalized:
+        max_entry_bytes = normalized["max_entry_bytes"]
+        if not isinstance(max_entry_bytes, int) or isinstance(max_entry_bytes, bool) or max_entry_bytes <= 0:
+            raise ValueError("cache max_entry_bytes must be a positive integer")
+    if "admission" in normalized and normalized["admission"] not in get_args(CacheAdmission):
+        raise ValueError(f"@on_request cache['admission'] must be one of {get_args(CacheAdmission)}")
+    if "tags" in normalized:
+        if isinstance(normalized["tags"], str):
+            raise TypeError("@on_request cache['tags'] must be a list of strings")
+        normalized["tags"] = _validate_tags(normalized["tags"])
+    if key_builder := normalized.get("key_builder"):
+        if not callable(key_builder):
+            raise TypeError("@on_request cache['key_builder'] must be callable")
+        # Analyze the signature at registration so requests reuse the memoized style.
+        with contextlib.suppress(TypeError):
+            _key_builder_style(key_builder)
+    if "vary_on" in normalized:
+        if isinstance(normalized["vary_on"], str):
+            raise TypeError("@on_request cache['vary_on'] must be a list of strings")
+        normalized["vary_on"] = _validate_vary_on(normalized["vary_on"])
+        if normalized.get("key_builder"):
+            raise ValueError("@on_request cache['vary_on'] cannot be combined with cache['key_builder']")
     return normalized
 
 
+def _validate_warmup_kwargs(params: Mapping[str, Any], raw_kwargs: dict[str, Any]) -> dict[str, Any]:
+    request_kwargs: dict[str, Any] = {}
+    for name, value in raw_kwargs.items():
+        if name not in params:
+            raise ValueError(f"unknown parameter {name!r}")
+        try:
+            adapter: TypeAdapter[Any] = TypeAdapter(params[name])
+        except PydanticSchemaGenerationError:
+            request_kwargs[name] = value
+            continue
+        request_kwargs[name] = adapter.validate_python(value)
+    return request_kwargs
+
+
+def _validate_tags(tags: Iterable[Any]) -> list[str]:
+    tags = list(tags)
+    if not all(isinstance(tag, str) and tag for tag in tags):
+        raise ValueError("cache tags must be non-empty strings")
+    return tags
+
+
+def _validate_vary_on(fields: Iterable[Any]) -> list[str]:
+    fields = list(fields)
+    if not fields or not all(isinstance(field, str) and field and "" not in field.split(".") for field in fields):
+        raise ValueError("cache vary_on must be a non-empty list of field names")
+    return sorted(set(fields))
+
+
+def _resolve_tags(
+    cache_config: dict[str, Any],
+    request_kwargs: dict[str, Any],
+    arguments: dict[str, Any] | None,
+    cache_context: CacheContext,
+) -> list[str]:
+    if not cache_config.get("tags"):
+        return sorted(set(cache_context.tags))
+    if arguments is None:
+        arguments = _stable_value(request_kwargs)
+    # Route tags may reference handler arguments, e.g. "project:{project_id}".
+    tags = [tag.format_map(arguments) for tag in cache_config.get("tags", ())]
+    return sorted({*tags, *cache_context.tags})
+
+
 def _resolve_ttl(cache_config: dict[str, Any]) -> int:
     return _validate_ttl(cache_config.get("ttl", settings.cache.ttl))
 
@@ -269,6 +762,58 @@ def _validate_ttl(ttl: Any) -> int:
     return ttl
 
 
+def _validate_stale_window(option: str, seconds: Any) -> int:
+    if not isinstance(seconds, int) or isinstance(seconds, bool) or seconds < 0:
+        raise ValueError(f"cache {option} must be a non-negative integer")
+    return seconds
+
+
+def _validate_timeout(timeout: Any) -> float:
+    if not isinstance(timeout, int | float) or isinstance(timeout, bool) or timeout <= 0:
+        raise ValueError("cache timeout must be a positive number")
+    return float(timeout)
+
+
+def _encode_body(value: Any) -> bytes:
+    # Same encoding as JSONResponse.render, so cached bodies are byte-identical to uncached ones.
+    return json.dumps(
+        jsonable_encoder(value),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _cached_response(value: Any, metadata: CacheEntryMetadata, request: Request, response: Response) -> Any:
+    if metadata.tier is not None:
+        response.headers[CACHE_TIER_HEADER] = metadata.tier
+    if metadata.content_type is None:
+        return value
+    headers = {key: val for key, val in response.headers.items() if key != "content-length"}
+    if metadata.content_encoding == "gzip":
+        if response.headers.get("X-Raw-Output") == "True" and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["content-encoding"] = "gzip"
+            headers["vary"] = "Accept-Encoding"
+            return Response(content=value, media_type=metadata.content_type, headers=headers)
+        value = gzip.decompress(value)
+    setattr(request.state, CACHE_ENCODED_STATE, True)
+    return Response(content=value, media_type=metadata.content_type, headers=headers)
+
+
+def _keys_on_arguments(cache_config: dict[str, Any]) -> bool:
+    return not cache_config.get("key_builder") and not cache_config.get("vary_on")
+
+
+async def _replay(chunks: Iterable[Sequence[Any]], *, pacing: bool) -> AsyncIterator[Any]:
+    elapsed = 0.0
+    for offset, chunk in chunks:
+        if pacing and offset > elapsed:
+            await asyncio.sleep(offset - elapsed)
+        elapsed = max(elapsed, offset)
+        yield chunk
+
+
 def _cache_action(request: Request) -> CacheAction:
     try:
         return CacheAction(request.headers.get(CACHE_REQUEST_HEADER, CacheAction.USE).strip().lower())
@@ -277,20 +822,31 @@ def _cache_action(request: Request) -> CacheAction:
 
 
 def _build_cache_key(
-    request: Request,
+    request: Request | None,
+    method: str,
     path: str,
     request_kwargs: dict[str, Any],
+    arguments: dict[str, Any] | None,
     cache_config: dict[str, Any],
-    metadata: Mapping[str, CacheEntryMetadata],
+    cache_context: CacheContext,
+    scope: str | None = None,
 ) -> str:
     if key_builder := cache_config.get("key_builder"):
-        key = _call_key_builder(key_builder, request, CacheContext(metadata), request_kwargs)
+        if request is None:
+            raise ValueError("cache key_builder requires an HTTP request")
+        key = _call_key_builder(key_builder, request, cache_context, request_kwargs)
     else:
+        if vary_on := cache_config.get("vary_on"):
+            varied: dict[str, Any] = {"vary": _vary_values(request_kwargs, vary_on)}
+        else:
+            varied = {"kwargs": _stable_value(request_kwargs) if arguments is None else arguments}
+        if scope is not None:
+            varied["scope"] = scope
         key = json.dumps(
             {
-                "method": request.method.upper(),
+                "method": method,
                 "path": path,
-                "kwargs": _stable_value(request_kwargs),
+                **varied,
             },
             ensure_ascii=False,
             sort_keys=True,
@@ -307,10 +863,23 @@ def _call_key_builder(
     cache_context: CacheContext,
     request_kwargs: dict[str, Any],
 ) -> Any:
-    signature = inspect.signature(key_builder)
-    parameters = list(signature.parameters.values())
-    if any(parameter.kind == inspect.Parameter.VAR_POSITIONAL for parameter in parameters):
+    try:
+        style = _key_builder_style(key_builder)
+    except TypeError:
+        # Unhashable callables cannot be memoized; analyze them on every call.
+        style = _key_builder_style.__wrapped__(key_builder)
+    if style == "positional":
         return key_builder(request, cache_context, request_kwargs)
+    if style == "keyword":
+        return key_builder(request, cache_context, request_kwargs=request_kwargs)
+    return key_builder(request, cache_context)
+
+
+@functools.lru_cache(maxsize=1024)
+def _key_builder_style(key_builder: Callable[..., Any]) -> KeyBuilderStyle:
+    parameters = list(inspect.signature(key_builder).parameters.values())
+    if any(parameter.kind == inspect.Parameter.VAR_POSITIONAL for parameter in parameters):
+        return "positional"
     if any(
         parameter.name == "request_kwargs"
         and parameter.kind
@@ -320,7 +889,7 @@ def _call_key_builder(
         }
         for parameter in parameters
     ):
-        return key_builder(request, cache_context, request_kwargs=request_kwargs)
+        return "keyword"
     positional_parameters = [
         parameter
         for parameter in parameters
@@ -331,24 +900,36 @@ def _call_key_builder(
         }
     ]
     if len(positional_parameters) >= 3:
-        return key_builder(request, cache_context, request_kwargs)
-    return key_builder(request, cache_context)
+        return "positional"
+    return "context"
 
 
 def _stable_value(value: Any) -> Any:
+    # Dispatch on type instead of probing every leaf with json.dumps; key order is
+    # canonicalized once by the sort_keys pass of the final dump.
+    if isinstance(value, _JSON_SCALARS):
+        return value
     if isinstance(value, BaseModel):
-        return _stable_value(value.model_dump(mode="json", by_alias=True))
+        return value.model_dump(mode="json", by_alias=True)
     if isinstance(value, Mapping):
-        return {str(key): _stable_value(val) for key, val in sorted(value.items(), key=lambda item: str(item[0]))}
-    if isinstance(value, set):
-        return [_stable_value(item) for item in sorted(value, key=repr)]
+        return {str(key): _stable_value(val) for key, val in value.items()}
     if isinstance(value, (list, tuple)):
         return [_stable_value(item) for item in value]
-    try:
-        json.dumps(value)
-        return value
-    except (TypeError, ValueError):
-        return repr(value)
+    if isinstance(value, (set, frozenset)):
+        return [_stable_value(item) for item in sorted(value, key=repr)]
+    return repr(value)
+
+
+def _vary_values(request_kwargs: dict[str, Any], vary_on: Iterable[str]) -> dict[str, Any]:
+    return {field: _stable_value(_lookup_field(request_kwargs, field)) for field in vary_on}
+
+
+def _lookup_field(value: Any, field: str) -> Any:
+    for part in field.split("."):
+        value = value.get(part) if isinstance(value, Mapping) else getattr(value, part, None)
+        if value is None:
+            return None
+    return value
 
 
 def _hash_key(key: str) -> str:
@@ -0,0 +1,1392 @@
+import asyncio
+import base64
+import heapq
+import json
+import pickle
+import shutil
+import sqlite3
+import ssl
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager, suppress
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Literal, TypeVar
+from urllib.parse import quote, unquote, urlparse
+from zoneinfo import ZoneInfo
+
+from aiocache import Cache
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field, PrivateAttr
+
+from framex.config import settings
+from framex.consts import CacheTier
+from framex.driver.cache_stats import CacheStats
+from framex.log import logger
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+CacheStore = Literal["memory", "file", "sqlite", "remote", "tiered"]
+CacheAdmission = Literal["always", "tinylfu"]
+REQUEST_CACHE_TIMEZONE = ZoneInfo("Asia/Shanghai")
+SNAPSHOT_VERSION = 1
+
+_T = TypeVar("_T")
+
+
+class CacheEntryMetadata(BaseModel):
+    key: str
+    store_key: str
+    store: CacheStore
+    created_at: datetime
+    expires_at: datetime | None
+    ttl: int
+    path: str
+    method: str
+    request_body: dict[str, Any] = Field(default_factory=dict)
+    tags: list[str] = Field(default_factory=list)
+    stale_ttl: int = 0
+    stale_if_error: int = 0
+    content_type: str | None = None
+    content_encoding: str | None = None
+    size: int = 0
+    compression: Literal["zlib", "zstd"] | None = None
+    stream: bool = False
+    tier: CacheTier | None = Field(default=None, exclude=True)
+    # Expiry is checked on every lookup, so it is derived once from the fields it depends on.
+    _retain_until: datetime | None = PrivateAttr(default=None)
+    _retain_timestamp: float | None = PrivateAttr(default=None)
+
+    def model_post_init(self, _context: Any, /) -> None:
+        if self.expires_at is not None:
+            self._retain_until = self.expires_at + timedelta(seconds=max(self.stale_ttl, self.stale_if_error))
+            self._retain_timestamp = self._retain_until.timestamp()
+
+    @property
+    def retain_until(self) -> datetime | None:
+        return self._retain_until
+
+    @property
+    def retain_timestamp(self) -> float | None:
+        return self._retain_timestamp
+
+    def is_fresh(self, now: datetime) -> bool:
+        return self.expires_at is None or now < self.expires_at
+
+    def is_revalidatable(self, now: datetime) -> bool:
+        return self.expires_at is not None and now < self.expires_at + timedelta(seconds=self.stale_ttl)
+
+    def is_error_fallback(self, now: datetime) -> bool:
+        return self.expires_at is not None and now < self.expires_at + timedelta(seconds=self.stale_if_error)
+
+    def is_expired(self, now: datetime) -> bool:
+        return self._retain_timestamp is not None and self._retain_timestamp <= now.timestamp()
+
+
+class CacheBackend(ABC):
+    """Storage interface behind `RequestCache`, selected by `cache.mode`."""
+
+    store: CacheStore
+
+    def __init__(self) -> None:
+        # Shared with `RequestCache` by `create_cache_backend`; backends report removals here.
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        """Return the live value and metadata stored under `store_key`."""
+
+    @abstractmethod
+    async def set(
+        self,
+        store_key: str,
+        value: Any,
+        metadata: CacheEntryMetadata,
+        *,
+        max_entry_bytes: int | None = None,
+        admission: CacheAdmission = "always",
+    ) -> bool:
+        """Store a value and return whether it was admitted; only the memory store applies `admission`."""
+
+    @abstractmethod
+    async def metadata(self) -> dict[str, CacheEntryMetadata]:
+        """Return metadata of all live entries keyed by store key."""
+
+    @abstractmethod
+    async def delete(self, store_keys: Iterable[str]) -> None:
+        """Remove the given entries."""
+
+    @abstractmethod
+    async def purge(
+        self,
+        *,
+        tags: Collection[str] = (),
+        path_prefix: str | None = None,
+        store_keys: Collection[str] = (),
+    ) -> list[str]:
+        """Remove entries matching any tag, the path prefix or a store key and return their store keys."""
+
+    @abstractmethod
+    async def cleanup(self) -> None:
+        """Drop expired entries and evict the oldest ones while over budget."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove every entry."""
+
+    async def close(self) -> None:  # noqa: B027
+        """Release connections held by the backend."""
+
+    async def snapshot(self, path: Path) -> int:  # noqa: ARG002
+        """Persist live entries to `path`; stores that already persist have nothing to write."""
+        return 0
+
+    async def restore(self, path: Path) -> int:  # noqa: ARG002
+        """Load entries written by `snapshot`, skipping expired ones."""
+        return 0
+
+
+class FrequencySketch:
+    """Count-min sketch of saturating 4-bit counters that estimates recent request frequency.
+
+    Counters are halved after every `10 * width` recorded increments, so keys that stopped
+    being requested lose their weight over time.
+    """
+
+    depth = 4
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        # At least 64 counters per row keep collisions rare for small caches.
+        self._width = 1 << max(6, (capacity - 1).bit_length())
+        self._table = bytearray(self.depth * self._width)
+        self._sample_size = 10 * self._width
+        self._additions = 0
+
+    def increment(self, key: str) -> None:
+        added = False
+        for index in self._indexes(key):
+            if self._table[index] < 15:
+                self._table[index] += 1
+                added = True
+        if added:
+            self._additions += 1
+            if self._additions >= self._sample_size:
+                self._table = bytearray(count >> 1 for count in self._table)
+                self._additions //= 2
+
+    def estimate(self, key: str) -> int:
+        return min(self._table[index] for index in self._indexes(key))
+
+    def _indexes(self, key: str) -> list[int]:
+        # Double hashing over the process-local string hash; the sketch is never shared.
+        hashed = hash(key) & 0xFFFFFFFFFFFFFFFF
+        low, high = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        mask = self._width - 1
+        return [row * self._width + ((low + row * high) & mask) for row in range(self.depth)]
+
+
+class MemoryCacheBackend(CacheBackend):
+    store: CacheStore = "memory"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._memory: Cache | None = None
+        # Insertion ordered, so the oldest entries come first when evicting.
+        self._metadata: dict[str, CacheEntryMetadata] = {}
+        self._total_bytes = 0
+        self._tag_index: dict[str, set[str]] = {}
+        self._path_index: dict[str, set[str]] = {}
+        # Min-heap of (retain timestamp, store key); replaced entries leave stale items that are skipped on pop.
+        self._expiry: list[tuple[float, str]] = []
+        self._sketch: FrequencySketch | None = None
+
+    async def get(self, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        self._drop_expired()
+        self._frequency.increment(store_key)
+        if (metadata := self._metadata.get(store_key)) is None:
+            return None
+        value = await self._cache.get(store_key)
+        if value is None:
+            return None
+        if metadata.compression is not None:
+            raw = _decompress(value, metadata.compression)
+            # Pickled by this process in `set`; memory entries never come from outside.
+            value = raw if metadata.content_type is not None else pickle.loads(raw)  # noqa: S301
+        return value, metadata
+
+    async def set(
+        self,
+        store_key: str,
+        value: Any,
+        metadata: CacheEntryMetadata,
+        *,
+        max_entry_bytes: int | None = None,
+        admission: CacheAdmission = "always",
+    ) -> bool:
+        stored = value
+        if metadata.content_type is not None or _tracks_size(max_entry_bytes):
+            raw = value if metadata.content_type is not None else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            packed = _compress_value(raw, metadata)
+            metadata.size = len(packed)
+            if metadata.compression is not None:
+                stored = packed
+        if not _admit(metadata, max_entry_bytes):
+            return False
+        if admission == "tinylfu" and not self._wins_admission(store_key, metadata):
+            logger.debug(f"Skip request cache key {metadata.key!r}: less frequent than the entries it would evict")
+            self.stats.record_rejections([metadata.path])
+            return False
+        retain_until = metadata.retain_until
+        await self._cache.set(
+            store_key,
+            stored,
+            ttl=None if retain_until is None else (retain_until - metadata.created_at).total_seconds(),
+        )
+        self._put_metadata(store_key, metadata)
+        await self.cleanup()
+        return True
+
+    async def metadata(self) -> dict[str, CacheEntryMetadata]:
+        self._drop_expired()
+        return dict(self._metadata)
+
+    async def delete(self, store_keys: Iterable[str]) -> None:
+        for store_key in store_keys:
+            await self._cache.delete(store_key)
+            self._pop_metadata(store_key)
+
+    async def purge(
+        self,
+        *,
+        tags: Collection[str] = (),
+        path_prefix: str | None = None,
+        store_keys: Collection[str] = (),
+    ) -> list[str]:
+        matched = {store_key for store_key in store_keys if store_key in self._metadata}
+        for tag in tags:
+            matched.update(self._tag_index.get(tag, ()))
+        if path_prefix is not None:
+            for path, keys in self._path_index.items():
+                if path.startswith(path_prefix):
+                    matched.update(keys)
+        await self.delete(matched)
+        return sorted(matched)
+
+    async def cleanup(self) -> None:
+        self._drop_expired()
+        evicted = self._oldest_over_budget(len(self._metadata), self._total_bytes)
+        if not evicted:
+            return
+        self.stats.record_evictions(self._metadata[store_key].path for store_key in evicted)
+        await self.delete(evicted)
+
+    async def clear(self) -> None:
+        if self._memory is not None:
+            await self._memory.clear()
+        self._metadata.clear()
+        self._total_bytes = 0
+        self._tag_index.clear()
+        self._path_index.clear()
+        self._expiry.clear()
+
+    async def snapshot(self, path: Path) -> int:
+        self._drop_expired()
+        entries: list[tuple[str, bytes, str]] = []
+        for store_key, metadata in self._metadata.items():
+            if (value := await self._cache.get(store_key)) is None:
+                continue
+            try:
+                packed = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError) as exc:
+                logger.warning(f"Skip snapshot of request cache key {metadata.key!r}: {exc}")
+                continue
+            entries.append((store_key, packed, metadata.model_dump_json()))
+        await asyncio.to_thread(_write_file, path, pickle.dumps({"version": SNAPSHOT_VERSION, "entries": entries}))
+        return len(entries)
+
+    async def restore(self, path: Path) -> int:
+        """Load a snapshot written by `snapshot`.
+
+        Snapshots are pickles and loading one can run arbitrary code, so `snapshot_path` must be
+        trusted: writable only by this service, never shared with or supplied by other parties.
+        """
+        try:
+            if (raw := await asyncio.to_thread(_read_file, path)) is None:
+                return 0
+            payload = pickle.loads(raw)  # noqa: S301
+            if payload.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"unsupported snapshot version {payload.get('version')!r}")
+            now = datetime.now(REQUEST_CACHE_TIMEZONE)
+            restored = 0
+            for store_key, packed, raw_metadata in payload["entries"]:
+                metadata = CacheEntryMetadata.model_validate_json(raw_metadata)
+                if metadata.is_expired(now):
+                    continue
+                retain_until = metadata.retain_until
+                await self._cache.set(
+                    store_key,
+                    pickle.loads(packed),  # noqa: S301
+                    ttl=None if retain_until is None else (retain_until - now).total_seconds(),
+                )
+                self._put_metadata(store_key, metadata)
+                restored += 1
+        except (OSError, EOFError, AttributeError, KeyError, ValueError, pickle.UnpicklingError) as exc:
+            logger.warning(f"Failed to restore request cache snapshot {path}: {exc}")
+            return 0
+        await self.cleanup()
+        return restored
+
+    @property
+    def _cache(self) -> Cache:
+        if self._memory is None:
+            self._memory = Cache(Cache.MEMORY, namespace="framex-request-cache")
+        return self._memory
+
+    @property
+    def _frequency(self) -> FrequencySketch:
+        if self._sketch is None or self._sketch.capacity != settings.cache.max_size:
+            self._sketch = FrequencySketch(settings.cache.max_size)
+        return self._sketch
+
+    def _wins_admission(self, store_key: str, metadata: CacheEntryMetadata) -> bool:
+        # TinyLFU: a new key only displaces entries that were requested less often than it.
+        if store_key in self._metadata:
+            return True
+        victims = self._oldest_over_budget(len(self._metadata) + 1, self._total_bytes + metadata.size)
+        if not victims:
+            return True
+        frequency = self._frequency.estimate(store_key)
+        return all(frequency > self._frequency.estimate(victim) for victim in victims)
+
+    def _oldest_over_budget(self, entries: int, total_bytes: int) -> list[str]:
+        victims: list[str] = []
+        for store_key, metadata in self._metadata.items():
+            if not _over_budget(entries, total_bytes):
+                break
+            victims.append(store_key)
+            entries -= 1
+            total_bytes -= metadata.size
+        return victims
+
+    def _drop_expired(self) -> None:
+        # Only the expired prefix of the heap is visited, so a sweep with nothing to drop is one comparison.
+        expiry = self._expiry
+        if not expiry or expiry[0][0] > (now := _now_timestamp()):
+            return
+        while expiry and expiry[0][0] <= now:
+            timestamp, store_key = heapq.heappop(expiry)
+            metadata = self._metadata.get(store_key)
+            if metadata is not None and metadata.retain_timestamp == timestamp:
+                self._pop_metadata(store_key)
+                self.stats.record_expirations([metadata.path])
+
+    def _put_metadata(self, store_key: str, metadata: CacheEntryMetadata) -> None:
+        self._pop_metadata(store_key)
+        self._metadata[store_key] = metadata
+        self._total_bytes += metadata.size
+        if (timestamp := metadata.retain_timestamp) is not None:
+            heapq.heappush(self._expiry, (timestamp, store_key))
+            if len(self._expiry) > 2 * len(self._metadata) + 64:
+                self._expiry = [
+                    (entry.retain_timestamp, key)
+                    for key, entry in self._metadata.items()
+                    if entry.retain_timestamp is not None
+                ]
+                heapq.heapify(self._expiry)
+        for tag in metadata.tags:
+            self._tag_index.setdefault(tag, set()).add(store_key)
+        self._path_index.setdefault(metadata.path, set()).add(store_key)
+
+    def _pop_metadata(self, store_key: str) -> None:
+        if (metadata := self._metadata.pop(store_key, None)) is None:
+            return
+        self._total_bytes -= metadata.size
+        for index, name in [(self._tag_index, tag) for tag in metadata.tags] + [(self._path_index, metadata.path)]:
+            if (keys := index.get(name)) is not None:
+                keys.discard(store_key)
+                if not keys:
+                    del index[name]
+
+
+class FileCacheBackend(CacheBackend):
+    """One JSON file per entry under `cache.file_dir`.
+
+    Empty marker files under `index/tag/<tag>/` and `index/path/<path>/`, named by store key,
+    let purges open only the entries they may match.
+    """
+
+    store: CacheStore = "file"
+
+    async def get(self, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        await self.cleanup()
+        entry = self._read(self._path(store_key))
+        if not entry:
+            return None
+        return entry["value"], entry["metadata"]
+
+    async def set(
+        self,
+        store_key: str,
+        value: Any,
+        metadata: CacheEntryMetadata,
+        *,
+        max_entry_bytes: int | None = None,
+        admission: CacheAdmission = "always",  # noqa: ARG002
+    ) -> bool:
+        if metadata.content_type is not None:
+            raw = value
+        else:
+            try:
+                cache_value = jsonable_encoder(value)
+                raw = json.dumps(cache_value, ensure_ascii=False).encode("utf-8")
+            except (TypeError, ValueError):
+                logger.warning(
+                    f"Cache value for key {metadata.key!r} is not JSON serializable; skip file cache write."
+                )
+                return False
+        packed = _compress_value(raw, metadata)
+        metadata.size = len(packed)
+        if not _admit(metadata, max_entry_bytes):
+            return False
+        payload: dict[str, Any] = {"metadata": metadata.model_dump(mode="json")}
+        if metadata.compression is not None:
+            payload["blob"] = base64.b64encode(packed).decode("ascii")
+        elif metadata.content_type is not None:
+            payload["body"] = (
+                value.decode("utf-8") if metadata.content_encoding is None else base64.b64encode(value).decode("ascii")
+            )
+        else:
+            payload["value"] = cache_value
+        self._dir().mkdir(parents=True, exist_ok=True)
+        self._path(store_key).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        for marker in self._markers(metadata):
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.touch()
+        await self.cleanup()
+        return True
+
+    async def metadata(self) -> dict[str, CacheEntryMetadata]:
+        await self.cleanup()
+        metadata: dict[str, CacheEntryMetadata] = {}
+        for path in self._dir().glob("*.json"):
+            entry = self._read(path)
+            if entry:
+                metadata[entry["metadata"].store_key] = entry["metadata"]
+        return metadata
+
+    async def delete(self, store_keys: Iterable[str]) -> None:
+        for store_key in store_keys:
+            self._unlink(store_key, self._read_metadata(self._path(store_key)))
+
+    async def purge(
+        self,
+        *,
+        tags: Collection[str] = (),
+        path_prefix: str | None = None,
+        store_keys: Collection[str] = (),
+    ) -> list[str]:
+        candidates: dict[str, list[Path]] = {store_key: [] for store_key in store_keys}
+        for marker in self._indexed(tags, path_prefix):
+            candidates.setdefault(marker.name, []).append(marker)
+        matched: list[str] = []
+        # Markers can outlive their entry or its old tags, so every candidate is checked against its metadata.
+        for store_key, markers in candidates.items():
+            metadata = self._read_metadata(self._path(store_key))
+            if metadata is not None and _matches(metadata, tags, path_prefix, store_keys):
+                self._unlink(store_key, metadata)
+                matched.append(store_key)
+            else:
+                for marker in markers:
+                    marker.unlink(missing_ok=True)
+        return sorted(matched)
+
+    async def cleanup(self) -> None:
+        now = datetime.now(REQUEST_CACHE_TIMEZONE)
+        entries: dict[str, CacheEntryMetadata] = {}
+        for path in self._dir().glob("*.json"):
+            entry = self._read(path)
+            if not entry or entry["metadata"].is_expired(now):
+                self._unlink(path.stem, entry["metadata"] if entry else None)
+                if entry:
+                    self.stats.record_expirations([entry["metadata"].path])
+                continue
+            entries[path.stem] = entry["metadata"]
+        evicted = _eviction_candidates(entries)
+        self.stats.record_evictions(entries[store_key].path for store_key in evicted)
+        for store_key in evicted:
+            self._unlink(store_key, entries[store_key])
+
+    async def clear(self) -> None:
+        for path in self._dir().glob("*.json"):
+            path.unlink(missing_ok=True)
+        shutil.rmtree(self._index_dir(), ignore_errors=True)
+
+    def _read(self, path: Path) -> dict[str, Any] | None:
+        if not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            metadata = CacheEntryMetadata.model_validate(payload["metadata"])
+            if metadata.compression is not None:
+                return {"metadata": metadata, "value": _unpack_value(base64.b64decode(payload["blob"]), metadata)}
+            if metadata.content_type is None:
+                return {"metadata": metadata, "value": payload.get("value")}
+            body = payload["body"]
+            value = body.encode("utf-8") if metadata.content_encoding is None else base64.b64decode(body)
+            return {"metadata": metadata, "value": value}
+        except (OSError, TypeError, ValueError, json.JSONDecodeError, KeyError) as exc:
+            logger.warning(f"Failed to read cache file {path}: {exc}")
+            return None
+
+    def _read_metadata(self, path: Path) -> CacheEntryMetadata | None:
+        try:
+            return CacheEntryMetadata.model_validate(json.loads(path.read_text(encoding="utf-8"))["metadata"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _unlink(self, store_key: str, metadata: CacheEntryMetadata | None) -> None:
+        self._path(store_key).unlink(missing_ok=True)
+        for marker in self._markers(metadata) if metadata is not None else ():
+            marker.unlink(missing_ok=True)
+            with suppress(OSError):
+                # Only succeeds once the tag or path has no entries left.
+                marker.parent.rmdir()
+
+    def _markers(self, metadata: CacheEntryMetadata) -> list[Path]:
+        index = self._index_dir()
+        return [index / "tag" / _index_name(tag) / metadata.store_key for tag in metadata.tags] + [
+            index / "path" / _index_name(metadata.path) / metadata.store_key
+        ]
+
+    def _indexed(self, tags: Collection[str], path_prefix: str | None) -> list[Path]:
+        index = self._index_dir()
+        directories = [index / "tag" / _index_name(tag) for tag in tags]
+        if path_prefix is not None and (paths := index / "path").is_dir():
+            directories.extend(path for path in paths.iterdir() if unquote(path.name).startswith(path_prefix))
+        return [marker for directory in directories if directory.is_dir() for marker in directory.iterdir()]
+
+    def _path(self, store_key: str) -> Path:
+        return self._dir() / f"{store_key}.json"
+
+    def _index_dir(self) -> Path:
+        return self._dir() / "index"
+
+    def _dir(self) -> Path:
+        return Path(settings.cache.file_dir)
+
+
+class SqliteCacheBackend(CacheBackend):
+    """Single-node store shared by every worker process that points at the same database file.
+
+    Queries run in a worker thread so lock waits never block the event loop. Entry and byte
+    totals live in `request_cache_usage`, kept current by triggers, and the expiry sweep runs
+    at most once per `cleanup_interval` unless this process has written since.
+    """
+
+    store: CacheStore = "sqlite"
+    cleanup_interval = 1.0
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._connection: sqlite3.Connection | None = None
+        self._connection_path: str | None = None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._swept_at = float("-inf")
+
+    async def get(self, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        row = await self._run(
+            lambda db: db.execute(
+                "SELECT metadata, value FROM request_cache "
+                "WHERE store_key = ? AND (retain_until IS NULL OR retain_until > ?)",
+                (store_key, _now_timestamp()),
+            ).fetchone()
+        )
+        if row is None:
+            return None
+        metadata = CacheEntryMetadata.model_validate_json(row[0])
+        return _unpack_value(row[1], metadata), metadata
+
+    async def set(
+        self,
+        store_key: str,
+        value: Any,
+        metadata: CacheEntryMetadata,
+        *,
+        max_entry_bytes: int | None = None,
+        admission: CacheAdmission = "always",  # noqa: ARG002
+    ) -> bool:
+        packed = _pack_value(value, metadata)
+        if packed is None or not _admit(metadata, max_entry_bytes):
+            return False
+        await self._run(self._insert, store_key, packed, metadata)
+        self._dirty = True
+        await self.cleanup()
+        return True
+
+    async def metadata(self) -> dict[str, CacheEntryMetadata]:
+        rows = await self._run(
+            lambda db: db.execute(
+                "SELECT metadata FROM request_cache WHERE retain_until IS NULL OR retain_until > ?",
+                (_now_timestamp(),),
+            ).fetchall()
+        )
+        entries = [CacheEntryMetadata.model_validate_json(row[0]) for row in rows]
+        return {metadata.store_key: metadata for metadata in entries}
+
+    async def delete(self, store_keys: Iterable[str]) -> None:
+        keys = [(key,) for key in store_keys]
+        await self._run(lambda db: self._delete(db, keys))
+
+    async def purge(
+        self,
+        *,
+        tags: Collection[str] = (),
+        path_prefix: str | None = None,
+        store_keys: Collection[str] = (),
+    ) -> list[str]:
+        # Fixed statements only; selectors are bound as parameters, lists as one JSON array each.
+        queries: list[tuple[str, tuple[Any, ...]]] = []
+        if store_keys:
+            queries.append(
+                (
+                    "SELECT store_key FROM request_cache WHERE store_key IN (SELECT value FROM json_each(?))",
+                    (json.dumps([*store_keys]),),
+                )
+            )
+        if tags:
+            queries.append(
+                (
+                    "SELECT store_key FROM request_cache_tags WHERE tag IN (SELECT value FROM json_each(?))",
+                    (json.dumps([*tags]),),
+                )
+            )
+        if path_prefix is not None:
+            # A range on the indexed column; LIKE would be case-insensitive and skip the index.
+            queries.append(
+                (
+                    "SELECT store_key FROM request_cache WHERE path >= ? AND path < ?",
+                    (path_prefix, path_prefix + "\U0010ffff"),
+                )
+            )
+        matched = await self._run(
+            lambda db: list({row[0] for query, params in queries for row in db.execute(query, params)})
+        )
+        await self.delete(matched)
+        return sorted(matched)
+
+    async def cleanup(self) -> None:
+        now = time.monotonic()
+        if not self._dirty and now - self._swept_at < self.cleanup_interval:
+            return
+        self._dirty, self._swept_at = False, now
+        expired, evicted = await self._run(self._sweep)
+        self.stats.record_expirations(expired)
+        self.stats.record_evictions(evicted)
+
+    async def clear(self) -> None:
+        await self._run(lambda db: db.execute("DELETE FROM request_cache"))
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+    async def _run(self, func: Callable[..., _T], *args: Any) -> _T:
+        return await asyncio.to_thread(self._call, func, *args)
+
+    def _call(self, func: Callable[..., _T], *args: Any) -> _T:
+        # One connection per backend; the lock keeps its transactions from interleaving across threads.
+        with self._lock:
+            return func(self._db, *args)
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+
+    def _insert(self, db: sqlite3.Connection, store_key: str, packed: bytes, metadata: CacheEntryMetadata) -> None:
+        retain_until = metadata.retain_timestamp
+        with self._transaction(db):
+            db.execute(
+                "INSERT OR REPLACE INTO request_cache "
+                "(store_key, metadata, value, path, created_at, retain_until, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    store_key,
+                    metadata.model_dump_json(),
+                    packed,
+                    metadata.path,
+                    metadata.created_at.timestamp(),
+                    retain_until,
+                    metadata.size,
+                ),
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO request_cache_tags (tag, store_key) VALUES (?, ?)",
+                [(tag, store_key) for tag in metadata.tags],
+            )
+
+    def _delete(self, db: sqlite3.Connection, keys: list[tuple[str]]) -> None:
+        with self._transaction(db):
+            db.executemany("DELETE FROM request_cache WHERE store_key = ?", keys)
+
+    def _sweep(self, db: sqlite3.Connection) -> tuple[list[str], list[str]]:
+        now = _now_timestamp()
+        expired: list[str] = []
+        # Probe the index first, so a sweep with nothing to drop never takes the write lock.
+        if db.execute("SELECT 1 FROM request_cache WHERE retain_until <= ? LIMIT 1", (now,)).fetchone():
+            rows = db.execute("DELETE FROM request_cache WHERE retain_until <= ? RETURNING path", (now,))
+            expired = [path for (path,) in rows.fetchall()]
+        entries, total_bytes = db.execute("SELECT entries, bytes FROM request_cache_usage").fetchone()
+        if not _over_budget(entries, total_bytes):
+            return expired, []
+        evicted: list[str] = []
+        evicted_paths: list[str] = []
+        for store_key, size, path in db.execute("SELECT store_key, size, path FROM request_cache ORDER BY created_at"):
+            if not _over_budget(entries, total_bytes):
+                break
+            evicted.append(store_key)
+            evicted_paths.append(path)
+            entries -= 1
+            total_bytes -= size
+        self._delete(db, [(key,) for key in evicted])
+        return expired, evicted_paths
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        path = settings.cache.sqlite_path
+        if self._connection is not None and self._connection_path == path:
+            return self._connection
+        if self._connection is not None:
+            self._connection.close()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Lets the row deletes done by INSERT OR REPLACE fire the tag cleanup and usage triggers too.
+        connection.execute("PRAGMA recursive_triggers=ON")
+        connection.executescript(
+            """
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS request_cache (
+                store_key TEXT PRIMARY KEY,
+                metadata TEXT NOT NULL,
+                value BLOB NOT NULL,
+                path TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                retain_until REAL,
+                size INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS request_cache_created_at ON request_cache (created_at);
+            CREATE INDEX IF NOT EXISTS request_cache_path ON request_cache (path);
+            CREATE INDEX IF NOT EXISTS request_cache_retain_until ON request_cache (retain_until);
+            CREATE TABLE IF NOT EXISTS request_cache_tags (
+                tag TEXT NOT NULL,
+                store_key TEXT NOT NULL,
+                PRIMARY KEY (tag, store_key)
+            );
+            CREATE INDEX IF NOT EXISTS request_cache_tags_store_key ON request_cache_tags (store_key);
+            CREATE TRIGGER IF NOT EXISTS request_cache_drop_tags AFTER DELETE ON request_cache BEGIN
+                DELETE FROM request_cache_tags WHERE store_key = OLD.store_key;
+            END;
+            CREATE TABLE IF NOT EXISTS request_cache_usage (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                entries INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO request_cache_usage (id, entries, bytes)
+                SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM request_cache;
+            CREATE TRIGGER IF NOT EXISTS request_cache_count_insert AFTER INSERT ON request_cache BEGIN
+                UPDATE request_cache_usage SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS request_cache_count_delete AFTER DELETE ON request_cache BEGIN
+                UPDATE request_cache_usage SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+            END;
+            COMMIT;
+            """
+        )
+        self._connection, self._connection_path = connection, path
+        return connection
+
+    @staticmethod
+    @contextmanager
+    def _transaction(db: sqlite3.Connection) -> Iterator[None]:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+
+class RemoteCacheError(RuntimeError):
+    pass
+
+
+# Optimistic transactions give up after this many conflicting writes from other clients.
+REMOTE_WATCH_ATTEMPTS = 16
+
+
+class RespClient:
+    """Minimal asyncio client for servers speaking the Redis serialization protocol."""
+
+    def __init__(self, url: str) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme not in {"redis", "rediss"}:
+            raise ValueError(f"Unsupported remote cache url scheme: {parsed.scheme!r}")
+        self.url = url
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or 6379
+        self._ssl = parsed.scheme == "rediss"
+        self._username = unquote(parsed.username) if parsed.username else None
+        self._password = unquote(parsed.password) if parsed.password else None
+        self._db = int(parsed.path.lstrip("/") or 0)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+
+    async def execute(self, *args: Any) -> Any:
+        (reply,) = await self.pipeline(args)
+        return reply
+
+    async def pipeline(self, *commands: tuple[Any, ...]) -> list[Any]:
+        async with self._connection_lock():
+            replies = await self._roundtrip(commands)
+        return _raise_errors(replies)
+
+    async def watched_transaction(
+        self,
+        keys: Sequence[str],
+        reads: Sequence[tuple[Any, ...]],
+        build: Callable[[list[Any]], Sequence[tuple[Any, ...]]],
+    ) -> list[Any]:
+        """Run the commands `build` makes from the replies to `reads` as one transaction.
+
+        `keys` are watched from before the reads, so the transaction is retried with fresh
+        replies whenever another client changes one of them in between. Returns the replies
+        to `reads` that the committed transaction was built from.
+        """
+        async with self._connection_lock():
+            for _ in range(REMOTE_WATCH_ATTEMPTS):
+                try:
+                    replies = _raise_errors(await self._roundtrip([("WATCH", *keys), *reads]))[1:]
+                    commands = build(replies)
+                except BaseException:
+                    # The watch belongs to this connection; dropping it keeps it from leaking into other calls.
+                    self._reset()
+                    raise
+                if (results := (await self._roundtrip([("MULTI",), *commands, ("EXEC",)]))[-1]) is not None:
+                    _raise_errors(results)
+                    return replies
+        raise RemoteCacheError(f"Transaction on {keys[0]!r} kept conflicting with other clients")
+
+    async def close(self) -> None:
+        writer = self._writer
+        self._reset()
+        if writer is not None:
+            with suppress(OSError):
+                await writer.wait_closed()
+
+    def _connection_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._lock is None:
+            # Connections and locks are bound to the loop that created them.
+            self._reset()
+            self._loop, self._lock = loop, asyncio.Lock()
+        return self._lock
+
+    async def _roundtrip(self, commands: Sequence[tuple[Any, ...]]) -> list[Any]:
+        try:
+            reader, writer = await self._connect()
+            writer.write(b"".join(_encode_command(command) for command in commands))
+            await writer.drain()
+            return [await _read_reply(reader) for _ in commands]
+        except (OSError, EOFError, asyncio.IncompleteReadError):
+            self._reset()
+            raise
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self._reader is not None and self._writer is not None:
+            return self._reader, self._writer
+        reader, writer = await asyncio.open_connection(
+            self._host, self._port, ssl=ssl.create_default_context() if self._ssl else None
+        )
+        handshake: list[tuple[Any, ...]] = []
+        if self._password is not None:
+            handshake.append(("AUTH", self._username, self._password) if self._username else ("AUTH", self._password))
+        if self._db:
+            handshake.append(("SELECT", self._db))
+        if handshake:
+            writer.write(b"".join(_encode_command(command) for command in handshake))
+            await writer.drain()
+            for _ in handshake:
+                if isinstance(reply := await _read_reply(reader), RemoteCacheError):
+                    writer.close()
+                    raise reply
+        self._reader, self._writer = reader, writer
+        return reader, writer
+
+    def _reset(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class RemoteCacheBackend(CacheBackend):
+    """Network store shared across hosts, speaking the Redis protocol.
+
+    Values live under `<namespace>:value:<store_key>` with a native TTL, metadata in the
+    `<namespace>:meta` hash, and the `<namespace>:created` / `<namespace>:expiry` sorted
+    sets drive eviction and expiry without scanning the whole keyspace. The
+    `<namespace>:tag:<tag>` and `<namespace>:path:<path>` sets index entries for purges, and
+    the `<namespace>:bytes` counter tracks the stored size so budget checks never scan metadata.
+    Each entry's size is also kept under `<namespace>:size:<store_key>`; writes watch it, so
+    the counter only moves by the sizes a committed write actually replaced or removed.
+    """
+
+    store: CacheStore = "remote"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._client: RespClient | None = None
+
+    async def get(self, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        raw_metadata, packed = await self._redis.pipeline(
+            ("HGET", self._key("meta"), store_key),
+            ("GET", self._value_key(store_key)),
+        )
+        if raw_metadata is None or packed is None:
+            return None
+        metadata = CacheEntryMetadata.model_validate_json(raw_metadata)
+        if metadata.is_expired(datetime.now(REQUEST_CACHE_TIMEZONE)):
+            return None
+        return _unpack_value(packed, metadata), metadata
+
+    async def set(
+        self,
+        store_key: str,
+        value: Any,
+        metadata: CacheEntryMetadata,
+        *,
+        max_entry_bytes: int | None = None,
+        admission: CacheAdmission = "always",  # noqa: ARG002
+    ) -> bool:
+        packed = _pack_value(value, metadata)
+        if packed is None or not _admit(metadata, max_entry_bytes):
+            return False
+        retain_until = metadata.retain_until
+        value_command: tuple[Any, ...] = ("SET", self._value_key(store_key), packed)
+        if retain_until is not None:
+            ttl_ms = int((retain_until - metadata.created_at).total_seconds() * 1000)
+            value_command = (*value_command, "PX", max(ttl_ms, 1))
+        size_key = self._size_key(store_key)
+        await self._redis.watched_transaction(
+            [size_key],
+            [("GET", size_key)],
+            lambda previous: [
+                value_command,
+                ("SET", size_key, metadata.size),
+                ("INCRBY", self._key("bytes"), metadata.size - int(previous[0] or 0)),
+                ("HSET", self._key("meta"), store_key, metadata.model_dump_json()),
+                ("ZADD", self._key("created"), metadata.created_at.timestamp(), store_key),
+                ("ZADD", self._key("expiry"), "+inf" if retain_until is None else retain_until.timestamp(), store_key),
+                ("SADD", self._key("paths"), metadata.path),
+                ("SADD", self._key(f"path:{metadata.path}"), store_key),
+                *(("SADD", self._key(f"tag:{tag}"), store_key) for tag in metadata.tags),
+            ],
+        )
+        await self.cleanup()
+        return True
+
+    async def metadata(self) -> dict[str, CacheEntryMetadata]:
+        now = datetime.now(REQUEST_CACHE_TIMEZONE)
+        raw = await self._redis.execute("HVALS", self._key("meta"))
+        entries = [CacheEntryMetadata.model_validate_json(item) for item in raw or []]
+        return {metadata.store_key: metadata for metadata in entries if not metadata.is_expired(now)}
+
+    async def delete(self, store_keys: Iterable[str]) -> None:
+        await self._remove(store_keys)
+
+    async def purge(
+        self,
+        *,
+        tags: Collection[str] = (),
+        path_prefix: str | None = None,
+        store_keys: Collection[str] = (),
+    ) -> list[str]:
+        matched = set(store_keys)
+        if tags:
+            matched.update(_text(key) for key in await self._redis.execute("SUNION", *self._tag_keys(tags)))
+        if path_prefix is not None:
+            paths = [_text(path) for path in await self._redis.execute("SMEMBERS", self._key("paths"))]
+            if path_keys := [self._key(f"path:{path}") for path in paths if path.startswith(path_prefix)]:
+                matched.update(_text(key) for key in await self._redis.execute("SUNION", *path_keys))
+        return sorted(metadata.store_key for metadata in await self._remove(matched))
+
+    async def cleanup(self) -> None:
+        expired, entries, total_bytes = await self._redis.pipeline(
+            ("ZRANGEBYSCORE", self._key("expiry"), "-inf", _now_timestamp()),
+            ("ZCARD", self._key("created")),
+            ("GET", self._key("bytes")),
+        )
+        expired_keys = [_text(key) for key in expired or []]
+        removed = await self._remove(expired_keys)
+        self.stats.record_expirations(metadata.path for metadata in removed)
+        entries -= len(expired_keys)
+        total_bytes = int(total_bytes or 0) - sum(metadata.size for metadata in removed)
+        if not _over_budget(entries, total_bytes):
+            return
+        # Walk the oldest entries page by page; only the pages needed to get back under budget are read.
+        evicted: list[str] = []
+        while _over_budget(entries, total_bytes):
+            start = len(evicted)
+            keys = [_text(key) for key in await self._redis.execute("ZRANGE", self._key("created"), start, start + 63)]
+            if not keys:
+                break
+            for store_key, raw in zip(keys, await self._redis.execute("HMGET", self._key("meta"), *keys), strict=True):
+                if not _over_budget(entries, total_bytes):
+                    break
+                evicted.append(store_key)
+                entries -= 1
+                total_bytes -= 0 if raw is None else CacheEntryMetadata.model_validate_json(raw).size
+        self.stats.record_evictions(metadata.path for metadata in await self._remove(evicted))
+
+    async def clear(self) -> None:
+        store_keys = await self._redis.execute("HKEYS", self._key("meta"))
+        await self.delete(_text(key) for key in store_keys or [])
+        await self._redis.execute(
+            "DEL", self._key("meta"), self._key("created"), self._key("expiry"), self._key("paths"), self._key("bytes")
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+
+    @property
+    def _redis(self) -> RespClient:
+        url = settings.cache.remote_url
+        if self._client is None or self._client.url != url:
+            self._client = RespClient(url)
+        return self._client
+
+    def _key(self, name: str) -> str:
+        return f"{settings.cache.remote_namespace}:{name}"
+
+    def _value_key(self, store_key: str) -> str:
+        return self._key(f"value:{store_key}")
+
+    def _size_key(self, store_key: str) -> str:
+        return self._key(f"size:{store_key}")
+
+    def _tag_keys(self, tags: Iterable[str]) -> list[str]:
+        return [self._key(f"tag:{tag}") for tag in tags]
+
+    async def _remove(self, store_keys: Iterable[str]) -> list[CacheEntryMetadata]:
+        keys = list(store_keys)
+        if not keys:
+            return []
+        size_keys = [self._size_key(key) for key in keys]
+
+        def commands(replies: list[Any]) -> list[tuple[Any, ...]]:
+            sizes, raw_metadata = replies
+            removed = _parse_metadata(raw_metadata)
+            return [
+                ("DEL", *(self._value_key(key) for key in keys), *size_keys),
+                # Keys another client removed first have no size left, so they are not counted twice.
+                ("DECRBY", self._key("bytes"), sum(int(size) for size in sizes if size is not None)),
+                ("HDEL", self._key("meta"), *keys),
+                ("ZREM", self._key("created"), *keys),
+                ("ZREM", self._key("expiry"), *keys),
+                *(("SREM", self._key(f"path:{metadata.path}"), metadata.store_key) for metadata in removed),
+                *(
+                    ("SREM", tag_key, metadata.store_key)
+                    for metadata in removed
+                    for tag_key in self._tag_keys(metadata.tags)
+                ),
+            ]
+
+        _sizes, raw_metadata = await self._redis.watched_transaction(
+            size_keys, [("MGET", *size_keys), ("HMGET", self._key("meta"), *keys)], commands
+        )
+        return _parse_metadata(raw_metadata)
+
+
+class TieredCacheBackend(CacheBackend):
+    """Process-local LRU (L1) in front of a persistent or shared store (L2).
+
+    Reads promote L2 hits into L1 and writes go through to both tiers. L2 stays the
+    source of truth for metadata, eviction and budgets; L1 only bounds its entry count.
+    """
+
+    store: CacheStore = "tiered"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._l1: OrderedDict[str, tuple[Any, CacheEntryMetadata]] = OrderedDict()
+        self._l2: CacheBackend | None = None
+
+    async def get(self, store_key: str) -> tuple[Any, CacheEntryMetadata] | None:
+        if (entry := self._l1.get(store_key)) is not None:
+            value, metadata = entry
+            if not metadata.is_expired(datetime.now(REQUEST_CACHE_TIMEZONE)):
+                self._l1.move_to_end(store_key)
+                return value, metadata.model_copy(update={"tier": CacheTier.L1})
+            self._l1.pop(store_key, None)
+        if (entry := await self.l2.get(store_key)) is None:
+            return None
+        value, metadata = entry
+        self._promote(store_key, value, metadata)
+        return value, metadata.model_copy(update={"tier": CacheTier.L2})
+
+    async def set(
+        self,
+        store_key: str,
+        value: Any,
+        metadata: CacheEntryMetadata,
+        *,
+        max_entry_bytes: int | None = None,
+        admission: CacheAdmission = "always",  # noqa: ARG002
+    ) -> bool:
+        if not await self.l2.set(store_key, value, metadata, max_entry_bytes=max_entry_bytes):
+            self._l1.pop(store_key, None)
+            return False
+        self._promote(store_key, value, metadata)
+        return True
+
+    async def metadata(self) -> dict[str, CacheEntryMetadata]:
+        return await self.l2.metadata()
+
+    async def delete(self, store_keys: Iterable[str]) -> None:
+        keys = list(store_keys)
+        for store_key in keys:
+            self._l1.pop(store_key, None)
+        await self.l2.delete(keys)
+
+    async def purge(
+        self,
+        *,
+        tags: Collection[str] = (),
+        path_prefix: str | None = None,
+        store_keys: Collection[str] = (),
+    ) -> list[str]:
+        purged = set(await self.l2.purge(tags=tags, path_prefix=path_prefix, store_keys=store_keys))
+        # L1 is bounded by `l1_max_size`, so matching it directly stays cheap.
+        for store_key, (_value, metadata) in list(self._l1.items()):
+            if store_key in purged or _matches(metadata, tags, path_prefix, store_keys):
+                self._l1.pop(store_key, None)
+                purged.add(store_key)
+        return sorted(purged)
+
+    async def cleanup(self) -> None:
+        now = datetime.now(REQUEST_CACHE_TIMEZONE)
+        for store_key, (_value, metadata) in list(self._l1.items()):
+            if metadata.is_expired(now):
+                self._l1.pop(store_key, None)
+        await self.l2.cleanup()
+
+    async def clear(self) -> None:
+        self._l1.clear()
+        await self.l2.clear()
+
+    async def close(self) -> None:
+        if self._l2 is not None:
+            await self._l2.close()
+
+    @property
+    def l2(self) -> CacheBackend:
+        store = settings.cache.l2_mode
+        if self._l2 is None or self._l2.store != store:
+            self._l1.clear()
+            self._l2 = create_cache_backend(store, self.stats)
+        return self._l2
+
+    def _promote(self, store_key: str, value: Any, metadata: CacheEntryMetadata) -> None:
+        self._l1[store_key] = (value, metadata)
+        self._l1.move_to_end(store_key)
+        while len(self._l1) > settings.cache.l1_max_size:
+            self._l1.popitem(last=False)
+
+
+CACHE_BACKENDS: dict[CacheStore, type[CacheBackend]] = {
+    "memory": MemoryCacheBackend,
+    "file": FileCacheBackend,
+    "sqlite": SqliteCacheBackend,
+    "remote": RemoteCacheBackend,
+    "tiered": TieredCacheBackend,
+}
+
+
+def create_cache_backend(store: CacheStore, stats: CacheStats | None = None) -> CacheBackend:
+    backend = CACHE_BACKENDS[store]()
+    if stats is not None:
+        backend.stats = stats
+    return backend
+
+
+def _eviction_candidates(entries: Mapping[str, CacheEntryMetadata]) -> list[str]:
+    total_bytes = sum(metadata.size for metadata in entries.values())
+    remaining = len(entries)
+    if not _over_budget(remaining, total_bytes):
+        return []
+    evicted: list[str] = []
+    for store_key, metadata in sorted(entries.items(), key=lambda item: item[1].created_at):
+        if not _over_budget(remaining, total_bytes):
+            break
+        evicted.append(store_key)
+        remaining -= 1
+        total_bytes -= metadata.size
+    return evicted
+
+
+def _matches(
+    metadata: CacheEntryMetadata,
+    tags: Collection[str],
+    path_prefix: str | None,
+    store_keys: Collection[str],
+) -> bool:
+    return (
+        metadata.store_key in store_keys
+        or any(tag in metadata.tags for tag in tags)
+        or (path_prefix is not None and metadata.path.startswith(path_prefix))
+    )
+
+
+def _tracks_size(max_entry_bytes: int | None) -> bool:
+    return (
+        max_entry_bytes is not None
+        or settings.cache.max_bytes is not None
+        or settings.cache.compress_threshold is not None
+    )
+
+
+def _over_budget(entries: int, total_bytes: int) -> bool:
+    max_bytes = settings.cache.max_bytes
+    return entries > settings.cache.max_size or (max_bytes is not None and total_bytes > max_bytes)
+
+
+def _admit(metadata: CacheEntryMetadata, max_entry_bytes: int | None) -> bool:
+    limit = min(filter(None, (max_entry_bytes, settings.cache.max_bytes)), default=None)
+    if limit is not None and metadata.size > limit:
+        logger.debug(f"Skip request cache key {metadata.key!r}: {metadata.size} bytes exceeds limit {limit}")
+        return False
+    return True
+
+
+def _pack_value(value: Any, metadata: CacheEntryMetadata) -> bytes | None:
+    if metadata.content_type is not None:
+        raw = value
+    else:
+        try:
+            raw = json.dumps(jsonable_encoder(value), ensure_ascii=False).encode("utf-8")
+        except (TypeError, ValueError):
+            logger.warning(
+                f"Cache value for key {metadata.key!r} is not JSON serializable; skip {metadata.store} cache write."
+            )
+            return None
+    packed = _compress_value(raw, metadata)
+    metadata.size = len(packed)
+    return packed
+
+
+def _unpack_value(packed: bytes, metadata: CacheEntryMetadata) -> Any:
+    raw = packed if metadata.compression is None else _decompress(packed, metadata.compression)
+    return raw if metadata.content_type is not None else json.loads(raw)
+
+
+def _compress_value(raw: bytes, metadata: CacheEntryMetadata) -> bytes:
+    threshold = settings.cache.compress_threshold
+    if threshold is None or len(raw) <= threshold or metadata.content_encoding is not None:
+        return raw
+    compression = settings.cache.compression
+    if compression == "auto":
+        compression = "zstd" if zstandard is not None else "zlib"
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError('zstd cache compression requires extra dependency.\nInstall with: uv add "zstandard"')
+        packed: bytes = zstandard.ZstdCompressor().compress(raw)
+    else:
+        packed = zlib.compress(raw)
+    metadata.compression = compression
+    return packed
+
+
+def _decompress(packed: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError('zstd cache compression requires extra dependency.\nInstall with: uv add "zstandard"')
+        return zstandard.ZstdDecompressor().decompress(packed)  # type: ignore[no-any-return]
+    return zlib.decompress(packed)
+
+
+def _index_name(value: str) -> str:
+    # Percent-encoded so any tag or path is one safe file name; dots too, so "." and ".." stay names.
+    return quote(value, safe="").replace(".", "%2E")
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.tmp")
+    temporary.write_bytes(data)
+    temporary.replace(path)
+
+
+def _read_file(path: Path) -> bytes | None:
+    return path.read_bytes() if path.exists() else None
+
+
+def _now_timestamp() -> float:
+    return datetime.now(REQUEST_CACHE_TIMEZONE).timestamp()
+
+
+def _text(value: str | bytes) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _encode_command(args: tuple[Any, ...]) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%b\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _raise_errors(replies: list[Any]) -> list[Any]:
+    for reply in replies:
+        if isinstance(reply, RemoteCacheError):
+            raise reply
+    return replies
+
+
+def _parse_metadata(raw_metadata: list[Any] | None) -> list[CacheEntryMetadata]:
+    return [CacheEntryMetadata.model_validate_json(item) for item in raw_metadata or [] if item is not None]
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode("utf-8")
+    if kind == b"-":
+        return RemoteCacheError(payload.decode("utf-8"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length == -1:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length == -1:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise RemoteCacheError(f"Unexpected reply from remote cache: {line!r}")
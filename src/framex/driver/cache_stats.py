@@ -0,0 +1,128 @@
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from framex.consts import CacheStatus
+
+
+@dataclass
+class LatencyStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+@dataclass
+class RouteCacheStats:
+    statuses: Counter[str] = field(default_factory=Counter)
+    evictions: int = 0
+    expirations: int = 0
+    rejections: int = 0
+    lookup: LatencyStats = field(default_factory=LatencyStats)
+    store: LatencyStats = field(default_factory=LatencyStats)
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.statuses[CacheStatus.HIT] + self.statuses[CacheStatus.STALE]
+        lookups = hits + self.statuses[CacheStatus.MISS]
+        return round(hits / lookups, 4) if lookups else 0.0
+
+
+class CacheStats:
+    """Process-local request cache counters, grouped by route path.
+
+    Counters are plain integers updated in the request path; entry and byte counts are
+    read from the backend only when a report is built.
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[str, RouteCacheStats] = {}
+
+    def route(self, path: str) -> RouteCacheStats:
+        if (stats := self._routes.get(path)) is None:
+            stats = self._routes[path] = RouteCacheStats()
+        return stats
+
+    def record_status(self, path: str, status: str) -> None:
+        self.route(path).statuses[status] += 1
+
+    def record_evictions(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self.route(path).evictions += 1
+
+    def record_expirations(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self.route(path).expirations += 1
+
+    def record_rejections(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self.route(path).rejections += 1
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+    def report(self, usage: Mapping[str, tuple[int, int]]) -> dict[str, Any]:
+        """Build per-route and total stats; `usage` maps a route path to its live entries and bytes."""
+        routes: dict[str, Any] = {}
+        for path in sorted({*self._routes, *usage}):
+            stats = self._routes.get(path) or RouteCacheStats()
+            entries, size = usage.get(path, (0, 0))
+            routes[path] = {
+                "statuses": {status: stats.statuses[status] for status in CacheStatus},
+                "hit_ratio": stats.hit_ratio,
+                "evictions": stats.evictions,
+                "expirations": stats.expirations,
+                "rejections": stats.rejections,
+                "lookup": stats.lookup.as_dict(),
+                "store": stats.store.as_dict(),
+                "entries": entries,
+                "bytes": size,
+            }
+        return {
+            "entries": sum(route["entries"] for route in routes.values()),
+            "bytes": sum(route["bytes"] for route in routes.values()),
+            "routes": routes,
+        }
+
+
+def render_prometheus(report: Mapping[str, Any]) -> str:
+    """Render a `CacheStats.report` in the Prometheus text exposition format."""
+    routes = [(f'route="{_escape_label(path)}"', route) for path, route in report["routes"].items()]
+    lines = ["# TYPE framex_request_cache_requests_total counter"]
+    lines.extend(
+        f'framex_request_cache_requests_total{{{label},status="{status}"}} {count}'
+        for label, route in routes
+        for status, count in route["statuses"].items()
+    )
+    for name in ("evictions_total", "expirations_total", "rejections_total"):
+        lines.append(f"# TYPE framex_request_cache_{name} counter")
+        lines.extend(
+            f"framex_request_cache_{name}{{{label}}} {route[name.removesuffix('_total')]}" for label, route in routes
+        )
+    for name in ("lookup", "store"):
+        lines.append(f"# TYPE framex_request_cache_{name}_seconds summary")
+        for label, route in routes:
+            lines.append(f"framex_request_cache_{name}_seconds_sum{{{label}}} {route[name]['total_ms'] / 1000:.6f}")
+            lines.append(f"framex_request_cache_{name}_seconds_count{{{label}}} {route[name]['count']}")
+    for name in ("entries", "bytes"):
+        lines.append(f"# TYPE framex_request_cache_{name} gauge")
+        lines.extend(f"framex_request_cache_{name}{{{label}}} {route[name]}" for label, route in routes)
+    return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,21 +1,29 @@
 import inspect
 import os
 import re
-from collections.abc import AsyncIterable, Callable
+from collections.abc import AsyncIterable, AsyncIterator, Callable
 from typing import Any
 
 from fastapi import Depends, HTTPException, Request, Response, status
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.routing import APIRoute
 from starlette.concurrency import iterate_in_threadpool
 from starlette.routing import Route
 
 from framex.adapter import get_adapter
 from framex.config import settings
-from framex.consts import BACKEND_NAME, CACHE_STATUS_HEADER, CacheStatus
+from framex.consts import (
+    BACKEND_NAME,
+    CACHE_ADMIN_PATH,
+    CACHE_KEY_HEADER,
+    CACHE_STATUS_HEADER,
+    CACHE_STATUS_STATE,
+    CacheStatus,
+)
 from framex.driver.application import create_fastapi_application
-from framex.driver.auth import api_key_header, auth_jwt
-from framex.driver.cache import request_cache
+from framex.driver.auth import api_key_header, auth_jwt, authenticate_admin
+from framex.driver.cache import CachePurgeRequest, request_cache
+from framex.driver.cache_stats import render_prometheus
 from framex.driver.decorator import api_ingress
 from framex.log import setup_logger
 from framex.plugin.model import ApiType, PluginApi, RuntimePluginInfo
@@ -27,6 +35,8 @@ app = create_fastapi_application()
 
 @app.get("/health")
 async def health() -> str:
+    if not request_cache.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Request cache is warming up")
     return "ok"
 
 
@@ -35,6 +45,30 @@ async def version() -> str:
     return settings.server.reversion or os.getenv("REVERSION") or "unknown"
 
 
+@app.post(f"{CACHE_ADMIN_PATH}/purge", include_in_schema=False, dependencies=[Depends(authenticate_admin)])
+async def purge_cache(purge: CachePurgeRequest) -> dict[str, Any]:
+    try:
+        purged = await request_cache.purge(tags=purge.tags, path_prefix=purge.path_prefix, store_keys=purge.keys)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return {"purged": len(purged), "keys": purged}
+
+
+@app.get(f"{CACHE_ADMIN_PATH}/stats", include_in_schema=False, dependencies=[Depends(authenticate_admin)])
+async def cache_stats() -> dict[str, Any]:
+    return await request_cache.stats_report()
+
+
+@app.get(f"{CACHE_ADMIN_PATH}/metrics", include_in_schema=False, dependencies=[Depends(authenticate_admin)])
+async def cache_metrics() -> PlainTextResponse:
+    # Scrapers expect the bare exposition format, so skip the response envelope.
+    return PlainTextResponse(
+        render_prometheus(await request_cache.stats_report()),
+        headers={"X-Raw-Output": "True"},
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 @api_ingress(app=app, name=BACKEND_NAME)
 class APIIngress:
     def __init__(
@@ -85,6 +119,7 @@ class APIIngress:
         auth_keys: list[str] | None = None,
         include_in_schema: bool = True,
         cache: dict[str, Any] | None = None,
+        request_param: str | None = None,
         **kwargs: Any,
     ) -> bool:
         from framex.log import logger
@@ -129,6 +164,8 @@ class APIIngress:
             async def route_handler(**request_kwargs: Any) -> Any:
                 framex_request: Request = request_kwargs.pop(framex_request_param)
                 framex_response: Response = request_kwargs.pop(framex_response_param)
+                if request_param is not None:
+                    request_kwargs[request_param] = framex_request
                 c_handle = getattr(handle, func_name)
                 if not c_handle:
                     raise RuntimeError(
@@ -136,15 +173,36 @@ class APIIngress:
                     )
                 framex_response.headers["X-Raw-Output"] = str(direct_output)
                 if stream:
+                    auth_error: HTTPException | None = None
+                    if auth_keys is not None:
+                        try:
+                            _verify_api_key(framex_request, framex_request.headers.get("Authorization"))
+                        except HTTPException as e:
+                            auth_error = e
+
+                    async def upstream() -> AsyncIterator[Any]:
+                        gen = adapter._stream_call(c_handle, **request_kwargs)
+                        if not isinstance(gen, AsyncIterable) and inspect.isawaitable(gen):
+                            gen = await gen
+                        chunks = gen if isinstance(gen, AsyncIterable) else iterate_in_threadpool(iter(gen))
+                        async for chunk in chunks:
+                            yield chunk
+
+                    chunks: AsyncIterable[Any] = upstream()
+                    if auth_error is None:
+                        chunks = await request_cache.stream(
+                            request=framex_request,
+                            response=framex_response,
+                            path=path,
+                            cache_config=cache,
+                            request_kwargs=request_kwargs,
+                            invoke=upstream,
+                        )
 
                     async def stream_with_error() -> AsyncIterable[Any]:
                         try:
-                            if auth_keys is not None:
-                                _verify_api_key(framex_request, framex_request.headers.get("Authorization"))
-                            gen = adapter._stream_call(c_handle, **request_kwargs)
-                            if not isinstance(gen, AsyncIterable) and inspect.isawaitable(gen):
-                                gen = await gen
-                            chunks = gen if isinstance(gen, AsyncIterable) else iterate_in_threadpool(iter(gen))
+                            if auth_error is not None:
+                                raise auth_error
                             async for chunk in chunks:
                                 yield chunk
                         except HTTPException as e:
@@ -166,26 +224,41 @@ class APIIngress:
                                 {"status": 500, "message": safe_error_message(e)},
                             )
 
-                    return StreamingResponse(  # type: ignore
+                    streaming_response = StreamingResponse(
                         stream_with_error(),
                         media_type="text/event-stream",
                     )
+                    # Appended after construction: the response envelope middleware expects the
+                    # event-stream content type to stay the first header.
+                    for name in (CACHE_STATUS_HEADER, CACHE_KEY_HEADER):
+                        if name in framex_response.headers:
+                            streaming_response.headers[name] = framex_response.headers[name]
+                    return streaming_response  # type: ignore
 
                 if cache is None:
-                    framex_response.headers[CACHE_STATUS_HEADER] = CacheStatus.BYPASS
-                    return await adapter._acall(c_handle, **request_kwargs)  # type: ignore
-                if not settings.cache.enabled:
+                    result = await adapter._acall(c_handle, **request_kwargs)  # type: ignore
+                    # Handlers with a cache of their own, like cached proxy routes, report its status here.
+                    framex_response.headers[CACHE_STATUS_HEADER] = getattr(
+                        framex_request.state, CACHE_STATUS_STATE, CacheStatus.BYPASS
+                    )
+                elif not settings.cache.enabled:
                     framex_response.headers[CACHE_STATUS_HEADER] = CacheStatus.DISABLED
-                    return await adapter._acall(c_handle, **request_kwargs)  # type: ignore
-
-                return await request_cache.call(
-                    request=framex_request,
-                    response=framex_response,
-                    path=path,
-                    cache_config=cache,
-                    request_kwargs=request_kwargs,
-                    invoke=lambda: adapter._acall(c_handle, **request_kwargs),  # type: ignore
-                )
+                    result = await adapter._acall(c_handle, **request_kwargs)  # type: ignore
+                else:
+                    result = await request_cache.call(
+                        request=framex_request,
+                        response=framex_response,
+                        path=path,
+                        cache_config=cache,
+                        request_kwargs=request_kwargs,
+                        invoke=lambda: adapter._acall(c_handle, **request_kwargs),  # type: ignore
+                    )
+                if isinstance(result, Response):
+                    # FastAPI drops the injected response's headers when a handler returns its own response.
+                    for name, value in framex_response.headers.items():
+                        if name not in {"content-length", "content-type"}:
+                            result.headers.setdefault(name, value)
+                return result
 
             route_handler.__signature__ = inspect.Signature(  # type: ignore
                 [
@@ -211,8 +284,8 @@ class APIIngress:
                 ]
             )
 
-            # Inject auth dependency if needed
-            dependencies = []
+            # Inject auth dependency if needed, after any the route declares itself.
+            dependencies = list(kwargs.pop("dependencies", None) or [])
             if auth_keys is not None:
                 logger.trace(f"API({path}) with tags {tags} requires auth.")
                 dependencies.append(Depends(api_key_header if stream else _verify_api_key))
@@ -228,6 +301,14 @@ class APIIngress:
                 description=description,
                 **kwargs,
             )
+            if cache is not None and not stream:
+                request_cache.register_warmup(
+                    path,
+                    methods,
+                    cache,
+                    params,
+                    lambda request_kwargs: adapter._acall(getattr(handle, func_name), **request_kwargs),  # type: ignore
+                )
             methods_str = ",".join(m.upper() for m in methods)
             short_path = shorten_str(path)
             logger.opt(colors=True).success(
@@ -240,6 +321,26 @@ class APIIngress:
             )
         return False
 
+    def unregister_route(self, path: str, methods: list[str]) -> bool:
+        from framex.log import logger
+
+        method_set = {m.upper() for m in methods}
+        removed = [
+            route
+            for route in app.router.routes
+            if isinstance(route, APIRoute) and route.path == path and not method_set.isdisjoint(route.methods or ())
+        ]
+        if not removed:
+            return False
+        for route in removed:
+            app.router.routes.remove(route)
+        request_cache.unregister_warmup(path, method_set)
+        # FastAPI memoizes the generated schema; drop it so the removed route leaves the docs.
+        app.openapi_schema = None
+        methods_str = ",".join(sorted(method_set))
+        logger.opt(colors=True).success(f"API route unregistered: {methods_str:<4} <y>{shorten_str(path):<45}</y>")
+        return True
+
     @staticmethod
     def _internal_param_name(
         base_name: str,
@@ -291,6 +392,7 @@ class APIIngress:
             include_in_schema=include_in_schema,
             **kwargs,
         )
+        app.openapi_schema = None
 
         if include_in_schema and tags:
             names = list({tag["name"] for tag in app.state.tags_metadata_map})
@@ -11,7 +11,8 @@ from framex.consts import PROXY_PLUGIN_NAME
 from framex.log import logger
 from framex.plugin.manage import _manager
 from framex.plugin.model import Plugin, PluginApi
-from framex.plugin.resolver import coerce_plugin_api, get_current_remote_apis
+from framex.plugin.resolver import coerce_plugin_api, get_current_caller, get_current_remote_apis
+from framex.utils import cache_decode, cache_encode
 
 C = TypeVar("C", bound=BaseModel)
 
@@ -155,8 +156,28 @@ def _unwrap_plugin_call_result(api_name: str | PluginApi, result: Any, use_proxy
 async def call_plugin_api(api_name: str | PluginApi, **kwargs: Any) -> Any:
     api, use_proxy = _resolve_plugin_api(api_name)
     normalized_kwargs = _normalize_plugin_call_kwargs(api, kwargs)
-    result = await get_adapter().call_func(api, **normalized_kwargs)
-    return _unwrap_plugin_call_result(api_name, result, use_proxy)
+
+    async def invoke() -> Any:
+        result = await get_adapter().call_func(api, **normalized_kwargs)
+        return _unwrap_plugin_call_result(api_name, result, use_proxy)
+
+    if (cache_config := api.extend_kwargs.get("cache")) is None or api.stream:
+        return await invoke()
+
+    from framex.driver.cache import request_cache
+
+    async def invoke_encoded() -> str:
+        # Entries hold the encoded result so every store hands back the same types.
+        return cache_encode(await invoke())
+
+    encoded = await request_cache.memoize(
+        name=api.api or f"{api.deployment_name}.{api.func_name}",
+        cache_config=cache_config,
+        kwargs=normalized_kwargs,
+        invoke=invoke_encoded,
+        caller=get_current_caller(),
+    )
+    return cache_decode(encoded)
 
 
 def get_http_plugin_apis() -> list["PluginApi"]:
@@ -5,7 +5,12 @@ from typing import Any, final
 from framex.config import settings
 from framex.log import setup_logger
 from framex.plugin import call_plugin_api
-from framex.plugin.resolver import reset_current_remote_apis, set_current_remote_apis
+from framex.plugin.resolver import (
+    reset_current_caller,
+    reset_current_remote_apis,
+    set_current_caller,
+    set_current_remote_apis,
+)
 
 
 class BasePlugin:
@@ -14,6 +19,7 @@ class BasePlugin:
     def __init__(self, **kwargs: Any) -> None:
         setup_logger()
         self.remote_apis = kwargs.get("remote_apis", {})
+        self._caller_name = f"{type(self).__module__}.{type(self).__qualname__}"
         self._bind_remote_api_context()
         if settings.server.use_ray:
             import asyncio
@@ -23,6 +29,9 @@ class BasePlugin:
     async def on_start(self) -> None:
         pass
 
+    async def on_stop(self) -> None:
+        pass
+
     def _bind_remote_api_context(self) -> None:
         for name, func in inspect.getmembers(type(self), predicate=callable):
             if not getattr(func, "_on_request", False):
@@ -36,10 +45,12 @@ class BasePlugin:
             @wraps(func)
             async def async_gen_wrapper(*args: Any, **kwargs: Any) -> Any:
                 remote_token = set_current_remote_apis(self.remote_apis)
+                caller_token = set_current_caller(self._caller_name)
                 try:
                     async for chunk in func(*args, **kwargs):
                         yield chunk
                 finally:
+                    reset_current_caller(caller_token)
                     reset_current_remote_apis(remote_token)
 
             return async_gen_wrapper
@@ -49,9 +60,11 @@ class BasePlugin:
             @wraps(func)
             async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
                 remote_token = set_current_remote_apis(self.remote_apis)
+                caller_token = set_current_caller(self._caller_name)
                 try:
                     return await func(*args, **kwargs)
                 finally:
+                    reset_current_caller(caller_token)
                     reset_current_remote_apis(remote_token)
 
             return async_wrapper
@@ -59,9 +72,11 @@ class BasePlugin:
         @wraps(func)
         def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
             remote_token = set_current_remote_apis(self.remote_apis)
+            caller_token = set_current_caller(self._caller_name)
             try:
                 return func(*args, **kwargs)
             finally:
+                reset_current_caller(caller_token)
                 reset_current_remote_apis(remote_token)
 
         return sync_wrapper
@@ -10,6 +10,7 @@ from pydantic import BaseModel
 from framex.adapter import get_adapter
 from framex.consts import API_STR, PROXY_PLUGIN_NAME
 from framex.plugin.model import ApiType, PluginApi, PluginDeployment
+from framex.plugin.resolver import get_current_caller
 from framex.utils import (
     build_plugin_description,
     cache_decode,
@@ -145,7 +146,12 @@ def on_request(
 _PROXY_REGISTRY: dict[str, Callable] = {}
 
 
-def on_proxy() -> Callable:
+def on_proxy(cache: dict[str, Any] | None = None) -> Callable:
+    if cache is not None:
+        from framex.driver.cache import normalize_cache_config
+
+        cache = normalize_cache_config(cache)
+
     def decorator(func: Callable) -> Callable:
         from framex.config import settings
 
@@ -181,11 +187,7 @@ def on_proxy() -> Callable:
 
         _PROXY_REGISTRY[full_func_name] = safe_callable
 
-        @functools.wraps(func)
-        async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            if args:  # pragma: no cover
-                raise TypeError(f"The proxy function '{func.__name__}' only supports keyword arguments.")
-
+        async def dispatch(kwargs: dict[str, Any]) -> Any:
             from framex.plugins.proxy.config import settings as proxy_settings
 
             proxy_func_set = set(chain.from_iterable(proxy_settings.proxy_functions.values()))
@@ -204,6 +206,28 @@ def on_proxy() -> Callable:
             )
             return cache_decode(res)
 
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if args:  # pragma: no cover
+                raise TypeError(f"The proxy function '{func.__name__}' only supports keyword arguments.")
+            if cache is None:
+                return await dispatch(kwargs)
+
+            from framex.driver.cache import request_cache
+
+            async def invoke() -> str:
+                # Entries hold the encoded result so every store hands back the original types.
+                return cache_encode(await dispatch(kwargs))
+
+            encoded = await request_cache.memoize(
+                name=full_func_name,
+                cache_config=cache,
+                kwargs=kwargs,
+                invoke=invoke,
+                caller=get_current_caller(),
+            )
+            return cache_decode(encoded)
+
         return wrapper
 
     return decorator
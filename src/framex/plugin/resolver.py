@@ -28,3 +28,18 @@ def set_current_remote_apis(remote_apis: Mapping[str, PluginApi | dict[str, Any]
 
 def reset_current_remote_apis(token: Any) -> None:
     _current_remote_apis.reset(token)
+
+
+_current_caller: ContextVar[str | None] = ContextVar("_current_caller", default=None)
+
+
+def get_current_caller() -> str | None:
+    return _current_caller.get()
+
+
+def set_current_caller(caller: str | None) -> Any:
+    return _current_caller.set(caller)
+
+
+def reset_current_caller(token: Any) -> None:
+    _current_caller.reset(token)
@@ -1,31 +1,82 @@
+import asyncio
 import inspect
 import json
-from collections.abc import AsyncGenerator, Callable
-from typing import Any, cast
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Coroutine
+from datetime import datetime
+from typing import Any, TypeVar, cast
 
 import httpx
+from fastapi import Depends, HTTPException
 from pydantic import BaseModel, create_model
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
 from typing_extensions import override
 
 from framex.adapter import get_adapter
 from framex.adapter.base import BaseAdapter
-from framex.consts import BACKEND_NAME, PROXY_FUNC_HTTP_PATH, PROXY_PLUGIN_NAME
+from framex.config import settings as framex_settings
+from framex.consts import (
+    BACKEND_NAME,
+    CACHE_STATUS_HEADER,
+    CACHE_STATUS_STATE,
+    PROXY_FUNC_BATCH_HTTP_PATH,
+    PROXY_FUNC_HTTP_PATH,
+    PROXY_PLUGIN_NAME,
+    CacheAction,
+    CacheStatus,
+)
+from framex.driver.auth import authenticate_admin
+from framex.driver.cache import request_cache
+from framex.driver.cache_backends import REQUEST_CACHE_TIMEZONE
 from framex.log import logger
 from framex.plugin import BasePlugin, PluginApi, PluginMetadata, on_register
 from framex.plugin.model import ApiType
 from framex.plugin.on import on_request
+from framex.plugins.proxy.batch import ProxyFuncBatcher
 from framex.plugins.proxy.builder import (
     create_pydantic_model,
     format_proxy_params,
     is_upload_annotation,
     resolve_annotation,
+    schema_digest,
     to_multipart_annotation,
     type_map,
 )
-from framex.plugins.proxy.config import VERSION, ProxyPluginConfig, settings
-from framex.plugins.proxy.model import ProxyFunc, ProxyFuncHttpBody
-from framex.utils import build_plugin_description, cache_decode, cache_encode, shorten_str
+from framex.plugins.proxy.client import UpstreamClient, UpstreamClientPool, UpstreamGroup
+from framex.plugins.proxy.config import (
+    VERSION,
+    ProxyHedgeConfig,
+    ProxyHttpCacheConfig,
+    ProxyLimitConfig,
+    ProxyPassthroughConfig,
+    ProxyPluginConfig,
+    ProxyRetryConfig,
+    ProxyStreamUploadConfig,
+    settings,
+)
+from framex.plugins.proxy.discovery import (
+    DiscoveryReport,
+    SpecSnapshot,
+    SpecSnapshotStore,
+    spec_digest,
+)
+from framex.plugins.proxy.http_cache import (
+    cache_key,
+    conditional_headers,
+    freshness_lifetime,
+    load_response,
+    refresh_stored,
+    request_cache_action,
+    save_response,
+    stored_content,
+    to_stored,
+)
+from framex.plugins.proxy.limits import ConcurrencyLimiter, hold_slots
+from framex.plugins.proxy.model import ProxyFunc, ProxyFuncBatchHttpBody, ProxyFuncHttpBody
+from framex.plugins.proxy.resilience import LatencyWindow, RetryBudget
+from framex.utils import build_plugin_description, cache_decode, cache_encode, safe_error_message, shorten_str
 
 __plugin_meta__ = PluginMetadata(
     name="proxy",
@@ -37,6 +88,11 @@ __plugin_meta__ = PluginMetadata(
     config_class=ProxyPluginConfig,
 )
 
+# Ingress keyword that carries the incoming request into stream-upload proxy methods.
+PROXY_BODY_PARAM = "__framex_request__"
+
+_T = TypeVar("_T")
+
 
 @on_register(**settings.ingress_config)
 class ProxyPlugin(BasePlugin):
@@ -44,6 +100,19 @@ class ProxyPlugin(BasePlugin):
         self.func_map: dict[str, Any] = {}
         self.proxy_func_map: dict[str, ProxyFunc] = {}
         self.time_out = settings.timeout
+        self.clients = UpstreamClientPool(settings.client, settings.timeout)
+        budget = settings.retry_budget
+        self.retry_budget = RetryBudget(budget.ratio, budget.min_per_second, budget.window)
+        self.latencies: dict[str, LatencyWindow] = {}
+        self.limiters: dict[str, ConcurrencyLimiter] = {}
+        self.batchers: dict[str, ProxyFuncBatcher] = {}
+        self.spec_store = SpecSnapshotStore(settings.spec_cache_dir) if settings.spec_cache_dir else None
+        self.discovery: dict[str, DiscoveryReport] = {}
+        self.specs: dict[str, SpecSnapshot] = {}
+        # Per upstream, the digest of each registered (METHOD, path) operation.
+        self.route_digests: dict[str, dict[tuple[str, str], str]] = {}
+        self._background_tasks: set[asyncio.Task[None]] = set()
+        self._discovery_locks: dict[str, asyncio.Lock] = {}
         self.init_proxy_func_route = False
         super().__init__(**kwargs)
 
@@ -53,9 +122,19 @@ class ProxyPlugin(BasePlugin):
             logger.opt(colors=True).warning("<y>No url provided, skipping proxy plugin</y>")
             return
 
-        for url in settings.proxy_url_list:
-            logger.info(f"Try to parse openapi docs from {url}")
-            await self._parse_openai_docs(url, settings.get_docs_path(url))
+        self.clients.open(settings.proxy_url_list)
+        for base_url, (member_urls, balancer) in settings.get_upstream_groups().items():
+            group = self.clients.add_group(base_url, member_urls, balancer)
+            if balancer.health_path:
+                self._spawn(self._probe_periodically(group))
+        reports = await asyncio.gather(*(self._discover(url) for url in settings.proxy_url_list))
+        self.discovery = {report.url: report for report in reports}
+        for report in reports:
+            logger.info(
+                f"Discovered {report.routes} proxy routes from {report.url} ({report.source}): "
+                f"fetch {report.fetch_ms}ms, parse {report.parse_ms}ms"
+                + (f", error: {report.error}" if report.error else "")
+            )
 
         if settings.proxy_functions:
             for url, funcs in settings.proxy_functions.items():
@@ -64,29 +143,147 @@ class ProxyPlugin(BasePlugin):
         else:  # pragma: no cover
             logger.debug("No proxy functions to register")
 
-        logger.success(f"Succeeded to parse openai docs form {url}")
+        if settings.refresh_interval:
+            self._spawn(self._refresh_periodically(settings.refresh_interval))
+
+        logger.success(f"Succeeded to parse openai docs from {len(settings.proxy_url_list)} upstreams")
+
+    @override
+    async def on_stop(self) -> None:
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        for batcher in self.batchers.values():
+            await batcher.aclose()
+        await self.clients.aclose()
 
     @on_request(call_type=ApiType.FUNC)
     async def check_is_gen_api(self, path: str) -> bool:
         return path in settings.force_stream_apis
 
-    async def _get_openai_docs(self, url: str, docs_path: str = "/api/v1/openapi.json") -> dict[str, Any]:
+    @on_request("/proxy/stats", methods=["GET"], dependencies=[Depends(authenticate_admin)])
+    async def proxy_stats(self) -> dict[str, Any]:
+        return {
+            "upstreams": self.clients.stats(),
+            "discovery": {url: report.as_dict() for url, report in self.discovery.items()},
+            "retry_budget": self.retry_budget.stats(),
+            "limits": {name: limiter.stats() for name, limiter in self.limiters.items()},
+            "batches": {url: batcher.stats() for url, batcher in self.batchers.items()},
+        }
+
+    async def _discover(self, url: str) -> DiscoveryReport:
+        """Register the routes of one upstream, from its snapshot when available, else from the network."""
+        async with self._discovery_lock(url):
+            report = DiscoveryReport(url)
+            snapshot = self.spec_store.load(url) if self.spec_store else None
+            if snapshot is None:
+                logger.info(f"Try to parse openai docs from {url}")
+                started = time.perf_counter()
+                try:
+                    snapshot = await asyncio.wait_for(
+                        self._get_openai_docs(url, settings.get_docs_path(url)), settings.discovery_timeout
+                    )
+                except Exception as exc:
+                    report.source = "failed"
+                    report.error = repr(exc)
+                    logger.opt(colors=True).error(f"Failed to discover proxy apis from <r>{url}</r>: {exc!r}")
+                    return report
+                finally:
+                    report.fetch_ms = round((time.perf_counter() - started) * 1000, 3)
+                if snapshot is not None and self.spec_store:
+                    self.spec_store.save(snapshot)
+            else:
+                report.source = "snapshot"
+                self._spawn(self._revalidate(url))
+
+            if snapshot is not None:
+                self.specs[url] = snapshot
+                started = time.perf_counter()
+                report.routes = await self._parse_openai_docs(url, snapshot.spec)
+                report.parse_ms = round((time.perf_counter() - started) * 1000, 3)
+            return report
+
+    async def _revalidate(self, url: str) -> None:
+        """Re-fetch the spec of one upstream and apply its route changes, if any."""
+        async with self._discovery_lock(url):
+            current = self.specs.get(url)
+            started = time.perf_counter()
+            try:
+                fresh = await asyncio.wait_for(
+                    self._get_openai_docs(url, settings.get_docs_path(url), etag=current.etag if current else None),
+                    settings.discovery_timeout,
+                )
+            except Exception as exc:
+                logger.warning(f"Failed to revalidate openapi docs of {url}: {exc!r}")
+                return
+            fetch_ms = round((time.perf_counter() - started) * 1000, 3)
+            if fresh is None or (current is not None and fresh.digest == current.digest):
+                logger.debug(f"Openapi docs of {url} are up to date")
+                return
+            if self.spec_store:
+                self.spec_store.save(fresh)
+            self.specs[url] = fresh
+            started = time.perf_counter()
+            routes = await self._parse_openai_docs(url, fresh.spec)
+            parse_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.discovery[url] = DiscoveryReport(
+                url, source="network", fetch_ms=fetch_ms, parse_ms=parse_ms, routes=routes
+            )
+
+    async def _refresh_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.gather(*(self._revalidate(url) for url in settings.proxy_url_list))
+
+    @staticmethod
+    async def _probe_periodically(group: UpstreamGroup) -> None:
+        while True:
+            await group.probe()
+            await asyncio.sleep(group.balancer.health_interval)
+
+    def _discovery_lock(self, url: str) -> asyncio.Lock:
+        # Startup parsing, its background revalidation and periodic refreshes all diff against the same
+        # `route_digests`, so each upstream is discovered by one of them at a time.
+        if (lock := self._discovery_locks.get(url)) is None:
+            lock = self._discovery_locks[url] = asyncio.Lock()
+        return lock
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _get_openai_docs(
+        self, url: str, docs_path: str = "/api/v1/openapi.json", etag: str | None = None
+    ) -> SpecSnapshot | None:
+        """Fetch the upstream spec; returns None when `etag` is still current."""
+        headers: dict[str, str] = {}
         if auth_api_key := settings.auth.get_auth_keys(docs_path):
-            headers = {"Authorization": auth_api_key[0]}  # Use the first auth key set
-        else:  # pragma: no cover
-            headers = None
-        async with httpx.AsyncClient(timeout=self.time_out) as client:
-            response = await client.get(f"{url}{docs_path}", headers=headers)
+            headers["Authorization"] = auth_api_key[0]  # Use the first auth key set
+        if etag:
+            headers["If-None-Match"] = etag
+        upstream, docs_url = self.clients.pick(f"{url}{docs_path}")
+        with upstream.track():
+            response = await upstream.client.get(docs_url, headers=headers or None)
+            if etag and response.status_code == status.HTTP_304_NOT_MODIFIED:
+                return None
             if response.status_code != status.HTTP_200_OK:  # pragma: no cover
                 logger.error(
                     f"Failed to get openai docs from {url}, status code: {response.status_code}, response: {response.text}"
                 )
             response.raise_for_status()
-            return cast(dict[str, Any], response.json())
+            spec = cast(dict[str, Any], response.json())
+        response_etag = response.headers.get("etag")
+        return SpecSnapshot(url, spec, spec_digest(spec), response_etag if isinstance(response_etag, str) else None)
+
+    async def _parse_openai_docs(self, url: str, openapi_data: dict[str, Any]) -> int:
+        """Register the operations of an upstream spec, touching only those changed since the last call.
 
-    async def _parse_openai_docs(self, url: str, docs_path: str = "/api/v1/openapi.json") -> None:
+        Returns the number of routes registered for the upstream.
+        """
         adapter: BaseAdapter = get_adapter()
-        openapi_data = await self._get_openai_docs(url, docs_path)
+        known = self.route_digests.setdefault(url, {})
+        seen: set[tuple[str, str]] = set()
         paths = openapi_data.get("paths", {})
         components = openapi_data.get("components", {}).get("schemas", {})
         for path, details in paths.items():
@@ -103,6 +300,14 @@ class ProxyPlugin(BasePlugin):
                 headers = None
 
             for method, body in details.items():
+                key = (method.upper(), path)
+                digest = schema_digest(body, components)
+                seen.add(key)
+                if known.get(key) == digest:
+                    continue
+                if known.pop(key, None) is not None:
+                    await self._unregister_route(adapter, path, method)
+
                 func_name = body.get("operationId")
                 # Process request parameters
                 params: list[tuple[str, Any]] = [
@@ -115,8 +320,16 @@ class ProxyPlugin(BasePlugin):
                 body_param_names: set[str] = set()
                 file_param_names: set[str] = set()
 
+                request_body = body.get("requestBody")
+                # Streaming needs the live request, which cannot be passed to a Ray replica.
+                stream_upload = (
+                    settings.get_stream_upload(url, path)
+                    if request_body and not framex_settings.server.use_ray
+                    else None
+                )
+
                 # Process request body
-                if request_body := body.get("requestBody"):
+                if request_body and stream_upload is None:
                     body_content = request_body.get("content", {})
                     if "application/json" in body_content:
                         content_type = "application/json"
@@ -138,12 +351,12 @@ class ProxyPlugin(BasePlugin):
                         continue
 
                     if content_type == "application/json":
-                        Model = create_pydantic_model(schema_name, model_schema, components)  # noqa
+                        Model = create_pydantic_model(schema_name, model_schema, components, url)  # noqa
                         params.append(("model", Model))
                         body_param_names.add("model")
                     else:
                         for field_name, prop_schema in model_schema.get("properties", {}).items():
-                            annotation = resolve_annotation(prop_schema, components)
+                            annotation = resolve_annotation(prop_schema, components, url)
                             params.append((field_name, to_multipart_annotation(annotation)))
                             body_param_names.add(field_name)
                             if is_upload_annotation(annotation):
@@ -151,6 +364,7 @@ class ProxyPlugin(BasePlugin):
 
                 logger.opt(colors=True).trace(f"Found proxy api({method}) <g>{url}{path}</g>")
                 is_stream = path in settings.force_stream_apis
+                http_cache = None if is_stream else settings.get_http_cache(url, path, method)
                 func = self._create_dynamic_method(
                     func_name,
                     method,
@@ -160,6 +374,11 @@ class ProxyPlugin(BasePlugin):
                     file_param_names=file_param_names,
                     stream=is_stream,
                     headers=headers,
+                    passthrough=settings.get_passthrough(url),
+                    stream_upload=stream_upload,
+                    resilience=settings.get_resilience(url, path, method),
+                    limiters=self._get_limiters(url, path),
+                    http_cache=http_cache,
                 )
                 setattr(self, func_name, func)
 
@@ -187,10 +406,59 @@ class ProxyPlugin(BasePlugin):
                     direct_output=True,
                     tags=[f"{__plugin_meta__.name}({url})"],
                     description=description,
+                    **self._stream_upload_route_kwargs(request_body if stream_upload else None),
+                    # Cached routes read the `X-FrameX-Cache` header of the live request.
+                    **(
+                        {"request_param": PROXY_BODY_PARAM}
+                        if http_cache is not None and not framex_settings.server.use_ray
+                        else {}
+                    ),
                 )
 
                 # Proxy api to map
                 self.func_map[path] = func
+                known[key] = digest
+
+        for method, path in set(known) - seen:
+            del known[method, path]
+            if all(known_path != path for _, known_path in known):
+                self.func_map.pop(path, None)
+            await self._unregister_route(adapter, path, method)
+        return len(known)
+
+    @staticmethod
+    async def _unregister_route(adapter: BaseAdapter, path: str, method: str) -> None:
+        plugin_api = PluginApi(deployment_name=BACKEND_NAME, func_name="unregister_route")
+        await adapter.call_func(plugin_api, path=path, methods=[method])
+
+    def _get_limiters(self, url: str, path: str) -> tuple[ConcurrencyLimiter, ...]:
+        """Limiters of a route, narrowest first: its route rule's, then its upstream's."""
+        upstream_limit, rule, route_limit = settings.get_limits(url, path)
+        limiters = []
+        if route_limit is not None:
+            limiters.append(self._get_limiter(f"{url}{rule}", route_limit))
+        if upstream_limit is not None:
+            limiters.append(self._get_limiter(url, upstream_limit))
+        return tuple(limiters)
+
+    def _get_limiter(self, name: str, config: ProxyLimitConfig) -> ConcurrencyLimiter:
+        if (limiter := self.limiters.get(name)) is None:
+            limiter = self.limiters[name] = ConcurrencyLimiter(name, config)
+        return limiter
+
+    @staticmethod
+    def _stream_upload_route_kwargs(request_body: dict[str, Any] | None) -> dict[str, Any]:
+        if request_body is None:
+            return {}
+        # The body is forwarded as-is, so document it as raw bytes of each upstream content type.
+        content = {
+            content_type: {"schema": {"type": "string", "format": "binary"}}
+            for content_type in request_body.get("content", {})
+        }
+        return {
+            "request_param": PROXY_BODY_PARAM,
+            "openapi_extra": {"requestBody": {"content": content, "required": request_body.get("required", False)}},
+        }
 
     async def register_proxy_func_route(
         self,
@@ -215,10 +483,36 @@ class ProxyPlugin(BasePlugin):
             tags=[__plugin_meta__.name],
             include_in_schema=False,
         )
+        await adapter.call_func(
+            plugin_api,
+            path=PROXY_FUNC_BATCH_HTTP_PATH,
+            methods=["POST"],
+            func_name=self._proxy_func_batch_route.__name__,
+            params=[("model", ProxyFuncBatchHttpBody)],
+            handle=handle,
+            stream=False,
+            direct_output=False,
+            tags=[__plugin_meta__.name],
+            # A batch runs the same functions, so it takes the same keys even without a rule of its own.
+            auth_keys=framex_settings.auth.get_auth_keys(PROXY_FUNC_HTTP_PATH),
+            include_in_schema=False,
+        )
 
     async def _proxy_func_route(self, model: ProxyFuncHttpBody) -> Any:
         return await self.call_proxy_function(model.func_name, model.data)
 
+    async def _proxy_func_batch_route(self, model: ProxyFuncBatchHttpBody) -> list[dict[str, Any]]:
+        """Run the calls of a batch concurrently; each item reports its own status like a single call."""
+        results = await asyncio.gather(
+            *(self.call_proxy_function(item.func_name, item.data) for item in model.items), return_exceptions=True
+        )
+        return [
+            {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "message": safe_error_message(result)}
+            if isinstance(result, Exception)
+            else {"status": status.HTTP_200_OK, "data": result}
+            for result in results
+        ]
+
     async def _parse_proxy_function(self, func_name: str, url: str) -> None:
         logger.opt(colors=True).debug(f"Found proxy function <g>{url}</g>")
 
@@ -230,42 +524,257 @@ class ProxyPlugin(BasePlugin):
         else:  # pragma: no cover
             headers = None
 
+        if settings.proxy_function_batch.enable:
+            await self.register_proxy_function(func_name, self._get_batcher(url, headers).submit, is_remote=True)
+            return
+
         func = self._create_dynamic_method(
-            func_name, "POST", params, f"{url}{PROXY_FUNC_HTTP_PATH}", stream=False, headers=headers
+            func_name,
+            "POST",
+            params,
+            f"{url}{PROXY_FUNC_HTTP_PATH}",
+            stream=False,
+            headers=headers,
+            limiters=self._get_limiters(url, PROXY_FUNC_HTTP_PATH),
         )
         await self.register_proxy_function(func_name, func, is_remote=True)
 
+    def _get_batcher(self, url: str, headers: dict[str, str] | None) -> ProxyFuncBatcher:
+        if (batcher := self.batchers.get(url)) is not None:
+            return batcher
+        batch_url = f"{url}{PROXY_FUNC_BATCH_HTTP_PATH}"
+        limiters = self._get_limiters(url, PROXY_FUNC_BATCH_HTTP_PATH)
+
+        async def send(items: list[ProxyFuncHttpBody]) -> list[Any]:
+            logger.info(f"Calling proxy function batch: {batch_url} with {len(items)} calls")
+            result = await self.fetch_response(
+                limiters=limiters,
+                method="POST",
+                url=batch_url,
+                content=ProxyFuncBatchHttpBody(items=items).model_dump_json().encode(),
+                headers={**(headers or {}), "Content-Type": "application/json"},
+            )
+            if (
+                not isinstance(result, dict)
+                or result.get("status") not in framex_settings.server.legal_proxy_code
+                or not isinstance(data := result.get("data"), list)
+            ):
+                raise RuntimeError(f"Proxy function batch {batch_url} failed: {shorten_str(str(result), 512)}")
+            return data
+
+        batcher = self.batchers[url] = ProxyFuncBatcher(url, send, settings.proxy_function_batch)
+        return batcher
+
     async def __call__(self, proxy_path: str, **kwargs: Any) -> Any:
         if func := self.func_map.get(proxy_path):
-            return await func(**kwargs)
+            # Plugin calls do not pass through FastAPI, so validate them before the trusted method.
+            return await func(**dict(func.request_model(**kwargs)))
         raise RuntimeError(f"api({proxy_path}) not found")
 
     # @logger.catch
     async def fetch_response(
         self,
         stream: bool = False,
+        passthrough: ProxyPassthroughConfig | None = None,
+        resilience: tuple[ProxyRetryConfig, ProxyHedgeConfig] | None = None,
+        limiters: tuple[ConcurrencyLimiter, ...] = (),
+        http_cache: ProxyHttpCacheConfig | None = None,
+        request: Request | None = None,
         **kwargs: Any,
-    ) -> AsyncGenerator[str, None] | dict | str:
+    ) -> AsyncGenerator[str | bytes, None] | Response | dict | str:
         if stream:
 
-            async def stream_generator() -> AsyncGenerator[str, None]:
-                async with (
-                    httpx.AsyncClient(timeout=self.time_out) as client,
-                    client.stream(**kwargs) as response,
-                ):
-                    response.raise_for_status()
-                    async for chunk in response.aiter_text():
-                        yield chunk
+            async def stream_generator() -> AsyncGenerator[str | bytes, None]:
+                # The slots are held until the stream ends.
+                async with hold_slots(limiters):
+                    upstream, kwargs["url"] = self.clients.pick(kwargs["url"])
+                    with upstream.track():
+                        async with upstream.client.stream(**kwargs) as response:
+                            response.raise_for_status()
+                            # Passthrough streams forward bytes without decoding them to text.
+                            chunks = response.aiter_text() if passthrough is None else response.aiter_bytes()
+                            async for chunk in chunks:
+                                yield chunk
 
             return stream_generator()
-        async with httpx.AsyncClient(timeout=self.time_out) as client:
-            response = await client.request(**kwargs)
+        if http_cache is not None:
+            result, cache_status = await self._fetch_cached(
+                http_cache, request_cache_action(request), passthrough, resilience, limiters, kwargs
+            )
+            request_cache.stats.record_status(kwargs["url"], cache_status)
+            if request is not None:
+                # Only passthrough results carry headers; the ingress reports the others' status.
+                setattr(request.state, CACHE_STATUS_STATE, cache_status)
+            return result
+        self.retry_budget.record_request()
+        async with hold_slots(limiters):
+            return await self._fetch_upstream(passthrough, resilience, kwargs)
+
+    async def _fetch_upstream(
+        self,
+        passthrough: ProxyPassthroughConfig | None,
+        resilience: tuple[ProxyRetryConfig, ProxyHedgeConfig] | None,
+        kwargs: dict[str, Any],
+    ) -> Response | dict | str:
+        # Streamed or file bodies are consumed by the first attempt and cannot be sent twice.
+        if resilience is None or isinstance(kwargs.get("content"), AsyncIterator) or kwargs.get("files"):
+            return await self._fetch_once(passthrough, kwargs)
+        return await self._fetch_resilient(
+            *resilience, kwargs["url"], lambda tried: self._fetch_once(passthrough, kwargs, tried)
+        )
+
+    async def _fetch_once(
+        self,
+        passthrough: ProxyPassthroughConfig | None,
+        kwargs: dict[str, Any],
+        tried: set[UpstreamClient] | None = None,
+    ) -> Response | dict | str:
+        upstream, url = self.clients.pick(kwargs["url"], tried or ())
+        if tried is not None:
+            tried.add(upstream)
+        kwargs = {**kwargs, "url": url}
+        if passthrough is not None:
+            with upstream.track() as call:
+                async with upstream.client.stream(**kwargs) as response:
+                    chunks = response.aiter_raw() if passthrough.keep_compression else response.aiter_bytes()
+                    content = b"".join([chunk async for chunk in chunks])
+                call.status_code = response.status_code
+            headers = {
+                name: value for name in passthrough.headers if (value := response.headers.get(name)) is not None
+            }
+            if passthrough.keep_compression and (encoding := response.headers.get("content-encoding")):
+                headers["content-encoding"] = encoding
+            return Response(content=content, status_code=response.status_code, headers=headers)
+        with upstream.track():
+            response = await upstream.client.request(**kwargs)
             response.raise_for_status()
             try:
                 return cast(dict, response.json())
             except json.JSONDecodeError:
                 return response.text
 
+    async def _fetch_cached(
+        self,
+        config: ProxyHttpCacheConfig,
+        action: CacheAction,
+        passthrough: ProxyPassthroughConfig | None,
+        resilience: tuple[ProxyRetryConfig, ProxyHedgeConfig] | None,
+        limiters: tuple[ConcurrencyLimiter, ...],
+        kwargs: dict[str, Any],
+    ) -> tuple[Response | dict | str, CacheStatus]:
+        """Serve a GET from the request cache, revalidating stale entries with the upstream's validators."""
+        url = kwargs["url"]
+        if not framex_settings.cache.enabled or action == CacheAction.BYPASS:
+            cache_status = CacheStatus.DISABLED if not framex_settings.cache.enabled else CacheStatus.BYPASS
+            self.retry_budget.record_request()
+            async with hold_slots(limiters):
+                result = await self._fetch_upstream(passthrough, resilience, kwargs)
+            if isinstance(result, Response):
+                result.headers[CACHE_STATUS_HEADER] = cache_status
+            return result, cache_status
+        key = cache_key(url, kwargs.get("params"))
+        entry = None if action == CacheAction.REFRESH else await load_response(key)
+        if entry is not None and entry[1].is_fresh(datetime.now(REQUEST_CACHE_TIMEZONE)):
+            # Hits are answered before taking a concurrency slot.
+            return _stored_result(entry[0], passthrough, CacheStatus.HIT), CacheStatus.HIT
+        stored = None if entry is None else entry[0]
+        validators = {} if stored is None else conditional_headers(stored["headers"])
+        self.retry_budget.record_request()
+        async with hold_slots(limiters):
+            if resilience is None:
+                response = await self._fetch_validated(passthrough, validators, kwargs)
+            else:
+                response = await self._fetch_resilient(
+                    *resilience, url, lambda tried: self._fetch_validated(passthrough, validators, kwargs, tried)
+                )
+        if stored is not None and response.status_code == status.HTTP_304_NOT_MODIFIED:
+            stored, cache_status = refresh_stored(stored, response), CacheStatus.REFRESH
+        elif response.status_code == status.HTTP_200_OK:
+            stored = to_stored(response)
+            cache_status = CacheStatus.REFRESH if action == CacheAction.REFRESH else CacheStatus.MISS
+        else:
+            return _stored_result(to_stored(response), passthrough, CacheStatus.BYPASS), CacheStatus.BYPASS
+        if (lifetime := freshness_lifetime(stored["headers"], config)) is not None:
+            await save_response(key, url, stored, lifetime, config)
+        return _stored_result(stored, passthrough, cache_status), cache_status
+
+    async def _fetch_validated(
+        self,
+        passthrough: ProxyPassthroughConfig | None,
+        validators: dict[str, str],
+        kwargs: dict[str, Any],
+        tried: set[UpstreamClient] | None = None,
+    ) -> httpx.Response:
+        """Send a GET with the validators of a stale entry; a `304` is returned rather than raised."""
+        upstream, url = self.clients.pick(kwargs["url"], tried or ())
+        if tried is not None:
+            tried.add(upstream)
+        headers = {**(kwargs.get("headers") or {}), **validators}
+        with upstream.track() as call:
+            response = await upstream.client.request(**{**kwargs, "url": url, "headers": headers})
+            call.status_code = response.status_code
+            if passthrough is None and response.status_code != status.HTTP_304_NOT_MODIFIED:
+                response.raise_for_status()
+        return response
+
+    async def _fetch_resilient(
+        self,
+        retry: ProxyRetryConfig,
+        hedge: ProxyHedgeConfig,
+        url: str,
+        fetch: Callable[[set[UpstreamClient]], Awaitable[_T]],
+    ) -> _T:
+        """Run `fetch` with retries and hedging; it is given the replicas already tried, to pick another one."""
+        latencies = self.latencies.setdefault(url, LatencyWindow())
+        tried: set[UpstreamClient] = set()
+
+        async def attempt() -> _T:
+            started = time.perf_counter()
+            result = await fetch(tried)
+            if isinstance(result, Response | httpx.Response) and result.status_code in retry.statuses:
+                raise _RetryableResponse(result)
+            latencies.observe(time.perf_counter() - started)
+            return result
+
+        retries = 0
+        while True:
+            delay = _hedge_delay(hedge, latencies)
+            try:
+                return await (attempt() if delay is None else self._hedged(attempt, delay))
+            except Exception as exc:
+                if (
+                    retries >= retry.attempts
+                    or not _is_retryable(exc, retry.statuses)
+                    or not self.retry_budget.try_withdraw()
+                ):
+                    if isinstance(exc, _RetryableResponse):
+                        return cast(_T, exc.response)
+                    raise
+                retries += 1
+                logger.warning(f"Retrying proxy api {url} ({retries}/{retry.attempts}) after {exc!r}")
+            await asyncio.sleep(retry.backoff)
+
+    async def _hedged(self, attempt: Callable[[], Coroutine[Any, Any, _T]], delay: float) -> _T:
+        """Run `attempt`, starting a second one after `delay`; the first success wins, the other is cancelled."""
+        first = asyncio.ensure_future(attempt())
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done or not self.retry_budget.try_withdraw():
+            return await first
+        logger.debug(f"Hedging slow proxy call after {delay * 1000:.1f}ms")
+        pending = {first, asyncio.ensure_future(attempt())}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise cast(BaseException, error)
+        finally:
+            for task in pending:
+                task.cancel()
+
     def _create_dynamic_method(
         self,
         func_name: str,
@@ -276,6 +785,11 @@ class ProxyPlugin(BasePlugin):
         file_param_names: set[str] | None = None,
         stream: bool = False,
         headers: dict[str, str] | None = None,
+        passthrough: ProxyPassthroughConfig | None = None,
+        stream_upload: ProxyStreamUploadConfig | None = None,
+        resilience: tuple[ProxyRetryConfig, ProxyHedgeConfig] | None = None,
+        limiters: tuple[ConcurrencyLimiter, ...] = (),
+        http_cache: ProxyHttpCacheConfig | None = None,
     ) -> Callable[..., Any]:
         # Build a Pydantic request model (for data validation)
         model_name = f"{func_name.title()}_RequestModel"
@@ -284,18 +798,19 @@ class ProxyPlugin(BasePlugin):
         file_param_names = file_param_names or set()
 
         # Construct dynamic methods
-        async def dynamic_method(**kwargs: Any) -> AsyncGenerator[str, None] | dict[str, Any] | str:
+        async def dynamic_method(**kwargs: Any) -> AsyncGenerator[str | bytes, None] | Response | dict[str, Any] | str:
+            # Route calls arrive already validated by FastAPI; `__call__` validates the others.
+            body_request: Request | None = kwargs.pop(PROXY_BODY_PARAM, None)
             log_info = shorten_str(format_proxy_params(**kwargs), 512)
             logger.info(f"Calling proxy url: {url} with kwargs: {log_info}")
-            validated = RequestModel(**kwargs)  # Type Validation
             query = {}
-            json_body = None
+            json_body: bytes | None = None
             form_body = {}
             files = []
-            for field_name, value in validated:
+            for field_name, value in kwargs.items():
                 if field_name in body_param_names:
                     if field_name == "model" and isinstance(value, BaseModel):
-                        json_body = value.model_dump()
+                        json_body = value.model_dump_json().encode()
                     elif field_name in file_param_names:
                         upload_values = value if isinstance(value, list) else [value]
                         for upload in upload_values:
@@ -313,28 +828,53 @@ class ProxyPlugin(BasePlugin):
                     else:
                         form_body[field_name] = value
                 elif isinstance(value, BaseModel):
-                    json_body = value.model_dump()
+                    json_body = value.model_dump_json().encode()
                 else:
                     query[field_name] = value
+            request_headers = headers
+            content: AsyncIterator[bytes] | None = None
             try:
+                if body_request is not None and stream_upload is not None:
+                    _check_body_size(_declared_body_size(body_request), stream_upload.max_bytes)
+                    # Forward the original framing, e.g. the multipart boundary, with the untouched body.
+                    request_headers = {
+                        **(headers or {}),
+                        **{
+                            name: value
+                            for name in ("content-type", "content-length")
+                            if (value := body_request.headers.get(name)) is not None
+                        },
+                    }
+                    content = _stream_body(body_request, stream_upload.max_bytes)
                 request_kwargs: dict[str, Any] = {
                     "stream": stream,
+                    "passthrough": passthrough,
+                    "resilience": resilience,
+                    "limiters": limiters,
+                    "http_cache": http_cache,
                     "method": method.upper(),
                     "url": url,
                     "params": query,
-                    "headers": headers,
+                    "headers": request_headers,
                 }
-                if method.upper() != "GET":
+                if http_cache is not None:
+                    request_kwargs["request"] = body_request
+                if content is not None:
+                    request_kwargs["content"] = content
+                elif method.upper() != "GET":
                     if files or form_body:
                         if form_body:
                             request_kwargs["data"] = form_body
                         if files:
                             request_kwargs["files"] = files
                     elif json_body is not None:
-                        request_kwargs["json"] = json_body
+                        request_kwargs["content"] = json_body
+                        request_kwargs["headers"] = {**(headers or {}), "Content-Type": "application/json"}
                 return await self.fetch_response(
                     **request_kwargs,
                 )
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.opt(exception=e, colors=True).error(f"Error calling proxy api({method}) <y>{url}</y>: {e}")
                 return "error proxy"
@@ -349,6 +889,7 @@ class ProxyPlugin(BasePlugin):
         dynamic_method.__signature__ = sig  # type: ignore
         dynamic_method.__annotations__ = dict(params)
         dynamic_method.__name__ = func_name
+        dynamic_method.request_model = RequestModel  # type: ignore[attr-defined]
         return dynamic_method
 
     @override
@@ -382,3 +923,57 @@ class ProxyPlugin(BasePlugin):
             res = await proxy_func.func(**kwargs)
             return res if proxy_func.is_remote else cache_encode(res)
         raise RuntimeError(f"Proxy function({decode_func_name}) not registered")
+
+
+class _RetryableResponse(Exception):  # noqa: N818
+    """A passthrough response with a retryable status, returned as-is once retries run out."""
+
+    def __init__(self, response: Response | httpx.Response) -> None:
+        super().__init__(f"upstream status {response.status_code}")
+        self.response = response
+
+
+def _stored_result(
+    stored: dict[str, Any], passthrough: ProxyPassthroughConfig | None, cache_status: CacheStatus
+) -> Response | dict | str:
+    if passthrough is not None:
+        headers = {name: value for name in passthrough.headers if (value := stored["headers"].get(name)) is not None}
+        headers[CACHE_STATUS_HEADER] = cache_status
+        return Response(content=stored_content(stored), status_code=stored["status"], headers=headers)
+    response = httpx.Response(stored["status"], headers=stored["headers"], content=stored_content(stored))
+    try:
+        return cast(dict, response.json())
+    except json.JSONDecodeError:
+        return response.text
+
+
+def _is_retryable(exc: Exception, statuses: list[int]) -> bool:
+    if isinstance(exc, _RetryableResponse | httpx.ConnectError | httpx.ConnectTimeout):
+        return True
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in statuses
+
+
+def _hedge_delay(hedge: ProxyHedgeConfig, latencies: LatencyWindow) -> float | None:
+    if not hedge.enable or len(latencies) < hedge.min_samples:
+        return None
+    return max(hedge.min_delay, cast(float, latencies.percentile(hedge.percentile)))
+
+
+def _declared_body_size(request: Request) -> int:
+    value = request.headers.get("content-length", "0")
+    if not (value.isascii() and value.isdigit()):
+        raise HTTPException(400, f"Invalid Content-Length header: {value!r}")
+    return int(value)
+
+
+def _check_body_size(size: int, max_bytes: int | None) -> None:
+    if max_bytes is not None and size > max_bytes:
+        raise HTTPException(413, f"Request body exceeds {max_bytes} bytes")
+
+
+async def _stream_body(request: Request, max_bytes: int | None) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        _check_body_size(received, max_bytes)
+        yield chunk
@@ -0,0 +1,78 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from framex.plugins.proxy.config import ProxyFunctionBatchConfig
+from framex.plugins.proxy.model import ProxyFuncHttpBody
+
+BatchSender = Callable[[list[ProxyFuncHttpBody]], Awaitable[list[Any]]]
+
+
+class ProxyFuncBatcher:
+    """Coalesces proxy-function calls to one remote node into batch requests.
+
+    Calls arriving within `window` seconds of the first pending one share a request, up to `max_size` calls.
+    Each caller gets the result at its own position in the batch response.
+    """
+
+    def __init__(self, name: str, send: BatchSender, config: ProxyFunctionBatchConfig) -> None:
+        self.name = name
+        self._send = send
+        self._config = config
+        self._pending: list[tuple[ProxyFuncHttpBody, asyncio.Future[Any]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.calls = 0
+        self.batches = 0
+
+    async def submit(self, model: ProxyFuncHttpBody) -> Any:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        self._pending.append((model, future))
+        self.calls += 1
+        if len(self._pending) >= self._config.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._config.window, self._flush)
+        return await future
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "batches": self.batches,
+            "pending": len(self._pending),
+            "in_flight": len(self._tasks),
+        }
+
+    async def aclose(self) -> None:
+        self._flush()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        task = asyncio.create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[ProxyFuncHttpBody, asyncio.Future[Any]]]) -> None:
+        try:
+            results = await self._send([model for model, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Proxy function batch to {self.name} returned {len(results)} of {len(batch)} results"
+                )
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results, strict=True):
+            # Callers cancelled while waiting have already given up on their result.
+            if not future.done():
+                future.set_result(result)
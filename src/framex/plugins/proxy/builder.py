@@ -1,3 +1,6 @@
+import hashlib
+import json
+import reprlib
 from typing import Annotated, Any, Union, get_args, get_origin
 
 from fastapi import File, Form, UploadFile
@@ -6,7 +9,12 @@ from pydantic import BaseModel, create_model
 from framex.plugins.proxy.model import ProxyFuncHttpBody
 from framex.utils import cache_decode
 
-_created_models: dict[str, type[BaseModel]] = {}
+# Keyed by (namespace, schema name, digest of the schema and everything it references).
+_created_models: dict[tuple[str, str, str], type[BaseModel]] = {}
+# Models of the build in progress, by schema name; a `$ref` back into one of them is a cycle.
+_building: dict[str, type[BaseModel] | None] = {}
+# Digests of the component schemas met by the build in progress, by schema name.
+_digests: dict[str, str] = {}
 
 type_map = {
     "string": str,
@@ -19,6 +27,24 @@ type_map = {
 }
 
 
+def schema_digest(node: Any, components: dict) -> str:
+    """Digest a schema node together with every component schema it references, directly or not."""
+    schemas: dict[str, Any] = {}
+    pending = [node]
+    while pending:
+        current = pending.pop()
+        if isinstance(current, dict):
+            ref = current.get("$ref")
+            if isinstance(ref, str) and (name := ref.rsplit("/", 1)[-1]) not in schemas:
+                schemas[name] = components.get(name)
+                pending.append(schemas[name])
+            pending.extend(current.values())
+        elif isinstance(current, list):
+            pending.extend(current)
+    payload = json.dumps({"node": node, "schemas": schemas}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 def unwrap_annotation(annotation: Any) -> Any:
     if get_origin(annotation) is Annotated:
         return get_args(annotation)[0]
@@ -43,13 +69,14 @@ def to_multipart_annotation(annotation: Any) -> Any:
 def resolve_annotation(
     prop_schema: dict,
     components: dict,
+    namespace: str = "",
 ) -> Any:
     if "$ref" in prop_schema:
         # Nested $ref support
         ref = prop_schema["$ref"]
         ref_name = ref.split("/")[-1]
         if nested_schema := components.get(ref_name):
-            return create_pydantic_model(ref_name, nested_schema, components)
+            return create_pydantic_model(ref_name, nested_schema, components, namespace)
     if "anyOf" in prop_schema:
         options: list[Any] = []
         for option_schema in prop_schema["anyOf"]:
@@ -64,7 +91,7 @@ def resolve_annotation(
                 and (ref_name := ref.split("/")[-1])
                 and (nested_schema := components.get(ref_name))
             ):
-                model = create_pydantic_model(ref_name, nested_schema, components)
+                model = create_pydantic_model(ref_name, nested_schema, components, namespace)
                 options.append(model)
             else:
                 options.append(type_map.get(typ, str))  # type: ignore [arg-type]
@@ -73,7 +100,7 @@ def resolve_annotation(
     if typ == "array":
         prop_schema = prop_schema.get("items", {})
         if "$ref" in prop_schema:
-            item_type = resolve_annotation(prop_schema, components)
+            item_type = resolve_annotation(prop_schema, components, namespace)
         else:
             if prop_schema.get("type") == "string" and (
                 prop_schema.get("contentMediaType") == "application/octet-stream"
@@ -92,6 +119,9 @@ def resolve_annotation(
 
 
 def resolve_default(annotation: Any) -> Any:
+    if isinstance(annotation, str):
+        # Forward reference to a model of a recursive schema
+        return None
     origin = get_origin(annotation)
     # Union type support: try the first type that can construct a default value first
     if origin is Union and (args := get_args(annotation)) and len(args) > 1:
@@ -116,31 +146,82 @@ def create_pydantic_model(
     name: str,
     schema: dict,
     components: dict,
+    namespace: str = "",
 ) -> type[BaseModel]:
-    if name in _created_models:
-        return _created_models[name]
-    fields: dict[str, tuple[Any, Any]] = {}
-    props = schema.get("properties", {})
-    required_fields = schema.get("required", [])
-    for field_name, prop_schema in props.items():
-        # Get annotation
-        annotation = resolve_annotation(prop_schema, components)
-        # Get default value
-        if field_name in required_fields:
-            default = ...
-        elif "default" in prop_schema:
-            default = prop_schema["default"]
-        else:
-            default = resolve_default(annotation)  # pragma: no cover
-        fields[field_name] = (annotation, default)
-    model: type[BaseModel] = create_model(name, **fields)  # type: ignore
-    _created_models[name] = model
+    """Build (or reuse) the model of a component schema.
+
+    `namespace` keeps same-named schemas of different upstreams apart, and the content digest
+    makes a changed schema build a new model instead of reusing a stale one.
+    """
+    if name in _building:
+        # Reuse a model this build already finished; otherwise it is a cycle, so refer to the
+        # model by name and resolve it once the outermost model is built.
+        return _building[name] or name  # type: ignore [return-value]
+    outermost = not _building
+    # Nested models are reached once per reference, so each component is only digested once per build.
+    if (digest := _digests.get(name)) is None:
+        digest = schema_digest(schema, components)
+        if not outermost:
+            _digests[name] = digest
+    key = (namespace, name, digest)
+    if (model := _created_models.get(key)) is not None:
+        return model
+
+    _building[name] = None
+    try:
+        fields: dict[str, tuple[Any, Any]] = {}
+        props = schema.get("properties", {})
+        required_fields = schema.get("required", [])
+        for field_name, prop_schema in props.items():
+            # Get annotation
+            annotation = resolve_annotation(prop_schema, components, namespace)
+            # Get default value
+            if field_name in required_fields:
+                default = ...
+            elif "default" in prop_schema:
+                default = prop_schema["default"]
+            else:
+                default = resolve_default(annotation)  # pragma: no cover
+            fields[field_name] = (annotation, default)
+        model = create_model(name, **fields)  # type: ignore
+        _building[name] = model
+        if outermost:
+            built = {model_name: built_model for model_name, built_model in _building.items() if built_model}
+            for built_model in built.values():
+                if not built_model.__pydantic_complete__:
+                    built_model.model_rebuild(_types_namespace=built)
+    finally:
+        if outermost:
+            _building.clear()
+            _digests.clear()
+    _created_models[key] = model
     return model
 
 
+class _ParamsRepr(reprlib.Repr):
+    """Bounded repr for log lines, so large request bodies are not rendered in full."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.maxlevel = 6
+        self.maxdict = self.maxlist = self.maxtuple = self.maxset = 16
+        self.maxstring = self.maxother = 256
+
+    def repr1(self, x: Any, level: int) -> str:
+        if isinstance(x, BaseModel):
+            if level <= 0:
+                return f"{type(x).__name__}(...)"
+            fields = [f"{name}={self.repr1(value, level - 1)}" for name, value in x]
+            return f"{type(x).__name__}({', '.join(fields)})"
+        return super().repr1(x, level)
+
+
+_params_repr = _ParamsRepr()
+
+
 def format_proxy_params(**kwargs: Any) -> str:
     if (model := kwargs.get("model")) and isinstance(model, ProxyFuncHttpBody):
         func_name = cache_decode(model.func_name)
         data = cache_decode(model.data)
-        return str({"func_name": func_name, "data": data})
-    return str(kwargs)
+        return _params_repr.repr({"func_name": func_name, "data": data})
+    return _params_repr.repr(kwargs)
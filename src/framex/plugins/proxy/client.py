@@ -0,0 +1,189 @@
+import time
+from collections.abc import Collection, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from framex.plugins.proxy.config import ProxyBalancerConfig, ProxyClientConfig
+
+# Weight of the newest sample in the latency moving average.
+EWMA_ALPHA = 0.3
+
+
+@dataclass
+class TrackedCall:
+    """Outcome of one tracked call; set `status_code` when a response is returned without raising."""
+
+    status_code: int | None = None
+
+
+@dataclass(eq=False)
+class UpstreamClient:
+    base_url: str
+    client: httpx.AsyncClient
+    requests: int = 0
+    in_flight: int = 0
+    errors: int = 0
+    ewma_ms: float | None = None
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    balancer: ProxyBalancerConfig | None = None
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+    def eject(self, seconds: float) -> None:
+        self.ejected_until = time.monotonic() + seconds
+
+    def restore(self) -> None:
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    @contextmanager
+    def track(self) -> Iterator[TrackedCall]:
+        self.requests += 1
+        self.in_flight += 1
+        started = time.perf_counter()
+        call = TrackedCall()
+        try:
+            yield call
+        except Exception as exc:
+            self.errors += 1
+            # Client errors say nothing about the replica's health.
+            if not (isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500):
+                self._record_failure()
+            raise
+        else:
+            if call.status_code is not None and call.status_code >= 500:
+                # Passthrough and cached calls hand server errors back instead of raising them.
+                self.errors += 1
+                self._record_failure()
+                return
+            elapsed = (time.perf_counter() - started) * 1000
+            self.ewma_ms = elapsed if self.ewma_ms is None else EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * self.ewma_ms
+            self.consecutive_failures = 0
+        finally:
+            self.in_flight -= 1
+
+    def _record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.balancer is not None and self.consecutive_failures >= self.balancer.max_failures:
+            self.eject(self.balancer.ejection_time)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "errors": self.errors,
+            "ewma_ms": None if self.ewma_ms is None else round(self.ewma_ms, 3),
+            "ejected": self.ejected,
+        }
+
+
+@dataclass(eq=False)
+class UpstreamGroup:
+    """Replicas of one logical upstream; calls to `base_url` are spread across `members`."""
+
+    base_url: str
+    members: list[UpstreamClient]
+    balancer: ProxyBalancerConfig
+
+    def select(self, exclude: Collection[UpstreamClient] = ()) -> UpstreamClient:
+        """Pick a replica, preferring those not in `exclude`, e.g. ones a retry already tried."""
+        healthy = [member for member in self.members if not member.ejected]
+        candidates = [member for member in healthy if member not in exclude] or healthy
+        if not candidates:
+            # Fail open: the replica due back first is the best guess.
+            return min(self.members, key=lambda member: member.ejected_until)
+        if self.balancer.strategy == "ewma":
+            # Unmeasured replicas go first, then latency weighted by the work already queued on them.
+            return min(candidates, key=lambda member: (member.ewma_ms or 0.0) * (member.in_flight + 1))
+        return min(candidates, key=lambda member: (member.in_flight, member.requests))
+
+    async def probe(self) -> None:
+        path = self.balancer.health_path
+        if path is None:
+            return
+        for member in self.members:
+            try:
+                response = await member.client.get(f"{member.base_url}{path}", timeout=self.balancer.health_timeout)
+                response.raise_for_status()
+            except Exception:
+                member.eject(self.balancer.ejection_time)
+            else:
+                member.restore()
+
+
+class UpstreamClientPool:
+    """Long-lived httpx clients, one per upstream base URL, so connections are reused across calls."""
+
+    def __init__(self, config: ProxyClientConfig, timeout: float) -> None:
+        self._config = config
+        self._timeout = timeout
+        self._clients: dict[str, UpstreamClient] = {}
+        self._groups: dict[str, UpstreamGroup] = {}
+
+    def open(self, base_urls: Iterable[str]) -> None:
+        for base_url in base_urls:
+            self._get_or_create(base_url.rstrip("/"))
+
+    def add_group(self, base_url: str, member_urls: Iterable[str], balancer: ProxyBalancerConfig) -> UpstreamGroup:
+        members = [self._get_or_create(url.rstrip("/")) for url in member_urls]
+        for member in members:
+            member.balancer = balancer
+        group = self._groups[base_url.rstrip("/")] = UpstreamGroup(base_url.rstrip("/"), members, balancer)
+        return group
+
+    def get(self, url: str) -> UpstreamClient:
+        for base_url, upstream in self._clients.items():
+            if _has_base(url, base_url):
+                return upstream
+        # Unknown URLs share one client per origin.
+        return self._get_or_create(str(httpx.URL(url).copy_with(path="/", query=None, fragment=None)).rstrip("/"))
+
+    def pick(self, url: str, exclude: Collection[UpstreamClient] = ()) -> tuple[UpstreamClient, str]:
+        """Resolve `url` to a client, moving calls to a group onto the selected replica."""
+        for base_url, group in self._groups.items():
+            if _has_base(url, base_url):
+                member = group.select(exclude)
+                return member, f"{member.base_url}{url[len(base_url) :]}"
+        return self.get(url), url
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {base_url: upstream.stats() for base_url, upstream in self._clients.items()}
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        self._groups = {}
+        for upstream in clients.values():
+            await upstream.client.aclose()
+
+    def _get_or_create(self, base_url: str) -> UpstreamClient:
+        if (upstream := self._clients.get(base_url)) is None:
+            upstream = self._clients[base_url] = UpstreamClient(base_url, self._create_client())
+        return upstream
+
+    def _create_client(self) -> httpx.AsyncClient:
+        config = self._config
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                self._timeout,
+                connect=config.connect_timeout,
+                read=self._timeout if config.read_timeout is None else config.read_timeout,
+                write=self._timeout if config.write_timeout is None else config.write_timeout,
+                pool=config.pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            http2=config.http2,
+        )
+
+
+def _has_base(url: str, base_url: str) -> bool:
+    return url == base_url or url.startswith(f"{base_url}/")
@@ -1,4 +1,4 @@
-from typing import Any, Self
+from typing import Any, Literal, Self
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -8,22 +8,128 @@ from framex.plugin import get_plugin_config
 
 VERSION = "0.4.0"
 
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ProxyPassthroughConfig(BaseModel):
+    enable: bool = False
+    headers: list[str] = Field(
+        default_factory=lambda: ["content-type", "content-language", "cache-control", "etag", "last-modified"]
+    )
+    keep_compression: bool = False
+
+
+class ProxyStreamUploadConfig(BaseModel):
+    enable: list[str] = Field(default_factory=list)
+    max_bytes: int | None = Field(default=None, gt=0)
+
+
+class ProxyBalancerConfig(BaseModel):
+    strategy: Literal["least_outstanding", "ewma"] = "least_outstanding"
+    # Consecutive failures (connection errors or 5xx) before a replica is ejected.
+    max_failures: int = Field(default=3, gt=0)
+    ejection_time: float = Field(default=30.0, gt=0)
+    # Active probes are off unless a path is set.
+    health_path: str | None = None
+    health_interval: float = Field(default=10.0, gt=0)
+    health_timeout: float = Field(default=2.0, gt=0)
+
+
+class ProxyRetryConfig(BaseModel):
+    # Retries after the first attempt, for connection errors and `statuses`.
+    attempts: int = Field(default=0, ge=0)
+    statuses: list[int] = Field(default_factory=lambda: [502, 503, 504])
+    backoff: float = Field(default=0.05, ge=0)
+
+
+class ProxyHedgeConfig(BaseModel):
+    enable: bool = False
+    # A second request is sent once the first is slower than this latency percentile of the route.
+    percentile: float = Field(default=95.0, gt=0, lt=100)
+    min_samples: int = Field(default=20, gt=0)
+    min_delay: float = Field(default=0.01, ge=0)
+
+
+class ProxyRetryBudgetConfig(BaseModel):
+    ratio: float = Field(default=0.1, ge=0)
+    min_per_second: float = Field(default=1.0, ge=0)
+    window: int = Field(default=10, gt=0)
+
+
+class ProxyLimitConfig(BaseModel):
+    max_concurrency: int = Field(gt=0)
+    # Callers allowed to wait for a slot; once full, calls fail fast with 503.
+    max_queue: int = Field(default=0, ge=0)
+    queue_timeout: float | None = Field(default=None, gt=0)
+
+
+class ProxyFunctionBatchConfig(BaseModel):
+    # Remote nodes must serve the batch route, so enable it only once they run a version that has it.
+    enable: bool = False
+    # Calls to one remote node that arrive within this many seconds share a request.
+    window: float = Field(default=0.002, ge=0)
+    max_size: int = Field(default=64, gt=0)
+
+
+class ProxyHttpCacheConfig(BaseModel):
+    # GET path rules whose upstream responses are cached; off unless set.
+    enable: list[str] = Field(default_factory=list)
+    # Freshness when the upstream sends no max-age, and the cap on the one it sends.
+    ttl: int = Field(default=60, ge=0)
+    max_ttl: int = Field(default=3600, gt=0)
+    # Seconds a stale entry with an ETag or Last-Modified is kept for conditional revalidation.
+    retain: int = Field(default=600, ge=0)
+    tags: list[str] = Field(default_factory=list)
+
 
 class ProxyUrlRuleConfig(BaseModel):
     enable: list[str] = Field(default_factory=lambda: ["*"])
     disable: list[str] = Field(default_factory=list)
     docs_path: str = "/api/v1/openapi.json"
+    passthrough: ProxyPassthroughConfig = Field(default_factory=ProxyPassthroughConfig)
+    stream_upload: ProxyStreamUploadConfig = Field(default_factory=ProxyStreamUploadConfig)
+    # Extra base URLs serving the same API; routes are registered once and calls are balanced.
+    replicas: list[str] = Field(default_factory=list)
+    balancer: ProxyBalancerConfig = Field(default_factory=ProxyBalancerConfig)
+    # Non-GET paths that are safe to retry and hedge.
+    idempotent: list[str] = Field(default_factory=list)
+    retry: ProxyRetryConfig = Field(default_factory=ProxyRetryConfig)
+    hedge: ProxyHedgeConfig = Field(default_factory=ProxyHedgeConfig)
+    limit: ProxyLimitConfig | None = None
+    # Path rule -> limit for the matching routes, applied on top of `limit`.
+    route_limits: dict[str, ProxyLimitConfig] = Field(default_factory=dict)
+    http_cache: ProxyHttpCacheConfig = Field(default_factory=ProxyHttpCacheConfig)
+
+
+class ProxyClientConfig(BaseModel):
+    max_connections: int | None = 100
+    max_keepalive_connections: int | None = 20
+    keepalive_expiry: float | None = 5.0
+    connect_timeout: float | None = 10.0
+    # Read and write timeouts fall back to `timeout` when unset.
+    read_timeout: float | None = None
+    write_timeout: float | None = None
+    pool_timeout: float | None = 10.0
+    http2: bool = False
 
 
 class ProxyPluginConfig(BaseModel):
     proxy_urls: list[str] | dict[str, ProxyUrlRuleConfig] = Field(default_factory=list)
     force_stream_apis: list[str] = Field(default_factory=list)
     timeout: int = 600
+    discovery_timeout: float = Field(default=30, gt=0)
+    # Directory for OpenAPI spec snapshots; when set, startup serves the snapshot and revalidates it in background.
+    spec_cache_dir: str | None = None
+    # Seconds between background re-fetches of every upstream spec; disabled when unset.
+    refresh_interval: float | None = Field(default=None, gt=0)
+    client: ProxyClientConfig = Field(default_factory=ProxyClientConfig)
+    retry_budget: ProxyRetryBudgetConfig = Field(default_factory=ProxyRetryBudgetConfig)
     ingress_config: dict[str, Any] = Field(default_factory=lambda: {"max_ongoing_requests": 60})
 
     auth: AuthConfig = Field(default_factory=AuthConfig)
 
     proxy_functions: dict[str, list[str]] = Field(default_factory=dict)
+    proxy_function_batch: ProxyFunctionBatchConfig = Field(default_factory=ProxyFunctionBatchConfig)
 
     def is_white_url(self, base_url: str, path: str) -> bool:
         """
@@ -66,6 +172,56 @@ class ProxyPluginConfig(BaseModel):
             return self.proxy_urls.get(base_url, ProxyUrlRuleConfig()).docs_path
         return OPENAPI_URL
 
+    def get_passthrough(self, base_url: str) -> ProxyPassthroughConfig | None:
+        if isinstance(self.proxy_urls, dict) and (config := self.proxy_urls.get(base_url)) is not None:
+            return config.passthrough if config.passthrough.enable else None
+        return None
+
+    def get_stream_upload(self, base_url: str, path: str) -> ProxyStreamUploadConfig | None:
+        if isinstance(self.proxy_urls, dict) and (config := self.proxy_urls.get(base_url)) is not None:
+            return config.stream_upload if self._match_rules(config.stream_upload.enable, path) else None
+        return None
+
+    def get_resilience(
+        self, base_url: str, path: str, method: str
+    ) -> tuple[ProxyRetryConfig, ProxyHedgeConfig] | None:
+        """Retry and hedge settings of an idempotent route, or None when neither applies."""
+        if not isinstance(self.proxy_urls, dict) or (config := self.proxy_urls.get(base_url)) is None:
+            return None
+        if method.upper() not in IDEMPOTENT_METHODS and not self._match_rules(config.idempotent, path):
+            return None
+        if not config.retry.attempts and not config.hedge.enable:
+            return None
+        return config.retry, config.hedge
+
+    def get_limits(
+        self, base_url: str, path: str
+    ) -> tuple[ProxyLimitConfig | None, str | None, ProxyLimitConfig | None]:
+        """The upstream limit, and the first matching route rule with its limit."""
+        if not isinstance(self.proxy_urls, dict) or (config := self.proxy_urls.get(base_url)) is None:
+            return None, None, None
+        for rule, limit in config.route_limits.items():
+            if self._match_rules([rule], path):
+                return config.limit, rule, limit
+        return config.limit, None, None
+
+    def get_http_cache(self, base_url: str, path: str, method: str) -> ProxyHttpCacheConfig | None:
+        if method.upper() != "GET" or not isinstance(self.proxy_urls, dict):
+            return None
+        if (config := self.proxy_urls.get(base_url)) is None:
+            return None
+        return config.http_cache if self._match_rules(config.http_cache.enable, path) else None
+
+    def get_upstream_groups(self) -> dict[str, tuple[list[str], ProxyBalancerConfig]]:
+        """Upstreams with replicas, mapped to all of their base URLs and the balancer config."""
+        if not isinstance(self.proxy_urls, dict):
+            return {}
+        return {
+            base_url: ([base_url, *config.replicas], config.balancer)
+            for base_url, config in self.proxy_urls.items()
+            if config.replicas
+        }
+
     @model_validator(mode="after")
     def validate_proxy_functions(self) -> Self:
         for url in self.proxy_functions:
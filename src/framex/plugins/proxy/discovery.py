@@ -0,0 +1,70 @@
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+from framex.log import logger
+
+SPEC_SNAPSHOT_VERSION = 1
+
+DiscoverySource = Literal["network", "snapshot", "failed"]
+
+
+def spec_digest(spec: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+@dataclass
+class SpecSnapshot:
+    url: str
+    spec: dict[str, Any]
+    digest: str
+    etag: str | None = None
+
+
+@dataclass
+class DiscoveryReport:
+    url: str
+    source: DiscoverySource = "network"
+    fetch_ms: float = 0.0
+    parse_ms: float = 0.0
+    routes: int = 0
+    error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class SpecSnapshotStore:
+    """On-disk copies of upstream OpenAPI specs, one JSON file per upstream URL."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self._directory = Path(directory)
+
+    def path(self, url: str) -> Path:
+        return self._directory / f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+
+    def load(self, url: str) -> SpecSnapshot | None:
+        path = self.path(url)
+        if not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            if payload.get("version") != SPEC_SNAPSHOT_VERSION:
+                raise ValueError(f"unsupported snapshot version {payload.get('version')!r}")
+            snapshot = SpecSnapshot(url=url, spec=payload["spec"], digest=payload["digest"], etag=payload.get("etag"))
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning(f"Ignore openapi snapshot of {url}: {exc}")
+            return None
+        if spec_digest(snapshot.spec) != snapshot.digest:
+            logger.warning(f"Ignore openapi snapshot of {url}: digest mismatch")
+            return None
+        return snapshot
+
+    def save(self, snapshot: SpecSnapshot) -> None:
+        path = self.path(snapshot.url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{path.name}.tmp")
+        temporary.write_text(json.dumps({"version": SPEC_SNAPSHOT_VERSION, **asdict(snapshot)}), encoding="utf-8")
+        temporary.replace(path)
@@ -0,0 +1,135 @@
+import base64
+import hashlib
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Any
+from urllib.parse import urlencode
+
+import httpx
+from starlette.requests import Request
+
+from framex.consts import CACHE_REQUEST_HEADER, CacheAction
+from framex.driver.cache import request_cache
+from framex.driver.cache_backends import REQUEST_CACHE_TIMEZONE, CacheEntryMetadata
+from framex.log import logger
+from framex.plugins.proxy.config import ProxyHttpCacheConfig
+
+# Every proxied entry carries this tag, so `/cache/purge` can drop them all at once.
+PROXY_CACHE_TAG = "proxy"
+
+# Bodies are stored decoded, so encoding and framing headers do not describe them any more.
+_UNSTORED_HEADERS = frozenset(
+    {"connection", "content-encoding", "content-length", "date", "keep-alive", "set-cookie", "transfer-encoding"}
+)
+
+
+def request_cache_action(request: Request | None) -> CacheAction:
+    """The `X-FrameX-Cache` action of the proxied request; calls without a request use the cache."""
+    if request is None:
+        return CacheAction.USE
+    try:
+        return CacheAction(request.headers.get(CACHE_REQUEST_HEADER, CacheAction.USE).strip().lower())
+    except ValueError:
+        return CacheAction.USE
+
+
+def cache_key(url: str, params: Mapping[str, Any] | None) -> str:
+    return f"proxy:GET {url}?{urlencode(sorted((params or {}).items()), doseq=True)}"
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str], config: ProxyHttpCacheConfig) -> int | None:
+    """Seconds a response stays fresh, or None when it must not be stored."""
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        lifetime = 0
+    else:
+        max_age = _seconds(directives.get("s-maxage"))
+        if max_age is None:
+            max_age = _seconds(directives.get("max-age"))
+        lifetime = (config.ttl if max_age is None else max_age) - (_seconds(headers.get("age")) or 0)
+    lifetime = max(0, min(lifetime, config.max_ttl))
+    # An entry that is stale at once is only worth keeping when it can be revalidated.
+    if lifetime == 0 and not conditional_headers(headers):
+        return None
+    return lifetime
+
+
+def conditional_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    conditional = {}
+    if etag := headers.get("etag"):
+        conditional["If-None-Match"] = etag
+    if last_modified := headers.get("last-modified"):
+        conditional["If-Modified-Since"] = last_modified
+    return conditional
+
+
+def to_stored(response: httpx.Response) -> dict[str, Any]:
+    return {
+        "status": response.status_code,
+        "headers": {
+            name.lower(): value for name, value in response.headers.items() if name.lower() not in _UNSTORED_HEADERS
+        },
+        # Shared stores serialize entries as JSON, which only keeps binary bodies intact as base64 text.
+        "content": base64.b64encode(response.content).decode("ascii"),
+    }
+
+
+def stored_content(stored: dict[str, Any]) -> bytes:
+    return base64.b64decode(stored["content"])
+
+
+def refresh_stored(stored: dict[str, Any], not_modified: httpx.Response) -> dict[str, Any]:
+    """Apply the headers of a 304 response to the entry it revalidated."""
+    return {**stored, "headers": {**stored["headers"], **to_stored(not_modified)["headers"]}}
+
+
+async def load_response(key: str) -> tuple[dict[str, Any], CacheEntryMetadata] | None:
+    try:
+        return await request_cache.get_entry(_store_key(key))
+    except Exception as exc:
+        logger.warning(f"Failed to read proxy cache key {key!r}: {exc}")
+        return None
+
+
+async def save_response(
+    key: str, path: str, stored: dict[str, Any], lifetime: int, config: ProxyHttpCacheConfig
+) -> None:
+    created_at = datetime.now(REQUEST_CACHE_TIMEZONE)
+    metadata = CacheEntryMetadata(
+        key=key,
+        store_key=_store_key(key),
+        store=request_cache.backend.store,
+        created_at=created_at,
+        expires_at=created_at + timedelta(seconds=lifetime),
+        ttl=lifetime,
+        path=path,
+        method="GET",
+        tags=[PROXY_CACHE_TAG, *config.tags],
+        stale_ttl=config.retain if conditional_headers(stored["headers"]) else 0,
+    )
+    try:
+        await request_cache.set(metadata.store_key, stored, metadata)
+    except Exception as exc:
+        logger.warning(f"Failed to write proxy cache key {key!r}: {exc}")
+
+
+def _store_key(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _seconds(value: str | None) -> int | None:
+    try:
+        return None if value is None else max(0, int(value))
+    except ValueError:
+        return None
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any
+
+from fastapi import HTTPException
+
+from framex.driver.cache_stats import LatencyStats
+from framex.plugins.proxy.config import ProxyLimitConfig
+
+
+class ConcurrencyLimiter:
+    """Caps concurrent calls; up to `max_queue` callers wait in FIFO order, the rest fail fast with 503."""
+
+    def __init__(self, name: str, config: ProxyLimitConfig) -> None:
+        self.name = name
+        self._config = config
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self.in_flight = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait = LatencyStats()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self._config.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "wait": self.wait.as_dict(),
+        }
+
+    async def _acquire(self) -> None:
+        if self.in_flight < self._config.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.wait.observe(0.0)
+            return
+        if len(self._waiters) >= self._config.max_queue:
+            self.rejected += 1
+            raise HTTPException(503, f"Proxy upstream {self.name} is at capacity")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self._config.queue_timeout):
+                await waiter
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as this caller gave up; pass it on.
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(exc, TimeoutError):
+                self.timeouts += 1
+                raise HTTPException(503, f"Timed out waiting for proxy upstream {self.name}") from exc
+            raise
+        finally:
+            self.wait.observe(time.perf_counter() - started)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next caller, so in_flight stays the same.
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+@asynccontextmanager
+async def hold_slots(limiters: Iterable[ConcurrencyLimiter]) -> AsyncIterator[None]:
+    async with AsyncExitStack() as stack:
+        for limiter in limiters:
+            await stack.enter_async_context(limiter.slot())
+        yield
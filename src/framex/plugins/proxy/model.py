@@ -12,3 +12,7 @@ class ProxyFunc(BaseModel):
 class ProxyFuncHttpBody(BaseModel):
     data: str
     func_name: str
+
+
+class ProxyFuncBatchHttpBody(BaseModel):
+    items: list[ProxyFuncHttpBody]
@@ -0,0 +1,68 @@
+import math
+import time
+from collections import deque
+from typing import Any
+
+
+class RetryBudget:
+    """Caps retries and hedges at `ratio` of the requests in a sliding window, plus a floor per second.
+
+    Once the budget is spent, failing calls are not retried, so retries cannot multiply the load on an
+    upstream that is already failing.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, window: int = 10) -> None:
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._window = window
+        # [second, requests, retries]
+        self._buckets: deque[list[int]] = deque()
+        self.rejected = 0
+
+    def record_request(self) -> None:
+        self._bucket()[1] += 1
+
+    def try_withdraw(self) -> bool:
+        current = self._bucket()
+        requests = sum(bucket[1] for bucket in self._buckets)
+        retries = sum(bucket[2] for bucket in self._buckets)
+        if retries + 1 > self._min_per_second * self._window + self._ratio * requests:
+            self.rejected += 1
+            return False
+        current[2] += 1
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        self._bucket()
+        return {
+            "window_requests": sum(bucket[1] for bucket in self._buckets),
+            "window_retries": sum(bucket[2] for bucket in self._buckets),
+            "rejected": self.rejected,
+        }
+
+    def _bucket(self) -> list[int]:
+        second = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        while self._buckets[0][0] <= second - self._window:
+            self._buckets.popleft()
+        return self._buckets[-1]
+
+
+class LatencyWindow:
+    """The latest `size` latency samples of one route, for percentile-based hedge delays."""
+
+    def __init__(self, size: int = 256) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1)]
@@ -1,45 +1,119 @@
 import base64
+import binascii
 import importlib
 import json
+import struct
 import zlib
-from datetime import datetime
+from contextlib import suppress
+from datetime import date
 from enum import Enum
-from itertools import cycle
 from typing import Any
 
+from framex.config import settings
 
-def xor_crypt(data: bytes, key: str = "01234567890abcdefghijklmnopqrstuvwxyz") -> bytes:
-    return bytes(a ^ b for a, b in zip(data, cycle(key.encode())))
-
-
-def cache_encode(data: Any) -> str:
-    def transform(obj: Any) -> Any:
-        if hasattr(obj, "__dict__"):
-            raw_attributes = {k: transform(v) for k, v in obj.__dict__.items() if not k.startswith("_")}
-            return {
-                "__type__": "dynamic_obj",
-                "__module__": obj.__class__.__module__,
-                "__class__": obj.__class__.__name__,
-                "data": raw_attributes,
-            }
-        if isinstance(obj, list):
-            return [transform(i) for i in obj]
-        if isinstance(obj, dict):
-            return {k: transform(v) for k, v in obj.items()}
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, Enum):
-            return obj.value
+XOR_KEY = b"01234567890abcdefghijklmnopqrstuvwxyz"
+
+# Wire format: magic, format version, codec id, compression id, then the obfuscated payload, all base64 encoded.
+# Payloads without the magic are the legacy format: base64(xor(zlib(json))).
+MAGIC = b"FXC"
+FORMAT_VERSION = 1
+CODEC_JSON = 1
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+# Smaller payloads are not worth the zlib call.
+COMPRESS_THRESHOLD = 256
+
+_HEADER = struct.Struct(f"!{len(MAGIC)}sBBB")
+_LEAF_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def xor_crypt(data: bytes, key: str | bytes = XOR_KEY) -> bytes:
+    """XOR `data` with a repeating `key`, as one big-integer operation instead of byte by byte."""
+    if not data:
+        return b""
+    key = key.encode() if isinstance(key, str) else key
+    stream = (key * (len(data) // len(key) + 1))[: len(data)]
+    return (int.from_bytes(data, "little") ^ int.from_bytes(stream, "little")).to_bytes(len(data), "little")
+
+
+def _transform(obj: Any) -> Any:
+    # Exact builtin containers and leaves have no `__dict__`; handling them first skips a call per value.
+    cls = type(obj)
+    if cls in _LEAF_TYPES:
         return obj
+    if cls is dict:
+        return {k: v if type(v) in _LEAF_TYPES else _transform(v) for k, v in obj.items()}
+    if cls is list:
+        return [v if type(v) in _LEAF_TYPES else _transform(v) for v in obj]
+    if hasattr(obj, "__dict__"):
+        raw_attributes = {k: _transform(v) for k, v in obj.__dict__.items() if not k.startswith("_")}
+        return {
+            "__type__": "dynamic_obj",
+            "__module__": obj.__class__.__module__,
+            "__class__": obj.__class__.__name__,
+            "data": raw_attributes,
+        }
+    if isinstance(obj, list):
+        return [_transform(i) for i in obj]
+    if isinstance(obj, dict):
+        return {k: _transform(v) for k, v in obj.items()}
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    return obj
 
-    json_str = json.dumps(transform(data), ensure_ascii=False)
-    compressed = zlib.compress(json_str.encode("utf-8"))
-    encrypted = xor_crypt(compressed)
-    return base64.b64encode(encrypted).decode("ascii")
 
+def cache_encode(data: Any, *, framed: bool | None = None) -> str:
+    """Encode `data` for another node, as a frame when `framed`, which defaults to `server.framed_codec`.
 
-def cache_decode(res: Any) -> Any:
-    current = res
+    Every node reads both formats, but nodes before the framed one only read the legacy format.
+    """
+    payload = json.dumps(_transform(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if not (settings.server.framed_codec if framed is None else framed):
+        return base64.b64encode(xor_crypt(zlib.compress(payload, 1))).decode("ascii")
+    compression = COMPRESSION_NONE
+    if len(payload) >= COMPRESS_THRESHOLD:
+        payload, compression = zlib.compress(payload, 1), COMPRESSION_ZLIB
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, CODEC_JSON, compression)
+    return base64.b64encode(header + xor_crypt(payload)).decode("ascii")
+
+
+def _restore_object(item: dict[str, Any]) -> Any:
+    """Rebuild an object encoded as `dynamic_obj`, whose attributes are already restored."""
+    if item.get("__type__") != "dynamic_obj":
+        return item
+    try:
+        module = importlib.import_module(item["__module__"])
+        cls = getattr(module, item["__class__"])
+        if hasattr(cls, "model_validate"):
+            return cls.model_validate(item["data"])
+        return cls(**item["data"])
+    except Exception:
+        from types import SimpleNamespace
+
+        return SimpleNamespace(**item["data"])
+
+
+def _frame_compression(raw: bytes) -> int | None:
+    """Compression id of a framed payload, or None when `raw` does not carry a known frame header."""
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, codec, compression = _HEADER.unpack_from(raw)
+    if magic != MAGIC or version != FORMAT_VERSION or codec != CODEC_JSON:
+        return None
+    return compression if compression in (COMPRESSION_NONE, COMPRESSION_ZLIB) else None
+
+
+def _decode_frame(raw: bytes, compression: int) -> Any:
+    payload = xor_crypt(raw[_HEADER.size :])
+    if compression == COMPRESSION_ZLIB:
+        payload = zlib.decompress(payload)
+    return json.loads(payload, object_hook=_restore_object)
+
+
+def _decode_legacy(res: str) -> Any:
+    current: Any = res
     while isinstance(current, str):
         try:
             decoded_bytes = base64.b64decode(current, validate=True)
@@ -52,29 +126,27 @@ def cache_decode(res: Any) -> Any:
                 current = temp
             except Exception:
                 break
+    return current
+
+
+def cache_decode(res: Any) -> Any:
+    if isinstance(res, str):
+        try:
+            raw = base64.b64decode(res, validate=True)
+        except (binascii.Error, ValueError):
+            raw = b""
+        # Framed payloads decode in one step, restoring objects while parsing. Anything else that
+        # merely starts with the magic, like plain text, is left to the legacy path.
+        if (compression := _frame_compression(raw)) is not None:
+            with suppress(zlib.error, ValueError):
+                return _decode_frame(raw, compression)
+        res = _decode_legacy(res)
 
     def restore_models(item: Any) -> Any:
         if isinstance(item, list):
             return [restore_models(i) for i in item]
-
         if isinstance(item, dict):
-            if item.get("__type__") == "dynamic_obj":
-                try:
-                    module = importlib.import_module(item["__module__"])
-                    cls = getattr(module, item["__class__"])
-
-                    cleaned_data = {k: restore_models(v) for k, v in item["data"].items()}
-
-                    if hasattr(cls, "model_validate"):
-                        return cls.model_validate(cleaned_data)
-                    return cls(**cleaned_data)
-                except Exception:
-                    from types import SimpleNamespace
-
-                    return SimpleNamespace(**{k: restore_models(v) for k, v in item["data"].items()})
-
-            return {k: restore_models(v) for k, v in item.items()}
-
+            return _restore_object({k: restore_models(v) for k, v in item.items()})
         return item
 
-    return restore_models(current)
+    return restore_models(res)
@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+
+from framex.config import settings
+from framex.consts import CACHE_ADMIN_PATH
+from framex.driver.cache import request_cache
+from framex.driver.cache_stats import CacheStats
+
+PURGE_URL = f"{CACHE_ADMIN_PATH}/purge"
+
+
+def test_cache_purge_requires_auth_rule(client: TestClient):
+    res = client.post(PURGE_URL, json={"tags": ["reports"]}).json()
+    assert res["status"] == 403
+    assert res["message"] == f"API({PURGE_URL}) requires an auth rule"
+
+
+def test_cache_purge_rejects_invalid_api_key(client: TestClient, monkeypatch):
+    monkeypatch.setitem(settings.auth.rules, f"{CACHE_ADMIN_PATH}/*", ["i_am_cache_admin_key"])
+    res = client.post(PURGE_URL, json={"tags": ["reports"]}, headers={"Authorization": "error_key"}).json()
+    assert res["status"] == 401
+
+
+def test_cache_purge_forwards_selectors(client: TestClient, monkeypatch):
+    monkeypatch.setitem(settings.auth.rules, f"{CACHE_ADMIN_PATH}/*", ["i_am_cache_admin_key"])
+    calls = []
+
+    async def fake_purge(**kwargs):
+        calls.append(kwargs)
+        return ["a" * 64]
+
+    monkeypatch.setattr(request_cache, "purge", fake_purge)
+    headers = {"Authorization": "i_am_cache_admin_key"}
+    res = client.post(PURGE_URL, json={"tags": ["reports"], "path_prefix": "/api/v1/report"}, headers=headers).json()
+
+    assert res["status"] == 200
+    assert res["data"] == {"purged": 1, "keys": ["a" * 64]}
+    assert calls == [{"tags": ["reports"], "path_prefix": "/api/v1/report", "store_keys": []}]
+
+
+def test_cache_purge_without_selector_is_bad_request(client: TestClient, monkeypatch):
+    monkeypatch.setitem(settings.auth.rules, f"{CACHE_ADMIN_PATH}/*", ["i_am_cache_admin_key"])
+    res = client.post(PURGE_URL, json={}, headers={"Authorization": "i_am_cache_admin_key"}).json()
+    assert res["status"] == 400
+
+
+def test_cache_stats_requires_auth_rule(client: TestClient):
+    res = client.get(f"{CACHE_ADMIN_PATH}/stats").json()
+    assert res["status"] == 403
+
+
+def test_cache_stats_and_metrics(client: TestClient, monkeypatch):
+    monkeypatch.setitem(settings.auth.rules, f"{CACHE_ADMIN_PATH}/*", ["i_am_cache_admin_key"])
+    stats = CacheStats()
+    stats.record_status("/api/v1/report", "HIT")
+
+    async def fake_stats_report():
+        return stats.report({"/api/v1/report": (1, 64)})
+
+    monkeypatch.setattr(request_cache, "stats_report", fake_stats_report)
+    headers = {"Authorization": "i_am_cache_admin_key"}
+
+    res = client.get(f"{CACHE_ADMIN_PATH}/stats", headers=headers).json()
+    assert res["status"] == 200
+    assert res["data"]["entries"] == 1
+    assert res["data"]["routes"]["/api/v1/report"]["statuses"]["HIT"] == 1
+
+    metrics = client.get(f"{CACHE_ADMIN_PATH}/metrics", headers=headers)
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'framex_request_cache_requests_total{route="/api/v1/report",status="HIT"} 1' in metrics.text
+    assert 'framex_request_cache_bytes{route="/api/v1/report"} 64' in metrics.text
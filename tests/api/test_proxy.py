@@ -54,6 +54,29 @@ def test_get_proxy_get(client: TestClient):
     assert res == {"method": "GET", "params": params}
 
 
+def test_get_proxy_stats(client: TestClient, monkeypatch):
+    from framex.config import settings
+
+    monkeypatch.setitem(settings.auth.rules, f"{API_STR}/proxy/stats", ["i_am_proxy_admin_key"])
+    client.get("/proxy/mock/get", params={"message": "hello world"})
+
+    assert client.get(f"{API_STR}/proxy/stats").json()["status"] == 401
+    res = client.get(f"{API_STR}/proxy/stats", headers={"Authorization": "i_am_proxy_admin_key"}).json()
+
+    assert res["status"] == 200
+    upstream = res["data"]["upstreams"]["http://localhost:9527"]
+    assert upstream["requests"] >= 2
+    assert upstream["in_flight"] == 0
+    discovery = res["data"]["discovery"]["http://localhost:9527"]
+    assert discovery["source"] == "network"
+    assert discovery["routes"] > 0
+    assert discovery["error"] is None
+
+
+def test_get_proxy_stats_requires_an_auth_rule(client: TestClient):
+    assert client.get(f"{API_STR}/proxy/stats").json()["status"] == 403
+
+
 def test_get_proxy_post(client: TestClient):
     params = {"message": "hello world"}
     res = client.post("/proxy/mock/post", params=params).json()
@@ -379,3 +402,32 @@ def test_call_proxy_func_with_error_api_key(client: TestClient):
     headers = {"Authorization": "i_am_error_keys"}
     res = client.post("/api/v1/proxy/remote", json=body, headers=headers).json()
     assert res["status"] == 401
+
+
+@pytest.mark.order(2)
+def test_call_proxy_func_batch(client: TestClient):
+    from framex.plugin.load import register_proxy_func
+
+    asyncio.run(register_proxy_func(local_exchange_key_value))
+    model = ExchangeModel(id="id_1", name=100, model=SubModel(id=1, name="sub_name"))
+    items = [
+        {
+            "func_name": cache_encode("tests.test_plugins.local_exchange_key_value"),
+            "data": cache_encode({"a_str": "test", "b_int": b_int, "c_model": model}),
+        }
+        for b_int in (1, 2)
+    ]
+    items.append({"func_name": cache_encode("tests.test_plugins.error_func"), "data": items[0]["data"]})
+
+    denied = client.post(
+        "/api/v1/proxy/remote/batch", json={"items": items}, headers={"Authorization": "i_am_error_keys"}
+    )
+    assert denied.json()["status"] == 401
+
+    headers = {"Authorization": "i_am_local_proxy_auth_keys"}
+    res = client.post("/api/v1/proxy/remote/batch", json={"items": items}, headers=headers).json()
+    assert res["status"] == 200
+    first, second, failed = res["data"]
+    assert [cache_decode(item["data"])["b_int"] for item in (first, second)] == [1, 2]
+    assert cache_decode(first["data"])["c_model"] == model
+    assert failed["status"] == 500
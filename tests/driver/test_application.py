@@ -14,7 +14,7 @@ from starlette.responses import StreamingResponse
 
 import framex.driver.application as application_module
 from framex.config import DocsActionButtonConfig, DocsActionButtonInputConfig, OauthConfig, settings
-from framex.consts import API_STR, AUTH_COOKIE_NAME
+from framex.consts import API_STR, AUTH_COOKIE_NAME, CACHE_ENCODED_STATE
 from framex.driver.application import create_fastapi_application
 from framex.driver.auth import create_auth_session, create_jwt
 
@@ -159,6 +159,22 @@ class TestLogResponseMiddleware:
         assert response.headers["x-custom-header"] == "custom"
         assert response.json()["data"] == {"result": "ok"}
 
+    def test_api_response_wraps_encoded_cache_body(self, app, client):
+        @app.get(f"{API_STR}/test-wrap-encoded")
+        async def endpoint(request: Request) -> Response:
+            setattr(request.state, CACHE_ENCODED_STATE, True)
+            return Response(content='{"result":"编码"}'.encode(), media_type="application/json")
+
+        response = client.get(f"{API_STR}/test-wrap-encoded")
+        data = response.json()
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert data["status"] == 200
+        assert data["message"] == "success"
+        assert data["data"] == {"result": "编码"}
+        assert response.content.endswith(',"data":{"result":"编码"}}'.encode())
+
     def test_stream_validation_error_returns_sse_error(self, app, client):
         @app.get(f"{API_STR}/test-stream-validation", response_class=StreamingResponse)
         async def endpoint(message: str) -> StreamingResponse:
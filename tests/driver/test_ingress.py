@@ -4,6 +4,7 @@ from unittest.mock import Mock, patch
 import pytest
 from fastapi import Response
 from fastapi.routing import APIRoute
+from starlette.requests import Request
 from starlette.routing import Route
 
 from framex.config import settings
@@ -160,7 +161,125 @@ def test_register_route_internal_params_avoid_business_param_conflicts(ingress,
     assert "framex_response" in signature.parameters
 
 
-def register_stream_endpoint(ingress, mock_app, adapter, auth_keys=None):
+def test_register_route_registers_cached_routes_for_warm_up(ingress, mock_app, monkeypatch):
+    from framex.driver.ingress import request_cache
+
+    handle = Mock()
+    handle.deployment_name = "demo.Deployment"
+    monkeypatch.setattr(request_cache, "_warmup_routes", {})
+
+    ingress.register_route("/cached", ["GET", "POST"], "cached", [("count", int)], handle, auth_keys=None, cache={})
+    ingress.register_route("/plain", ["GET"], "plain", [], handle, auth_keys=None)
+
+    assert set(request_cache._warmup_routes) == {("GET", "/cached"), ("POST", "/cached")}
+    assert request_cache._warmup_routes[("GET", "/cached")].params == {"count": int}
+
+
+@pytest.mark.asyncio
+async def test_register_route_returned_response_keeps_route_headers(ingress, mock_app):
+    handle = Mock()
+    handle.deployment_name = "demo.Deployment"
+    adapter = Mock()
+
+    async def acall(*_, **__):
+        return Response(content=b'{"raw":true}', status_code=404, media_type="application/json")
+
+    adapter._acall = acall
+    with patch("framex.driver.ingress.get_adapter", return_value=adapter):
+        ingress.register_route("/raw", ["GET"], "raw", [], handle, direct_output=True, auth_keys=None)
+    endpoint = mock_app.add_api_route.call_args.args[1]
+
+    response = await endpoint(framex_request=Request({"type": "http", "headers": []}), framex_response=Response())
+
+    assert response.status_code == 404
+    assert response.body == b'{"raw":true}'
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-length"] == "12"
+    assert response.headers["X-Raw-Output"] == "True"
+    assert response.headers["X-FrameX-Cache-Status"] == "BYPASS"
+
+
+@pytest.mark.asyncio
+async def test_register_route_passes_request_to_request_param(ingress, mock_app):
+    handle = Mock()
+    handle.deployment_name = "demo.Deployment"
+    adapter = Mock()
+    calls = []
+
+    async def acall(_, **kwargs):
+        calls.append(kwargs)
+        return "ok"
+
+    adapter._acall = acall
+    with patch("framex.driver.ingress.get_adapter", return_value=adapter):
+        ingress.register_route(
+            "/upload", ["POST"], "upload", [("name", str)], handle, auth_keys=None, request_param="raw_request"
+        )
+    endpoint = mock_app.add_api_route.call_args.args[1]
+    request = Mock()
+
+    assert await endpoint(framex_request=request, framex_response=Response(), name="demo") == "ok"
+    assert calls == [{"name": "demo", "raw_request": request}]
+
+
+@pytest.mark.asyncio
+async def test_register_route_reports_cache_status_set_by_the_handler(ingress, mock_app):
+    handle = Mock()
+    handle.deployment_name = "demo.Deployment"
+    adapter = Mock()
+
+    async def acall(_, **kwargs):
+        kwargs["raw_request"].state.framex_cache_status = "HIT"
+        return {"cached": True}
+
+    adapter._acall = acall
+    with patch("framex.driver.ingress.get_adapter", return_value=adapter):
+        ingress.register_route("/proxied", ["GET"], "proxied", [], handle, auth_keys=None, request_param="raw_request")
+    endpoint = mock_app.add_api_route.call_args.args[1]
+    response = Response()
+
+    assert await endpoint(framex_request=Request({"type": "http", "headers": []}), framex_response=response) == {
+        "cached": True
+    }
+    assert response.headers["X-FrameX-Cache-Status"] == "HIT"
+
+
+def test_unregister_route_removes_only_matching_routes(ingress, mock_app):
+    get_items = make_route("/items", {"GET"})
+    post_items = make_route("/items", {"POST"})
+    mock_app.router.routes = [get_items, post_items, make_route("/users", {"GET"})]
+    mock_app.openapi_schema = {"paths": {}}
+
+    with patch("framex.driver.ingress.request_cache") as cache:
+        assert ingress.unregister_route("/items", ["get"]) is True
+        assert ingress.unregister_route("/missing", ["GET"]) is False
+
+    assert [(route.path, route.methods) for route in mock_app.router.routes] == [
+        ("/items", {"POST"}),
+        ("/users", {"GET"}),
+    ]
+    cache.unregister_warmup.assert_called_once_with("/items", {"GET"})
+    assert mock_app.openapi_schema is None
+
+
+@pytest.mark.asyncio
+async def test_health_reports_unavailable_while_cache_warms_up(monkeypatch):
+    from fastapi import HTTPException
+
+    from framex.driver.ingress import health, request_cache
+
+    warming = asyncio.get_running_loop().create_future()
+    monkeypatch.setattr(request_cache, "_warmup_task", warming)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await health()
+    warming.set_result(0)
+
+    assert exc_info.value.status_code == 503
+    assert await health() == "ok"
+
+
+def register_stream_endpoint(ingress, mock_app, adapter, auth_keys=None, cache=None):
     handle = Mock()
     handle.deployment_name = "demo.Deployment"
     handle.stream = Mock()
@@ -177,6 +296,7 @@ def register_stream_endpoint(ingress, mock_app, adapter, auth_keys=None):
             handle,
             stream=True,
             auth_keys=auth_keys,
+            cache=cache,
         )
 
     assert registered is True
@@ -284,3 +404,35 @@ async def test_register_route_stream_converts_auth_error_to_sse_event(ingress, m
         'event: error\ndata: {"status": 401, "message": "Invalid API Key(None) for API(/stream)"}\n\n',
     ]
     adapter._stream_call.assert_not_called()
+
+
+async def test_register_route_stream_replays_cached_events(ingress, mock_app, monkeypatch):
+    from starlette.requests import Request
+
+    from framex.consts import CACHE_STATUS_HEADER
+    from framex.driver.cache import RequestCache
+
+    cache = RequestCache()
+    monkeypatch.setattr("framex.driver.ingress.request_cache", cache)
+    monkeypatch.setattr(settings.cache, "enabled", True)
+    monkeypatch.setattr(settings.cache, "mode", "memory")
+
+    async def upstream(*_, **__):
+        yield "event: message\ndata: {}\n\n"
+
+    adapter = Mock()
+    adapter._stream_call.side_effect = upstream
+    endpoint = register_stream_endpoint(ingress, mock_app, adapter, cache={"replay_pacing": False})
+
+    responses = []
+    for _ in range(2):
+        request = Request({"type": "http", "method": "GET", "path": "/stream", "headers": []})
+        response = await endpoint(framex_request=request, framex_response=Response())
+        assert [chunk async for chunk in response.body_iterator] == ["event: message\ndata: {}\n\n"]
+        await asyncio.gather(*(recording.task for recording in cache._recordings.values() if recording.task))
+        responses.append(response)
+
+    assert [response.headers[CACHE_STATUS_HEADER] for response in responses] == ["MISS", "HIT"]
+    assert responses[0].raw_headers[0][0] == b"content-type"
+    assert adapter._stream_call.call_count == 1
+    await cache.clear()
@@ -1,5 +1,9 @@
+import asyncio
+import gzip
 import hashlib
 import json
+import sqlite3
+from contextlib import closing
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -8,9 +12,25 @@ from pydantic import BaseModel
 from starlette.requests import Request
 from starlette.responses import Response
 
-from framex.config import settings
-from framex.consts import CACHE_KEY_HEADER, CACHE_REQUEST_HEADER, CACHE_STATUS_HEADER
-from framex.driver.cache import RequestCache
+from framex.config import CacheWarmupConfig, settings
+from framex.consts import (
+    CACHE_ENCODED_STATE,
+    CACHE_KEY_HEADER,
+    CACHE_REQUEST_HEADER,
+    CACHE_STATUS_HEADER,
+    CACHE_TIER_HEADER,
+)
+from framex.driver import cache as cache_module
+from framex.driver.cache import RequestCache, normalize_cache_config
+from framex.driver.cache_backends import (
+    REQUEST_CACHE_TIMEZONE,
+    CacheEntryMetadata,
+    FileCacheBackend,
+    FrequencySketch,
+    MemoryCacheBackend,
+    RemoteCacheBackend,
+)
+from framex.driver.cache_stats import CacheStats, render_prometheus
 
 
 class CacheTestModel(BaseModel):
@@ -100,7 +120,7 @@ async def test_memory_cache_hits_same_request(cache):
     assert first_response.headers[CACHE_STATUS_HEADER] == "MISS"
     assert second_response.headers[CACHE_STATUS_HEADER] == "HIT"
     assert second_response.headers[CACHE_KEY_HEADER]
-    assert cache.metadata()[second_response.headers[CACHE_KEY_HEADER]].request_body == {"message": "a"}
+    assert (await cache.metadata())[second_response.headers[CACHE_KEY_HEADER]].request_body == {"message": "a"}
 
 
 @pytest.mark.asyncio
@@ -159,7 +179,7 @@ async def test_ttl_minus_one_never_expires(cache, monkeypatch):
         invoke=invoke,
     )
 
-    metadata = cache.metadata()[response.headers[CACHE_KEY_HEADER]]
+    metadata = (await cache.metadata())[response.headers[CACHE_KEY_HEADER]]
     assert result == {"calls": 1}
     assert response.headers[CACHE_STATUS_HEADER] == "HIT"
     assert metadata.ttl == -1
@@ -274,7 +294,7 @@ async def test_custom_key_builder_receives_context(cache):
     assert result == {"result": "ok"}
     assert response.headers[CACHE_STATUS_HEADER] == "HIT"
     assert response.headers[CACHE_KEY_HEADER] == store_key
-    assert cache.metadata()[store_key].key == "/api/v1/cache-test"
+    assert (await cache.metadata())[store_key].key == "/api/v1/cache-test"
 
 
 @pytest.mark.asyncio
@@ -314,7 +334,7 @@ async def test_custom_key_builder_receives_request_kwargs(cache):
     assert seen_keys == [[], [key]]
     assert first_response.headers[CACHE_KEY_HEADER] == store_key
     assert second_response.headers[CACHE_STATUS_HEADER] == "HIT"
-    assert cache.metadata()[store_key].key == key
+    assert (await cache.metadata())[store_key].key == key
 
 
 @pytest.mark.asyncio
@@ -343,7 +363,7 @@ async def test_file_cache_can_be_modified(cache, monkeypatch, tmp_path):
     expires_at = datetime.fromisoformat(payload["metadata"]["expires_at"])
     assert created_at.utcoffset() == timedelta(hours=8)
     assert expires_at.utcoffset() == timedelta(hours=8)
-    assert isinstance(cache.metadata()[hashlib.sha256(b"editable").hexdigest()].created_at, datetime)
+    assert isinstance((await cache.metadata())[hashlib.sha256(b"editable").hexdigest()].created_at, datetime)
     cache_file.write_text(raw_payload.replace("original", "edited"), encoding="utf-8")
 
     response = Response()
@@ -419,5 +439,1409 @@ async def test_max_size_removes_oldest_entry(cache, monkeypatch):
         invoke=invoke,
     )
 
-    assert len(cache.metadata()) == 1
-    assert next(iter(cache.metadata().values())).path == "/second"
+    assert len(await cache.metadata()) == 1
+    assert next(iter((await cache.metadata()).values())).path == "/second"
+
+
+def _expire_memory_entry(cache: RequestCache, store_key: str, seconds_ago: int = 1) -> None:
+    metadata = cache.backend._metadata[store_key]  # type: ignore[attr-defined]
+    expires_at = datetime.now(metadata.created_at.tzinfo) - timedelta(seconds=seconds_ago)
+    expired = CacheEntryMetadata.model_validate({**metadata.model_dump(), "expires_at": expires_at})
+    cache.backend._put_metadata(store_key, expired)  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_single_refresh_runs(cache):
+    calls = 0
+
+    async def invoke() -> dict[str, int]:
+        nonlocal calls
+        calls += 1
+        return {"calls": calls}
+
+    cache_config = normalize_cache_config({"ttl": 60, "stale_ttl": 30})
+    first_response = Response()
+    await cache.call(
+        request=_request(),
+        response=first_response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+    store_key = first_response.headers[CACHE_KEY_HEADER]
+    _expire_memory_entry(cache, store_key)
+
+    stale_responses = [Response(), Response()]
+    stale_results = [
+        await cache.call(
+            request=_request(),
+            response=stale_response,
+            path="/api/v1/cache-test",
+            cache_config=cache_config,
+            request_kwargs={},
+            invoke=invoke,
+        )
+        for stale_response in stale_responses
+    ]
+    await asyncio.gather(*cache._refresh_tasks.values())
+
+    fresh_response = Response()
+    fresh = await cache.call(
+        request=_request(),
+        response=fresh_response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert stale_results == [{"calls": 1}, {"calls": 1}]
+    assert [response.headers[CACHE_STATUS_HEADER] for response in stale_responses] == ["STALE", "STALE"]
+    assert calls == 2
+    assert fresh == {"calls": 2}
+    assert fresh_response.headers[CACHE_STATUS_HEADER] == "HIT"
+
+
+@pytest.mark.asyncio
+async def test_stale_if_error_serves_stale_value_on_backend_failure(cache):
+    fail = False
+
+    async def invoke() -> dict[str, str]:
+        if fail:
+            raise RuntimeError("backend down")
+        return {"result": "ok"}
+
+    cache_config = normalize_cache_config({"ttl": 60, "stale_if_error": 300})
+    first_response = Response()
+    await cache.call(
+        request=_request(),
+        response=first_response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+    _expire_memory_entry(cache, first_response.headers[CACHE_KEY_HEADER])
+    fail = True
+
+    response = Response()
+    result = await cache.call(
+        request=_request(),
+        response=response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert result == {"result": "ok"}
+    assert response.headers[CACHE_STATUS_HEADER] == "STALE"
+
+    _expire_memory_entry(cache, first_response.headers[CACHE_KEY_HEADER], seconds_ago=301)
+    with pytest.raises(RuntimeError, match="backend down"):
+        await cache.call(
+            request=_request(),
+            response=Response(),
+            path="/api/v1/cache-test",
+            cache_config=cache_config,
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+
+@pytest.mark.asyncio
+async def test_stale_if_error_covers_backend_timeout(cache):
+    slow = False
+
+    async def invoke() -> dict[str, str]:
+        if slow:
+            await asyncio.sleep(1)
+        return {"result": "ok"}
+
+    cache_config = normalize_cache_config({"ttl": 60, "stale_if_error": 300, "timeout": 0.01})
+    first_response = Response()
+    await cache.call(
+        request=_request(),
+        response=first_response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+    _expire_memory_entry(cache, first_response.headers[CACHE_KEY_HEADER])
+    slow = True
+
+    response = Response()
+    result = await cache.call(
+        request=_request(),
+        response=response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert result == {"result": "ok"}
+    assert response.headers[CACHE_STATUS_HEADER] == "STALE"
+
+
+@pytest.mark.asyncio
+async def test_cache_timeout_does_not_cut_short_calls_without_fallback(cache):
+    async def invoke() -> dict[str, str]:
+        await asyncio.sleep(0.05)
+        return {"result": "ok"}
+
+    cache_config = normalize_cache_config({"ttl": 60, "stale_if_error": 300, "timeout": 0.01})
+    first_response = Response()
+    first = await cache.call(
+        request=_request(),
+        response=first_response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+    _expire_memory_entry(cache, first_response.headers[CACHE_KEY_HEADER], seconds_ago=301)
+
+    response = Response()
+    result = await cache.call(
+        request=_request(),
+        response=response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert first == result == {"result": "ok"}
+    assert first_response.headers[CACHE_STATUS_HEADER] == response.headers[CACHE_STATUS_HEADER] == "MISS"
+
+
+@pytest.mark.parametrize(
+    "cache_config",
+    [{"stale_ttl": -1}, {"stale_if_error": True}, {"timeout": 0}, {"timeout": "1"}],
+)
+def test_normalize_cache_config_rejects_invalid_stale_options(cache_config):
+    with pytest.raises(ValueError, match="cache"):
+        normalize_cache_config(cache_config)
+
+
+@pytest.mark.asyncio
+async def test_serialized_cache_serves_encoded_body(cache):
+    calls = 0
+
+    async def invoke() -> list[CacheTestModel]:
+        nonlocal calls
+        calls += 1
+        return [CacheTestModel(message="你好")]
+
+    cache_config = normalize_cache_config({"serialize": True})
+    miss_request = _request()
+    miss = await cache.call(
+        request=miss_request,
+        response=Response(),
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+    hit_request = _request()
+    hit_response = Response()
+    hit = await cache.call(
+        request=hit_request,
+        response=hit_response,
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert calls == 1
+    assert isinstance(hit, Response)
+    assert miss.body == hit.body == '[{"message":"你好"}]'.encode()
+    assert hit.media_type == "application/json"
+    assert hit.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert hit.headers[CACHE_KEY_HEADER] == hit_response.headers[CACHE_KEY_HEADER]
+    assert getattr(hit_request.state, CACHE_ENCODED_STATE) is True
+
+
+@pytest.mark.asyncio
+async def test_serialized_file_cache_stores_body_text(cache, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings.cache, "mode", "file")
+
+    async def invoke() -> dict[str, str]:
+        return {"result": "original"}
+
+    cache_config = normalize_cache_config({"serialize": True, "key_builder": lambda _request, _context: "body"})
+    await cache.call(
+        request=_request(),
+        response=Response(),
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+    payload = json.loads(next(tmp_path.glob("*.json")).read_text(encoding="utf-8"))
+    hit = await cache.call(
+        request=_request(),
+        response=Response(),
+        path="/api/v1/cache-test",
+        cache_config=cache_config,
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert payload["body"] == '{"result":"original"}'
+    assert payload["metadata"]["content_type"] == "application/json"
+    assert hit.body == b'{"result":"original"}'
+    assert hit.headers[CACHE_STATUS_HEADER] == "HIT"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("raw_output", "accept_encoding", "gzipped"),
+    [("True", "gzip, deflate", True), ("True", "identity", False), ("False", "gzip", False)],
+)
+async def test_precompressed_cache_body_respects_client_and_envelope(cache, raw_output, accept_encoding, gzipped):
+    async def invoke() -> dict[str, str]:
+        return {"result": "ok" * 100}
+
+    cache_config = normalize_cache_config({"serialize": True, "precompress": True})
+    for _ in range(2):
+        response = Response()
+        response.headers["X-Raw-Output"] = raw_output
+        result = await cache.call(
+            request=_request(headers={"Accept-Encoding": accept_encoding}),
+            response=response,
+            path="/api/v1/cache-test",
+            cache_config=cache_config,
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    body = gzip.decompress(result.body) if gzipped else result.body
+    assert json.loads(body) == {"result": "ok" * 100}
+    assert result.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert ("content-encoding" in result.headers) is gzipped
+
+
+@pytest.mark.parametrize(
+    ("cache_config", "error"),
+    [({"serialize": "yes"}, TypeError), ({"precompress": True}, ValueError)],
+)
+def test_normalize_cache_config_rejects_invalid_serialize_options(cache_config, error):
+    with pytest.raises(error):
+        normalize_cache_config(cache_config)
+
+
+@pytest.mark.asyncio
+async def test_max_bytes_evicts_oldest_entries_by_size(cache, monkeypatch):
+    monkeypatch.setattr(settings.cache, "max_bytes", 300)
+
+    async def invoke() -> str:
+        return "x" * 100
+
+    for path in ("/first", "/second", "/third"):
+        await cache.call(
+            request=_request(path=path),
+            response=Response(),
+            path=path,
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    metadata = await cache.metadata()
+    assert [entry.path for entry in metadata.values()] == ["/second", "/third"]
+    assert all(100 < entry.size <= 150 for entry in metadata.values())
+    assert cache.backend._total_bytes == sum(entry.size for entry in metadata.values())  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_max_entry_bytes_skips_large_values(cache):
+    calls = 0
+
+    async def invoke() -> str:
+        nonlocal calls
+        calls += 1
+        return "x" * 1024
+
+    cache_config = normalize_cache_config({"max_entry_bytes": 512})
+    responses = [Response(), Response()]
+    for response in responses:
+        await cache.call(
+            request=_request(),
+            response=response,
+            path="/api/v1/cache-test",
+            cache_config=cache_config,
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    assert calls == 2
+    assert [response.headers[CACHE_STATUS_HEADER] for response in responses] == ["MISS", "MISS"]
+    assert await cache.metadata() == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["memory", "file"])
+async def test_values_above_threshold_are_compressed(cache, monkeypatch, tmp_path, mode):
+    monkeypatch.setattr(settings.cache, "mode", mode)
+    monkeypatch.setattr(settings.cache, "compress_threshold", 64)
+    monkeypatch.setattr(settings.cache, "compression", "zlib")
+
+    async def invoke() -> dict[str, str]:
+        return {"message": "compress me " * 100}
+
+    first_response = Response()
+    await cache.call(
+        request=_request(),
+        response=first_response,
+        path="/api/v1/cache-test",
+        cache_config={},
+        request_kwargs={},
+        invoke=invoke,
+    )
+    response = Response()
+    result = await cache.call(
+        request=_request(),
+        response=response,
+        path="/api/v1/cache-test",
+        cache_config={},
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    metadata = (await cache.metadata())[response.headers[CACHE_KEY_HEADER]]
+    assert result == {"message": "compress me " * 100}
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert metadata.compression == "zlib"
+    assert metadata.size < len("compress me " * 100)
+    if mode == "file":
+        assert "blob" in json.loads(next(tmp_path.glob("*.json")).read_text(encoding="utf-8"))
+
+
+@pytest.mark.asyncio
+async def test_memory_compression_preserves_pydantic_value(cache, monkeypatch):
+    monkeypatch.setattr(settings.cache, "compress_threshold", 0)
+    monkeypatch.setattr(settings.cache, "compression", "zlib")
+
+    async def invoke() -> list[CacheTestModel]:
+        return [CacheTestModel(message="ok")]
+
+    for _ in range(2):
+        result = await cache.call(
+            request=_request(),
+            response=Response(),
+            path="/api/v1/cache-test",
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    assert result == [CacheTestModel(message="ok")]
+
+
+class _RespStandIn:
+    """In-process stand-in for the subset of the Redis protocol used by the remote backend."""
+
+    def __init__(self) -> None:
+        self.strings: dict[bytes, tuple[bytes, float | None]] = {}
+        self.hashes: dict[bytes, dict[bytes, bytes]] = {}
+        self.zsets: dict[bytes, dict[bytes, float]] = {}
+        self.sets: dict[bytes, set[bytes]] = {}
+        self.commands: list[bytes] = []
+        # Bumped on every write to a key, so EXEC can tell whether a watched key changed.
+        self.versions: dict[bytes, int] = {}
+        self.aborted = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        queued: list[list[bytes]] | None = None
+        watched: dict[bytes, int] = {}
+        try:
+            while True:
+                count = int((await reader.readuntil(b"\r\n"))[1:-2])
+                args = []
+                for _ in range(count):
+                    length = int((await reader.readuntil(b"\r\n"))[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                name = args[0].upper()
+                self.commands.append(name)
+                reply: Any
+                if name == b"WATCH":
+                    watched.update({key: self.versions.get(key, 0) for key in args[1:]})
+                    reply = "OK"
+                elif name == b"MULTI":
+                    queued, reply = [], "OK"
+                elif name == b"EXEC":
+                    changed = any(self.versions.get(key, 0) != version for key, version in watched.items())
+                    reply = None if changed else [self.run(command) for command in queued or []]
+                    self.aborted += changed
+                    queued, watched = None, {}
+                elif queued is not None:
+                    queued.append(args)
+                    reply = "QUEUED"
+                else:
+                    reply = self.run(args)
+                writer.write(_resp_encode(reply))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    def run(self, args: list[bytes]) -> Any:
+        name, key, rest = args[0].upper(), args[1] if len(args) > 1 else b"", args[2:]
+        now = datetime.now().timestamp()
+        if name in {b"PING", b"SELECT", b"AUTH"}:
+            return "OK"
+        if name in {b"GET", b"MGET"}:
+            values = [self.strings.get(k, (None, None)) for k in args[1:]]
+            replies = [None if expires is not None and expires <= now else value for value, expires in values]
+            return replies[0] if name == b"GET" else replies
+        if name in {b"SET", b"INCRBY", b"DECRBY", b"HSET", b"HDEL", b"SADD", b"SREM", b"ZADD", b"ZREM"}:
+            self.versions[key] = self.versions.get(key, 0) + 1
+        if name == b"SET":
+            ttl = int(rest[2]) / 1000 if len(rest) > 2 and rest[1].upper() == b"PX" else None
+            self.strings[key] = (rest[0], None if ttl is None else now + ttl)
+            return "OK"
+        if name in {b"INCRBY", b"DECRBY"}:
+            value, expires = self.strings.get(key, (b"0", None))
+            total = int(value) + int(rest[0]) * (1 if name == b"INCRBY" else -1)
+            self.strings[key] = (str(total).encode(), expires)
+            return total
+        if name == b"DEL":
+            for k in args[1:]:
+                if any(k in store for store in (self.strings, self.hashes, self.zsets, self.sets)):
+                    self.versions[k] = self.versions.get(k, 0) + 1
+            return sum(
+                any(store.pop(k, None) is not None for store in (self.strings, self.hashes, self.zsets, self.sets))
+                for k in args[1:]
+            )
+        if name.startswith(b"H"):
+            table = self.hashes.setdefault(key, {})
+            if name == b"HSET":
+                table[rest[0]] = rest[1]
+                return 1
+            if name == b"HGET":
+                return table.get(rest[0])
+            if name == b"HDEL":
+                return sum(table.pop(field, None) is not None for field in rest)
+            if name == b"HMGET":
+                return [table.get(field) for field in rest]
+            return list(table.values() if name == b"HVALS" else table.keys())
+        if name.startswith(b"S"):
+            members = self.sets.setdefault(key, set())
+            if name == b"SADD":
+                members.update(rest)
+                return len(rest)
+            if name == b"SREM":
+                removed = members & set(rest)
+                members.difference_update(rest)
+                return len(removed)
+            return list(members.union(*(self.sets.get(other, set()) for other in rest)))
+        zset = self.zsets.setdefault(key, {})
+        ordered = sorted(zset, key=lambda member: zset[member])
+        if name == b"ZADD":
+            zset[rest[1]] = float(rest[0])
+            return 1
+        if name == b"ZREM":
+            return sum(zset.pop(member, None) is not None for member in rest)
+        if name == b"ZCARD":
+            return len(zset)
+        if name == b"ZRANGE":
+            return ordered[int(rest[0]) : int(rest[1]) + 1]
+        if name == b"ZRANGEBYSCORE":
+            return [member for member in ordered if float(rest[0]) <= zset[member] <= float(rest[1])]
+        return RuntimeError(f"unknown command {name!r}")
+
+
+def _resp_encode(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, RuntimeError):
+        return f"-ERR {reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%b\r\n" % (len(reply), reply)
+    return f"*{len(reply)}\r\n".encode() + b"".join(_resp_encode(item) for item in reply)
+
+
+@pytest.fixture
+async def resp_server():
+    stand_in = _RespStandIn()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield stand_in, f"redis://127.0.0.1:{port}/1"
+    server.close()
+
+
+@pytest.fixture(params=["sqlite", "remote"])
+async def shared_mode(request, monkeypatch, tmp_path, resp_server):
+    _stand_in, url = resp_server
+    monkeypatch.setattr(settings.cache, "mode", request.param)
+    monkeypatch.setattr(settings.cache, "sqlite_path", str(tmp_path / "request_cache.db"))
+    monkeypatch.setattr(settings.cache, "remote_url", url)
+    return request.param
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_visible_to_other_workers(cache, shared_mode):
+    calls = 0
+
+    async def invoke() -> dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        return {"model": CacheTestModel(message="shared"), "calls": calls}
+
+    other_worker = RequestCache()
+    responses = [Response(), Response()]
+    results = [
+        await worker.call(
+            request=_request(),
+            response=response,
+            path="/api/v1/cache-test",
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+        for worker, response in zip((cache, other_worker), responses, strict=True)
+    ]
+    await other_worker.close()
+
+    assert calls == 1
+    assert results[1] == {"model": {"message": "shared"}, "calls": 1}
+    assert [response.headers[CACHE_STATUS_HEADER] for response in responses] == ["MISS", "HIT"]
+    metadata = (await cache.metadata())[responses[0].headers[CACHE_KEY_HEADER]]
+    assert metadata.store == shared_mode
+    assert metadata.size > 0
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_serves_serialized_bodies_and_evicts_oldest(cache, shared_mode, monkeypatch):
+    monkeypatch.setattr(settings.cache, "max_size", 1)
+
+    async def invoke() -> dict[str, str]:
+        return {"result": "编码"}
+
+    cache_config = normalize_cache_config({"serialize": True})
+    for path in ("/first", "/second", "/second"):
+        response = Response()
+        result = await cache.call(
+            request=_request(path=path),
+            response=response,
+            path=path,
+            cache_config=cache_config,
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert result.body == '{"result":"编码"}'.encode()
+    assert [metadata.path for metadata in (await cache.metadata()).values()] == ["/second"]
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_enforces_byte_budget_from_counters(cache, shared_mode, monkeypatch, resp_server):
+    stand_in, _url = resp_server
+    monkeypatch.setattr(settings.cache, "max_bytes", 300)
+
+    async def invoke() -> str:
+        return "x" * 100
+
+    for path in ("/first", "/second", "/third", "/third"):
+        await cache.call(
+            request=_request(path=path),
+            response=Response(),
+            path=path,
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    assert b"HVALS" not in stand_in.commands
+    metadata = await cache.metadata()
+    assert sorted(entry.path for entry in metadata.values()) == ["/second", "/third"]
+    if shared_mode == "remote":
+        total, _expires = stand_in.strings[b"framex-request-cache:bytes"]
+        usage = (len(stand_in.hashes[b"framex-request-cache:meta"]), int(total))
+    else:
+        with closing(sqlite3.connect(settings.cache.sqlite_path)) as db:
+            usage = db.execute("SELECT entries, bytes FROM request_cache_usage").fetchone()
+    assert usage == (2, sum(entry.size for entry in metadata.values()))
+
+
+@pytest.mark.asyncio
+async def test_remote_cache_counts_concurrent_writes_once(monkeypatch, resp_server):
+    stand_in, url = resp_server
+    monkeypatch.setattr(settings.cache, "mode", "remote")
+    monkeypatch.setattr(settings.cache, "remote_url", url)
+    workers = [RemoteCacheBackend(), RemoteCacheBackend()]
+    created_at = datetime.now(REQUEST_CACHE_TIMEZONE)
+    metadata = CacheEntryMetadata(
+        key="GET /shared",
+        store_key="shared",
+        store="remote",
+        created_at=created_at,
+        expires_at=created_at + timedelta(seconds=60),
+        ttl=60,
+        path="/shared",
+        method="GET",
+        size=102,
+    )
+
+    def counter() -> int:
+        return int(stand_in.strings[b"framex-request-cache:bytes"][0])
+
+    try:
+        # Two workers writing, then cleaning up, the same entry must move the counter once each way.
+        await asyncio.gather(*(worker.set("shared", "x" * 100, metadata) for worker in workers))
+        assert counter() == 102
+        await asyncio.gather(*(worker.delete(["shared"]) for worker in workers))
+        assert counter() == 0
+        # Each race made one worker retry with fresh sizes.
+        assert stand_in.aborted == 2
+    finally:
+        for worker in workers:
+            await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_cache_uses_pipelined_transactions(cache, monkeypatch, resp_server):
+    stand_in, url = resp_server
+    monkeypatch.setattr(settings.cache, "mode", "remote")
+    monkeypatch.setattr(settings.cache, "remote_url", url)
+
+    async def invoke() -> str:
+        return "ok"
+
+    await cache.call(
+        request=_request(),
+        response=Response(),
+        path="/api/v1/cache-test",
+        cache_config={},
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert stand_in.commands[0] == b"SELECT"
+    assert stand_in.commands.count(b"MULTI") == stand_in.commands.count(b"EXEC") == 1
+    assert any(key.startswith(b"framex-request-cache:value:") for key in stand_in.strings)
+
+
+@pytest.mark.asyncio
+async def test_unreachable_remote_cache_bypasses(cache, monkeypatch, unused_tcp_port):
+    monkeypatch.setattr(settings.cache, "mode", "remote")
+    monkeypatch.setattr(settings.cache, "remote_url", f"redis://127.0.0.1:{unused_tcp_port}")
+
+    async def invoke() -> str:
+        return "ok"
+
+    response = Response()
+    # A dedicated instance, so fixture teardown does not try to clear the unreachable store.
+    result = await RequestCache().call(
+        request=_request(),
+        response=response,
+        path="/api/v1/cache-test",
+        cache_config={},
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert result == "ok"
+    assert response.headers[CACHE_STATUS_HEADER] == "BYPASS"
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_promotes_l2_hits_into_l1(cache, monkeypatch):
+    monkeypatch.setattr(settings.cache, "mode", "tiered")
+    calls = 0
+
+    async def invoke() -> dict[str, int]:
+        nonlocal calls
+        calls += 1
+        return {"calls": calls}
+
+    restarted = RequestCache()
+    responses = [Response() for _ in range(4)]
+    for worker, response in zip((cache, cache, restarted, restarted), responses, strict=True):
+        result = await worker.call(
+            request=_request(),
+            response=response,
+            path="/api/v1/cache-test",
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    assert calls == 1
+    assert result == {"calls": 1}
+    assert [response.headers[CACHE_STATUS_HEADER] for response in responses] == ["MISS", "HIT", "HIT", "HIT"]
+    assert [response.headers.get(CACHE_TIER_HEADER) for response in responses] == [None, "L1", "L2", "L1"]
+    assert next(iter((await cache.metadata()).values())).store == "tiered"
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_l1_is_bounded_lru(cache, monkeypatch):
+    monkeypatch.setattr(settings.cache, "mode", "tiered")
+    monkeypatch.setattr(settings.cache, "l1_max_size", 1)
+
+    async def invoke() -> str:
+        return "ok"
+
+    tiers = []
+    for path in ("/first", "/second", "/first", "/first"):
+        response = Response()
+        await cache.call(
+            request=_request(path=path),
+            response=response,
+            path=path,
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+        tiers.append(response.headers.get(CACHE_TIER_HEADER))
+
+    assert tiers == [None, None, "L2", "L1"]
+
+
+@pytest.mark.asyncio
+async def test_memory_snapshot_restores_live_entries(cache, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings.cache, "snapshot_path", str(tmp_path / "snapshot.bin"))
+    calls = 0
+
+    async def invoke() -> CacheTestModel:
+        nonlocal calls
+        calls += 1
+        return CacheTestModel(message=f"call {calls}")
+
+    live, expired = Response(), Response()
+    for path, response in (("/live", live), ("/expired", expired)):
+        await cache.call(
+            request=_request(path=path),
+            response=response,
+            path=path,
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+    _expire_memory_entry(cache, expired.headers[CACHE_KEY_HEADER])
+
+    assert await cache.snapshot() == 1
+    restarted = RequestCache()
+    assert await restarted.restore() == 1
+    response = Response()
+    result = await restarted.call(
+        request=_request(path="/live"),
+        response=response,
+        path="/live",
+        cache_config={},
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    assert calls == 2
+    assert result == CacheTestModel(message="call 1")
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert list(await restarted.metadata()) == [live.headers[CACHE_KEY_HEADER]]
+
+
+@pytest.mark.asyncio
+async def test_restore_ignores_unreadable_snapshot(cache, monkeypatch, tmp_path):
+    snapshot_path = tmp_path / "snapshot.bin"
+    snapshot_path.write_bytes(b"not a snapshot")
+    monkeypatch.setattr(settings.cache, "snapshot_path", str(snapshot_path))
+
+    assert await cache.restore() == 0
+    assert await cache.metadata() == {}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_prefetches_configured_requests_after_startup(cache, monkeypatch):
+    calls: list[CacheTestModel] = []
+
+    async def invoke(request_kwargs: dict[str, Any]) -> str:
+        body: CacheTestModel = request_kwargs["body"]
+        calls.append(body)
+        return body.message
+
+    monkeypatch.setattr(
+        settings.cache,
+        "warmup",
+        [
+            CacheWarmupConfig(path="/echo", method="POST", requests=[{"body": {"message": "a"}}, {"body": {}}]),
+            CacheWarmupConfig(path="/missing"),
+        ],
+    )
+    cache.register_warmup("/echo", ["POST"], {}, [("body", CacheTestModel)], invoke)
+    started = asyncio.get_running_loop().create_future()
+
+    task = cache.start_warm_up([started])
+    await asyncio.sleep(0)
+    assert cache.ready is False
+    assert calls == []
+    started.set_result(None)
+    assert await task == 1
+    assert cache.ready is True
+
+    response = Response()
+    result = await cache.call(
+        request=_request(method="POST", path="/echo"),
+        response=response,
+        path="/echo",
+        cache_config={},
+        request_kwargs={"body": CacheTestModel(message="a")},
+        invoke=lambda: invoke({"body": CacheTestModel(message="b")}),
+    )
+
+    assert calls == [CacheTestModel(message="a")]
+    assert result == "a"
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+
+
+def test_warm_up_is_not_started_without_configured_requests(cache):
+    assert cache.start_warm_up() is None
+    assert cache.ready is True
+
+
+@pytest.fixture(params=["memory", "file", "sqlite", "remote", "tiered"])
+async def any_mode(request, monkeypatch, tmp_path, resp_server):
+    _stand_in, url = resp_server
+    monkeypatch.setattr(settings.cache, "mode", request.param)
+    monkeypatch.setattr(settings.cache, "sqlite_path", str(tmp_path / "request_cache.db"))
+    monkeypatch.setattr(settings.cache, "remote_url", url)
+    return request.param
+
+
+@pytest.mark.asyncio
+async def test_purge_by_tag_prefix_and_key(cache, any_mode):
+    def key_builder(request: Request, context: Any, request_kwargs: dict[str, Any]) -> str:
+        context.add_tags(f"user:{request_kwargs['user']}")
+        return f"{request.url.path}:{request_kwargs['project']}:{request_kwargs['user']}"
+
+    async def invoke() -> str:
+        return "ok"
+
+    cache_config = normalize_cache_config({"tags": ["reports", "project:{project}"], "key_builder": key_builder})
+    store_keys: dict[str, str] = {}
+    for path, project, user in [
+        ("/reports/daily", "a", "ann"),
+        ("/reports/daily", "b", "bob"),
+        ("/reports/weekly", "b", "ann"),
+        ("/status", "c", "cid"),
+    ]:
+        response = Response()
+        await cache.call(
+            request=_request(path=path),
+            response=response,
+            path=path,
+            cache_config=cache_config,
+            request_kwargs={"project": project, "user": user},
+            invoke=invoke,
+        )
+        store_keys[f"{path}:{project}"] = response.headers[CACHE_KEY_HEADER]
+
+    metadata = await cache.metadata()
+    assert metadata[store_keys["/reports/daily:a"]].tags == ["project:a", "reports", "user:ann"]
+
+    assert await cache.purge(tags=["project:a", "missing"]) == [store_keys["/reports/daily:a"]]
+    assert await cache.purge(tags=["user:ann"]) == [store_keys["/reports/weekly:b"]]
+    assert await cache.purge(path_prefix="/reports/") == [store_keys["/reports/daily:b"]]
+    assert await cache.purge(store_keys=[store_keys["/status:c"], "unknown"]) == [store_keys["/status:c"]]
+    assert await cache.metadata() == {}
+
+
+@pytest.mark.asyncio
+async def test_file_purge_opens_only_indexed_entries(cache, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings.cache, "mode", "file")
+
+    async def invoke() -> str:
+        return "ok"
+
+    store_keys = {}
+    for path in ("/a", "/b"):
+        response = Response()
+        await cache.call(
+            request=_request(path=path),
+            response=response,
+            path=path,
+            cache_config=normalize_cache_config({"tags": [path.strip("/")]}),
+            request_kwargs={},
+            invoke=invoke,
+        )
+        store_keys[path] = response.headers[CACHE_KEY_HEADER]
+    backend = cache.backend
+    assert isinstance(backend, FileCacheBackend)
+    opened: list[str] = []
+    read_metadata = backend._read_metadata
+
+    def spy(path: Any) -> CacheEntryMetadata | None:
+        opened.append(path.stem)
+        return read_metadata(path)
+
+    monkeypatch.setattr(backend, "_read_metadata", spy)
+
+    assert await cache.purge(tags=["a"]) == [store_keys["/a"]]
+    assert opened == [store_keys["/a"]]
+    assert not (tmp_path / "index" / "tag" / "a").exists()
+    assert (tmp_path / "index" / "tag" / "b" / store_keys["/b"]).exists()
+
+
+@pytest.mark.asyncio
+async def test_purge_requires_a_selector(cache):
+    with pytest.raises(ValueError, match="requires at least one"):
+        await cache.purge()
+
+
+@pytest.mark.parametrize("tags", ["reports", ["reports", ""], [1]])
+def test_normalize_cache_config_rejects_invalid_tags(tags):
+    with pytest.raises((TypeError, ValueError)):
+        normalize_cache_config({"tags": tags})
+
+
+@pytest.mark.asyncio
+async def test_key_builder_signature_is_inspected_once(cache, monkeypatch):
+    def build_key(request: Request, context: Any, *, request_kwargs: dict[str, Any]) -> str:
+        return f"{request.url.path}:{request_kwargs['id']}"
+
+    cache_config = normalize_cache_config({"key_builder": build_key})
+    inspected: list[Any] = []
+    monkeypatch.setattr(cache_module.inspect, "signature", lambda func: inspected.append(func))
+
+    async def invoke() -> dict[str, str]:
+        return {"result": "ok"}
+
+    for _ in range(2):
+        response = Response()
+        await cache.call(
+            request=_request(),
+            response=response,
+            path="/api/v1/cache-test",
+            cache_config=cache_config,
+            request_kwargs={"id": "1"},
+            invoke=invoke,
+        )
+
+    assert inspected == []
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert response.headers[CACHE_KEY_HEADER] == hashlib.sha256(b"/api/v1/cache-test:1").hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_vary_on_keys_only_selected_fields(cache):
+    calls = 0
+
+    async def invoke() -> dict[str, int]:
+        nonlocal calls
+        calls += 1
+        return {"calls": calls}
+
+    cache_config = normalize_cache_config({"vary_on": ["project_id", "body.filters.region"]})
+
+    async def call(request_kwargs: dict[str, Any]) -> Response:
+        response = Response()
+        await cache.call(
+            request=_request("POST"),
+            response=response,
+            path="/api/v1/cache-test",
+            cache_config=cache_config,
+            request_kwargs=request_kwargs,
+            invoke=invoke,
+        )
+        return response
+
+    first = await call({"project_id": "p1", "body": {"filters": {"region": "eu"}, "trace": "a"}})
+    same = await call({"project_id": "p1", "body": {"filters": {"region": "eu"}, "trace": "b"}})
+    other = await call({"project_id": "p1", "body": {"filters": {"region": "us"}, "trace": "a"}})
+
+    assert first.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert same.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert other.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert calls == 2
+    metadata = (await cache.metadata())[first.headers[CACHE_KEY_HEADER]]
+    assert json.loads(metadata.key)["vary"] == {"body.filters.region": "eu", "project_id": "p1"}
+    assert metadata.request_body["body"]["trace"] == "a"
+
+
+@pytest.mark.parametrize(
+    ("cache_config", "error"),
+    [
+        ({"vary_on": "project_id"}, TypeError),
+        ({"vary_on": []}, ValueError),
+        ({"vary_on": ["body..region"]}, ValueError),
+        ({"vary_on": ["id"], "key_builder": lambda _request, _context: "key"}, ValueError),
+    ],
+)
+def test_normalize_cache_config_rejects_invalid_vary_on(cache_config, error):
+    with pytest.raises(error):
+        normalize_cache_config(cache_config)
+
+
+@pytest.mark.asyncio
+async def test_stats_count_statuses_latency_and_usage_per_route(cache):
+    async def invoke() -> dict[str, str]:
+        return {"result": "ok"}
+
+    async def call(path: str, headers: dict[str, str] | None = None) -> None:
+        await cache.call(
+            request=_request(path=path, headers=headers),
+            response=Response(),
+            path=path,
+            cache_config={"max_entry_bytes": 4096},
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    await call("/reports")
+    await call("/reports")
+    await call("/reports", {CACHE_REQUEST_HEADER: "refresh"})
+    await call("/reports", {CACHE_REQUEST_HEADER: "bypass"})
+    await call("/users")
+    await cache.call(
+        request=_request(path="/plain"),
+        response=Response(),
+        path="/plain",
+        cache_config=None,
+        request_kwargs={},
+        invoke=invoke,
+    )
+
+    report = await cache.stats_report()
+    reports = report["routes"]["/reports"]
+
+    assert set(report["routes"]) == {"/reports", "/users"}
+    assert reports["statuses"] == {
+        "DISABLED": 0,
+        "BYPASS": 1,
+        "HIT": 1,
+        "MISS": 1,
+        "REFRESH": 1,
+        "STALE": 0,
+    }
+    assert reports["hit_ratio"] == 0.5
+    assert reports["lookup"]["count"] == 2
+    assert reports["store"]["count"] == 2
+    assert reports["entries"] == 1
+    assert reports["bytes"] > 0
+    assert report["entries"] == 2
+    assert report["bytes"] == reports["bytes"] + report["routes"]["/users"]["bytes"]
+
+
+@pytest.mark.asyncio
+async def test_stats_count_evictions(cache, any_mode, monkeypatch):
+    monkeypatch.setattr(settings.cache, "max_size", 1)
+
+    async def invoke() -> dict[str, str]:
+        return {"result": "ok"}
+
+    for path in ("/first", "/second"):
+        await cache.call(
+            request=_request(path=path),
+            response=Response(),
+            path=path,
+            cache_config={},
+            request_kwargs={},
+            invoke=invoke,
+        )
+
+    routes = (await cache.stats_report())["routes"]
+    assert routes["/first"]["evictions"] == 1
+    assert routes["/first"]["entries"] == 0
+    assert routes["/second"]["evictions"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_count_expirations(cache):
+    async def invoke() -> dict[str, str]:
+        return {"result": "ok"}
+
+    response = Response()
+    await cache.call(
+        request=_request(),
+        response=response,
+        path="/api/v1/cache-test",
+        cache_config={},
+        request_kwargs={},
+        invoke=invoke,
+    )
+    _expire_memory_entry(cache, response.headers[CACHE_KEY_HEADER])
+
+    report = await cache.stats_report()
+
+    assert report["routes"]["/api/v1/cache-test"]["expirations"] == 1
+    assert report["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_sweeps_only_expired_entries(monkeypatch):
+    monkeypatch.setattr(settings.cache, "max_size", 1000)
+    backend = MemoryCacheBackend()
+    now = datetime.now(REQUEST_CACHE_TIMEZONE)
+
+    def entry(store_key: str, expires_in: int) -> CacheEntryMetadata:
+        return CacheEntryMetadata(
+            key=store_key,
+            store_key=store_key,
+            store="memory",
+            created_at=now,
+            expires_at=now + timedelta(seconds=expires_in),
+            ttl=60,
+            path=f"/{store_key}",
+            method="GET",
+        )
+
+    backend._put_metadata("expired", entry("expired", -1))
+    backend._put_metadata("replaced", entry("replaced", -1))
+    backend._put_metadata("replaced", entry("replaced", 60))
+    backend._put_metadata("live", entry("live", 60))
+
+    assert set(await backend.metadata()) == {"replaced", "live"}
+    assert sorted(key for _timestamp, key in backend._expiry) == ["live", "replaced"]
+    assert backend.stats.report({})["routes"]["/expired"]["expirations"] == 1
+    assert "/replaced" not in backend.stats.report({})["routes"]
+
+
+def test_render_prometheus_groups_metric_families():
+    stats = CacheStats()
+    stats.record_status('/a"b', "HIT")
+    stats.route("/c").lookup.observe(0.002)
+
+    text = render_prometheus(stats.report({"/c": (2, 128)}))
+    lines = text.splitlines()
+
+    assert 'framex_request_cache_requests_total{route="/a\\"b",status="HIT"} 1' in lines
+    assert 'framex_request_cache_lookup_seconds_sum{route="/c"} 0.002000' in lines
+    assert 'framex_request_cache_lookup_seconds_count{route="/c"} 1' in lines
+    assert 'framex_request_cache_entries{route="/c"} 2' in lines
+    assert 'framex_request_cache_bytes{route="/c"} 128' in lines
+    families = [
+        line.split("{")[0].removesuffix("_sum").removesuffix("_count") for line in lines if not line.startswith("#")
+    ]
+    runs = [family for index, family in enumerate(families) if index == 0 or families[index - 1] != family]
+    assert len(runs) == len(set(runs))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("admission", "hot_hits"), [("tinylfu", 2), ("always", 0)])
+async def test_tinylfu_admission_keeps_hot_keys_through_a_scan(cache, monkeypatch, admission, hot_hits):
+    monkeypatch.setattr(settings.cache, "max_size", 2)
+    cache_config = normalize_cache_config({"admission": admission})
+
+    async def invoke() -> dict[str, str]:
+        return {"result": "ok"}
+
+    async def call(path: str) -> str:
+        response = Response()
+        await cache.call(
+            request=_request(path=path),
+            response=response,
+            path=path,
+            cache_config=cache_config,
+            request_kwargs={},
+            invoke=invoke,
+        )
+        return response.headers[CACHE_STATUS_HEADER]
+
+    for _ in range(3):
+        for path in ("/hot-a", "/hot-b"):
+            await call(path)
+    for index in range(20):
+        await call(f"/scan-{index}")
+
+    statuses = [await call(path) for path in ("/hot-a", "/hot-b")]
+    routes = (await cache.stats_report())["routes"]
+
+    assert statuses.count("HIT") == hot_hits
+    assert sum(route["rejections"] for route in routes.values()) == (20 if admission == "tinylfu" else 0)
+
+
+def test_frequency_sketch_estimates_and_ages_counts():
+    sketch = FrequencySketch(1024)
+    for _ in range(6):
+        sketch.increment("hot")
+    sketch.increment("cold")
+
+    assert sketch.estimate("hot") >= 6
+    assert sketch.estimate("cold") >= 1
+    assert sketch.estimate("hot") > sketch.estimate("unseen")
+
+    sketch._additions = sketch._sample_size - 1
+    sketch.increment("cold")
+
+    assert sketch.estimate("hot") == 3
+    assert sketch.estimate("cold") == 1
+
+
+def test_normalize_cache_config_rejects_unknown_admission():
+    with pytest.raises(ValueError, match="admission"):
+        normalize_cache_config({"admission": "lru"})
+
+
+async def _collect(chunks: Any) -> list[Any]:
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_stream_is_recorded_and_replayed(cache, any_mode):
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        for chunk in ("event: a\n\n", "event: b\n\n"):
+            yield chunk
+
+    async def stream() -> tuple[list[Any], Response]:
+        response = Response()
+        chunks = await cache.stream(
+            request=_request(),
+            response=response,
+            path="/api/v1/cache-test",
+            cache_config={"replay_pacing": False},
+            request_kwargs={"prompt": "hello"},
+            invoke=upstream,
+        )
+        return await _collect(chunks), response
+
+    first, first_response = await stream()
+    await asyncio.gather(*(recording.task for recording in cache._recordings.values()))
+    second, second_response = await stream()
+
+    assert first == second == ["event: a\n\n", "event: b\n\n"]
+    assert first_response.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert second_response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert second_response.headers[CACHE_KEY_HEADER] == first_response.headers[CACHE_KEY_HEADER]
+    assert calls == 1
+    assert (await cache.metadata())[first_response.headers[CACHE_KEY_HEADER]].stream is True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_tee_one_upstream(cache):
+    calls = 0
+    release = asyncio.Event()
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        yield "first"
+        await release.wait()
+        yield "second"
+
+    async def stream() -> list[Any]:
+        chunks = await cache.stream(
+            request=_request(),
+            response=Response(),
+            path="/api/v1/cache-test",
+            cache_config={},
+            request_kwargs={},
+            invoke=upstream,
+        )
+        return await _collect(chunks)
+
+    consumers = [asyncio.create_task(stream()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await asyncio.gather(*consumers) == [["first", "second"]] * 3
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_is_not_cached(cache):
+    async def upstream():
+        yield "partial"
+        raise RuntimeError("boom")
+
+    chunks = await cache.stream(
+        request=_request(),
+        response=Response(),
+        path="/api/v1/cache-test",
+        cache_config={},
+        request_kwargs={},
+        invoke=upstream,
+    )
+    assert await anext(chunks) == "partial"
+    with pytest.raises(RuntimeError, match="boom"):
+        await anext(chunks)
+
+    assert await cache.metadata() == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("pacing", "paced"), [(True, True), (False, False)])
+async def test_stream_replay_pacing(pacing, paced):
+    started = asyncio.get_running_loop().time()
+
+    chunks = await _collect(cache_module._replay([[0.0, "a"], [0.05, "b"]], pacing=pacing))
+
+    assert chunks == ["a", "b"]
+    assert (asyncio.get_running_loop().time() - started >= 0.05) is paced
+
+
+@pytest.mark.asyncio
+async def test_memoize_keys_calls_on_kwargs(cache, any_mode):
+    calls: list[dict[str, Any]] = []
+
+    async def call(**kwargs: Any) -> dict[str, Any]:
+        async def invoke() -> dict[str, Any]:
+            calls.append(kwargs)
+            return {"items": [kwargs["page"]]}
+
+        result: dict[str, Any] = await cache.memoize(
+            name="/api/v1/lookup", cache_config={}, kwargs=kwargs, invoke=invoke
+        )
+        return result
+
+    assert await call(page=1) == {"items": [1]}
+    assert await call(page=1) == {"items": [1]}
+    assert await call(page=2) == {"items": [2]}
+
+    assert calls == [{"page": 1}, {"page": 2}]
+    [metadata, _] = sorted((await cache.metadata()).values(), key=lambda item: item.request_body["page"])
+    assert metadata.method == "CALL"
+    assert metadata.path == "/api/v1/lookup"
+    statuses = (await cache.stats_report())["routes"]["/api/v1/lookup"]["statuses"]
+    assert (statuses["HIT"], statuses["MISS"]) == (1, 2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("scope_by_caller", "expected_calls"), [(False, 1), (True, 2)])
+async def test_memoize_scopes_entries_by_caller(cache, scope_by_caller, expected_calls):
+    calls = 0
+
+    async def invoke() -> str:
+        nonlocal calls
+        calls += 1
+        return "ok"
+
+    for caller in ("plugins.a.A", "plugins.b.B", "plugins.a.A"):
+        await cache.memoize(
+            name="lookup",
+            cache_config={"scope_by_caller": scope_by_caller},
+            kwargs={"id": 1},
+            invoke=invoke,
+            caller=caller,
+        )
+
+    assert calls == expected_calls
+
+
+@pytest.mark.asyncio
+async def test_memoize_skips_key_builder_and_disabled_cache(cache, monkeypatch):
+    calls = 0
+
+    async def invoke() -> str:
+        nonlocal calls
+        calls += 1
+        return "ok"
+
+    for _ in range(2):
+        await cache.memoize(name="lookup", cache_config={"key_builder": lambda *_: "key"}, kwargs={}, invoke=invoke)
+    monkeypatch.setattr(settings.cache, "enabled", False)
+    for _ in range(2):
+        await cache.memoize(name="other", cache_config={}, kwargs={}, invoke=invoke)
+
+    assert calls == 4
+    assert await cache.metadata() == {}
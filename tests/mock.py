@@ -1,3 +1,4 @@
+import json
 from typing import Any
 from unittest.mock import MagicMock
 
@@ -25,7 +26,10 @@ async def mock_get(_, url: str, *__, **kwargs: Any):
 
 async def mock_request(_, method: str, url: str, **kwargs: Any):
     params = kwargs.get("params")
-    body = kwargs.get("json") or kwargs.get("data")
+    json_body = kwargs.get("json")
+    if json_body is None and isinstance(content := kwargs.get("content"), bytes):
+        json_body = json.loads(content)
+    body = json_body or kwargs.get("data")
     files = kwargs.get("files")
     headers = kwargs.get("headers", {})
 
@@ -93,7 +97,7 @@ async def mock_request(_, method: str, url: str, **kwargs: Any):
                 "message": f"Invalid API Key({headers.get('Authorization')}) for API(/api/v1/proxy/mock/auth/get)",
             }
         else:
-            json_data = kwargs.get("json", {})
+            json_data = json_body or {}
             func_name = json_data.get("func_name")
             data = json_data.get("data", {})
             if not func_name or not data:
@@ -187,3 +187,45 @@ def test_run_command_with_load_plugins(monkeypatch, runner) -> None:
     assert "plugin1" in loaded_plugins
     assert "plugin2" in loaded_plugins
     assert "builtin1" in loaded_builtin_plugins
+
+
+def test_cache_purge_command_calls_admin_api(monkeypatch, runner):
+    import httpx
+
+    calls: list[dict[str, Any]] = []
+
+    def fake_post(url: str, **kwargs: Any) -> httpx.Response:
+        calls.append({"url": url, **kwargs})
+        return httpx.Response(200, json={"status": 200, "data": {"purged": 2, "keys": []}})
+
+    monkeypatch.setattr(httpx, "post", fake_post)
+
+    result = runner.invoke(
+        framex_cli,
+        ["cache", "purge", "--tag", "reports", "--prefix", "/api/v1/report", "--url", "http://svc:8080/"],
+        env={"FRAMEX_API_KEY": "admin-key"},
+    )
+
+    assert result.exit_code == 0
+    assert "Purged 2 cache entries" in result.output
+    assert calls[0]["url"] == "http://svc:8080/api/v1/cache/purge"
+    assert calls[0]["json"] == {"tags": ["reports"], "path_prefix": "/api/v1/report", "keys": []}
+    assert calls[0]["headers"] == {"Authorization": "admin-key"}
+
+
+def test_cache_purge_command_requires_selector(runner):
+    result = runner.invoke(framex_cli, ["cache", "purge"])
+
+    assert result.exit_code != 0
+    assert "Provide at least one of --tag, --prefix or --key." in result.output
+
+
+def test_cache_purge_command_reports_errors(monkeypatch, runner):
+    import httpx
+
+    monkeypatch.setattr(httpx, "post", lambda *_args, **_kwargs: httpx.Response(403, text="forbidden"))
+
+    result = runner.invoke(framex_cli, ["cache", "purge", "--key", "abc"])
+
+    assert result.exit_code == 1
+    assert "Cache purge failed (403): forbidden" in result.output
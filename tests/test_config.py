@@ -77,7 +77,16 @@ def test_cache_config_defaults():
     assert cfg.mode == "memory"
     assert cfg.ttl == 60
     assert cfg.max_size == 1000
+    assert cfg.max_bytes is None
+    assert cfg.compress_threshold is None
+    assert cfg.admission == "always"
     assert cfg.file_dir == ".framex/cache"
+    assert cfg.l1_max_size == 256
+    assert cfg.l2_mode == "file"
+    assert cfg.sqlite_path == ".framex/cache/request_cache.db"
+    assert cfg.remote_url == "redis://localhost:6379/0"
+    assert cfg.snapshot_path is None
+    assert cfg.warmup == []
 
 
 def test_settings_base_ingress_config_defaults_include_health_checks():
@@ -94,10 +103,19 @@ def test_cache_config_validates_mode_ttl_and_max_size():
     with pytest.raises(ValidationError):
         CacheConfig(mode="redis")  # type: ignore[arg-type]
     assert CacheConfig(ttl=-1).ttl == -1
+    assert CacheConfig(mode="sqlite").mode == "sqlite"
+    with pytest.raises(ValidationError):
+        CacheConfig(mode="tiered", l2_mode="memory")  # type: ignore[arg-type]
     with pytest.raises(ValidationError):
         CacheConfig(ttl=0)
     with pytest.raises(ValidationError):
         CacheConfig(max_size=0)
+    with pytest.raises(ValidationError):
+        CacheConfig(max_bytes=0)
+    with pytest.raises(ValidationError):
+        CacheConfig(compression="brotli")  # type: ignore[arg-type]
+    with pytest.raises(ValidationError):
+        CacheConfig(admission="lru")  # type: ignore[arg-type]
 
 
 def test_oauth_config_generates_default_urls_from_base_url():
@@ -223,6 +223,73 @@ class TestCallPluginApi:
         with pytest.raises(RuntimeError, match="not declared in current plugin remote_apis"):
             await plugin.request_api()
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(("scope_by_caller", "expected_calls"), [(False, 2), (True, 3)])
+    async def test_call_plugin_api_memoizes_cached_apis(self, monkeypatch, scope_by_caller, expected_calls):
+        from framex.config import settings
+        from framex.driver.cache import request_cache
+        from framex.plugin.base import BasePlugin
+        from framex.plugin.on import on_request
+
+        monkeypatch.setattr(settings.cache, "enabled", True)
+        monkeypatch.setattr(settings.cache, "mode", "memory")
+        api = PluginApi(
+            api="test_api",
+            deployment_name="test_deployment",
+            call_type=ApiType.FUNC,
+            extend_kwargs={"cache": {"ttl": 60, "scope_by_caller": scope_by_caller}},
+        )
+
+        class FirstPlugin(BasePlugin):
+            @on_request("/first")
+            async def request_api(self, page: int):
+                return await self._call_remote_api("test_api", page=page)
+
+        class SecondPlugin(FirstPlugin):
+            pass
+
+        first, second = FirstPlugin(remote_apis={"test_api": api}), SecondPlugin(remote_apis={"test_api": api})
+        try:
+            with patch("framex.plugin.get_adapter") as mock_adapter:
+                mock_adapter.return_value.call_func = AsyncMock(return_value={"page": 1})
+                assert await first.request_api(page=1) == {"page": 1}
+                assert await first.request_api(page=1) == {"page": 1}
+                assert await second.request_api(page=1) == {"page": 1}
+                assert await first.request_api(page=2) == {"page": 1}
+                assert mock_adapter.return_value.call_func.await_count == expected_calls
+        finally:
+            await request_cache.clear()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", ["memory", "file"])
+    async def test_call_plugin_api_cache_returns_same_types_in_every_mode(self, monkeypatch, tmp_path, mode):
+        from datetime import date
+
+        from framex.config import settings
+        from framex.driver.cache import request_cache
+
+        monkeypatch.setattr(settings.cache, "enabled", True)
+        monkeypatch.setattr(settings.cache, "mode", mode)
+        monkeypatch.setattr(settings.cache, "file_dir", str(tmp_path))
+        api = PluginApi(
+            api="test_api", deployment_name="test_deployment", call_type=ApiType.FUNC, extend_kwargs={"cache": {}}
+        )
+        model = SampleModel(field1="a", field2=1)
+        token = set_current_remote_apis({"test_api": api})
+        try:
+            with patch("framex.plugin.get_adapter") as mock_adapter:
+                mock_adapter.return_value.call_func = AsyncMock(
+                    return_value={"model": model, "pair": (1, 2), "day": date(2024, 1, 1)}
+                )
+                miss, hit = [await call_plugin_api("test_api") for _ in range(2)]
+                assert mock_adapter.return_value.call_func.await_count == 1
+        finally:
+            reset_current_remote_apis(token)
+            await request_cache.clear()
+
+        assert miss == hit == {"model": model, "pair": [1, 2], "day": "2024-01-01"}
+        assert isinstance(hit["model"], SampleModel)
+
     @pytest.mark.asyncio
     async def test_call_plugin_api_proxy_creates_correct_plugin_api(self):
         with (
@@ -1,8 +1,12 @@
+import asyncio
+import gzip
 import importlib
+import json
 from collections.abc import Callable
 from functools import wraps
 from typing import Any, Literal, Optional, Union, get_args, get_origin
 
+import httpx
 import pytest
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -224,6 +228,88 @@ def test_resolve_annotation():
     assert fields["top_k"].annotation == int | None
 
 
+def test_create_pydantic_model_is_namespaced_and_content_hashed():
+    builder = importlib.import_module("framex.plugins.proxy.builder")
+    builder.reset_created_models()
+    item = {"type": "object", "properties": {"value": {"type": "string"}}, "required": ["value"]}
+    changed = {"type": "object", "properties": {"value": {"type": "integer"}}, "required": ["value"]}
+
+    first = builder.create_pydantic_model("Item", item, {}, "http://a")
+    assert builder.create_pydantic_model("Item", dict(item), {}, "http://a") is first
+    assert builder.create_pydantic_model("Item", item, {}, "http://b") is not first
+    assert builder.create_pydantic_model("Item", changed, {}, "http://a").model_fields["value"].annotation is int
+
+    # A changed referenced schema changes the digest of the referencing one.
+    holder = {"type": "object", "properties": {"item": {"$ref": "#/components/schemas/Item"}}, "required": ["item"]}
+    old = builder.create_pydantic_model("Holder", holder, {"Item": item}, "http://a")
+    new = builder.create_pydantic_model("Holder", holder, {"Item": changed}, "http://a")
+    assert old.model_fields["item"].annotation.model_fields["value"].annotation is str
+    assert new.model_fields["item"].annotation.model_fields["value"].annotation is int
+
+
+def test_create_pydantic_model_resolves_recursive_refs():
+    builder = importlib.import_module("framex.plugins.proxy.builder")
+    builder.reset_created_models()
+    components = {
+        "Node": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "children": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}, "default": []},
+                "owner": {"anyOf": [{"$ref": "#/components/schemas/Owner"}, {"type": "null"}]},
+            },
+            "required": ["name"],
+        },
+        "Owner": {
+            "type": "object",
+            "properties": {"nodes": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}}},
+            "required": ["nodes"],
+        },
+    }
+
+    node = builder.create_pydantic_model("Node", components["Node"], components, "http://a")
+    value = node.model_validate(
+        {"name": "root", "children": [{"name": "leaf"}], "owner": {"nodes": [{"name": "other"}]}}
+    )
+
+    assert value.children[0].name == "leaf"
+    assert value.children[0].owner is None
+    assert value.owner.nodes[0].name == "other"
+
+
+def test_create_pydantic_model_digests_each_component_once(monkeypatch):
+    builder = importlib.import_module("framex.plugins.proxy.builder")
+    builder.reset_created_models()
+    digested: list[str] = []
+    schema_digest = builder.schema_digest
+
+    def counting_digest(node: dict[str, Any], components: dict[str, Any]) -> str:
+        digested.append(node.get("title", ""))
+        digest: str = schema_digest(node, components)
+        return digest
+
+    def ref(name: str) -> dict[str, str]:
+        return {"$ref": f"#/components/schemas/{name}"}
+
+    monkeypatch.setattr(builder, "schema_digest", counting_digest)
+    leaf = {"title": "Leaf", "type": "object", "properties": {"value": {"type": "string"}}}
+    components = {
+        "Leaf": leaf,
+        "Left": {"title": "Left", "type": "object", "properties": {"a": ref("Leaf"), "b": ref("Leaf")}},
+        "Right": {"title": "Right", "type": "object", "properties": {"a": ref("Leaf"), "b": {"anyOf": [ref("Leaf")]}}},
+        "Root": {"title": "Root", "type": "object", "properties": {"left": ref("Left"), "right": ref("Right")}},
+    }
+
+    root = builder.create_pydantic_model("Root", components["Root"], components, "http://a")
+
+    assert sorted(digested) == ["Leaf", "Left", "Right", "Root"]
+    assert (
+        root.model_fields["right"].annotation.model_fields["a"].annotation
+        is root.model_fields["left"].annotation.model_fields["b"].annotation
+    )
+    assert builder._digests == {}
+
+
 def test_resolve_default():
     builder = importlib.import_module("framex.plugins.proxy.builder")
     resolve_default: Callable = getattr(builder, "resolve_default")
@@ -299,7 +385,39 @@ async def test_on_proxy_remote_call():
     }
 
 
-async def test_proxy_stream_closes_client_when_iteration_fails(monkeypatch):
+_cached_exchange_calls: list[int] = []
+
+
+@on_proxy(cache={"ttl": 60})
+async def cached_exchange_key_value(b_int: int, c_model: ExchangeModel) -> Any:
+    _cached_exchange_calls.append(b_int)
+    return {"b_int": b_int, "c_model": c_model}
+
+
+@pytest.mark.parametrize("mode", ["memory", "file"])
+async def test_on_proxy_cache_memoizes_calls(monkeypatch, tmp_path, mode):
+    from framex.config import settings
+    from framex.driver.cache import request_cache
+
+    monkeypatch.setattr(settings.cache, "enabled", True)
+    monkeypatch.setattr(settings.cache, "mode", mode)
+    monkeypatch.setattr(settings.cache, "file_dir", str(tmp_path))
+    _cached_exchange_calls.clear()
+    model = ExchangeModel(id="id_1", name=100, model=SubModel(id=1, name="sub_name"))
+    try:
+        results = [await cached_exchange_key_value(b_int=b_int, c_model=model) for b_int in (1, 1, 2)]
+    finally:
+        await request_cache.clear()
+
+    assert _cached_exchange_calls == [1, 2]
+    assert results[1] == {"b_int": 1, "c_model": model}
+    assert isinstance(results[1]["c_model"], ExchangeModel)
+
+
+async def test_proxy_stream_closes_response_when_iteration_fails():
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig
+
     proxy_module = importlib.import_module("framex.plugins.proxy")
     proxy_plugin_class = getattr(proxy_module, "ProxyPlugin")
 
@@ -312,32 +430,989 @@ async def test_proxy_stream_closes_client_when_iteration_fails(monkeypatch):
             raise RuntimeError("upstream failed")
 
     class FakeStreamContext:
+        def __init__(self):
+            self.exited = False
+
         async def __aenter__(self):
             return FakeResponse()
 
         async def __aexit__(self, *_):
+            self.exited = True
             return False
 
     class FakeClient:
         def __init__(self):
-            self.exited = False
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *_):
-            self.exited = True
+            self.context = FakeStreamContext()
 
         def stream(self, **_):
-            return FakeStreamContext()
+            return self.context
 
     client = FakeClient()
-    monkeypatch.setattr(proxy_module.httpx, "AsyncClient", lambda **_: client)
     plugin = proxy_plugin_class.__new__(proxy_plugin_class)
-    plugin.time_out = 1
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    upstream = plugin.clients.get("https://example.com/stream")
+    upstream.client = client
 
     stream = await plugin.fetch_response(stream=True, method="GET", url="https://example.com/stream")
 
     with pytest.raises(RuntimeError, match="upstream failed"):
         [chunk async for chunk in stream]
-    assert client.exited is True
+    assert client.context.exited is True
+    assert (upstream.requests, upstream.in_flight, upstream.errors) == (1, 0, 1)
+
+
+async def test_upstream_client_pool_reuses_clients_per_base_url():
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig
+
+    pool = UpstreamClientPool(ProxyClientConfig(max_connections=5, connect_timeout=2, http2=False), timeout=30)
+    pool.open(["http://upstream-a:9000/", "http://upstream-b:9000/base"])
+
+    first = pool.get("http://upstream-a:9000/api/v1/items")
+    assert pool.get("http://upstream-a:9000/api/v1/users") is first
+    assert pool.get("http://upstream-b:9000/base/api").base_url == "http://upstream-b:9000/base"
+    assert pool.get("http://other:8000/api").base_url == "http://other:8000"
+    assert first.client.timeout == httpx.Timeout(30, connect=2, pool=10)
+    assert set(pool.stats()) == {"http://upstream-a:9000", "http://upstream-b:9000/base", "http://other:8000"}
+    assert pool.stats()["http://upstream-a:9000"] == {
+        "requests": 0,
+        "in_flight": 0,
+        "errors": 0,
+        "ewma_ms": None,
+        "ejected": False,
+    }
+
+    await pool.aclose()
+    assert first.client.is_closed
+    assert pool.stats() == {}
+
+
+_GZIPPED_ITEMS = gzip.compress(b'{"items":[]}')
+
+
+@pytest.mark.parametrize(
+    ("keep_compression", "expected_body", "expected_encoding"),
+    [(False, b'{"items":[]}', None), (True, _GZIPPED_ITEMS, "gzip")],
+)
+async def test_proxy_passthrough_forwards_raw_upstream_response(keep_compression, expected_body, expected_encoding):
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig, ProxyPassthroughConfig
+    from framex.plugins.proxy.resilience import RetryBudget
+
+    proxy_module = importlib.import_module("framex.plugins.proxy")
+    proxy_plugin_class = getattr(proxy_module, "ProxyPlugin")
+
+    def handler(_: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            404,
+            stream=httpx.ByteStream(_GZIPPED_ITEMS),
+            headers={"content-type": "application/json", "content-encoding": "gzip", "x-internal": "secret"},
+        )
+
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    plugin.retry_budget = RetryBudget(ratio=0.1, min_per_second=1)
+    plugin.clients.get("https://example.com").client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    response = await plugin.fetch_response(
+        passthrough=ProxyPassthroughConfig(enable=True, keep_compression=keep_compression),
+        method="GET",
+        url="https://example.com/items",
+    )
+
+    assert response.status_code == 404
+    assert response.body == expected_body
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers.get("content-encoding") == expected_encoding
+    assert "x-internal" not in response.headers
+    await plugin.clients.aclose()
+
+
+async def test_proxy_passthrough_stream_yields_bytes():
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig, ProxyPassthroughConfig
+
+    proxy_module = importlib.import_module("framex.plugins.proxy")
+    proxy_plugin_class = getattr(proxy_module, "ProxyPlugin")
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    plugin.clients.get("https://example.com").client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda _: httpx.Response(200, content=b"data: 1\n\n"))
+    )
+
+    stream = await plugin.fetch_response(
+        stream=True,
+        passthrough=ProxyPassthroughConfig(enable=True),
+        method="GET",
+        url="https://example.com/stream",
+    )
+
+    assert [chunk async for chunk in stream] == [b"data: 1\n\n"]
+    await plugin.clients.aclose()
+
+
+def test_proxy_passthrough_is_configured_per_upstream():
+    from framex.plugins.proxy.config import ProxyPluginConfig
+
+    config = ProxyPluginConfig(
+        proxy_urls={
+            "http://upstream-a:9000": {"passthrough": {"enable": True, "headers": ["etag"]}},
+            "http://upstream-b:9000": {},
+        }
+    )
+
+    passthrough = config.get_passthrough("http://upstream-a:9000")
+    assert passthrough is not None
+    assert passthrough.headers == ["etag"]
+    assert config.get_passthrough("http://upstream-b:9000") is None
+    assert ProxyPluginConfig(proxy_urls=["http://upstream-c:9000"]).get_passthrough("http://upstream-c:9000") is None
+
+
+def _body_request(chunks: list[bytes], headers: dict[str, str]) -> Any:
+    from starlette.requests import Request
+
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive() -> dict[str, Any]:
+        return messages.pop(0)
+
+    raw_headers = [(name.encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "POST", "path": "/upload", "headers": raw_headers}, receive)
+
+
+@pytest.mark.parametrize(
+    ("headers", "max_bytes", "error_status"),
+    [
+        ({"content-type": "multipart/form-data; boundary=x", "content-length": "10"}, None, None),
+        ({"content-type": "multipart/form-data; boundary=x", "content-length": "10"}, 9, 413),
+        ({"content-type": "application/octet-stream"}, 9, 413),
+        ({"content-type": "application/octet-stream", "content-length": "ten"}, None, 400),
+        ({"content-type": "application/octet-stream", "content-length": "-1"}, 9, 400),
+    ],
+)
+async def test_proxy_stream_upload_pipes_request_body(monkeypatch, headers, max_bytes, error_status):
+    from fastapi import HTTPException
+
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig, ProxyStreamUploadConfig
+    from framex.plugins.proxy.resilience import RetryBudget
+
+    proxy_module = importlib.import_module("framex.plugins.proxy")
+    proxy_plugin_class = getattr(proxy_module, "ProxyPlugin")
+    received: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        received.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    async def send_request(self: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.send(self.build_request(method, url, **kwargs))
+
+    # The session app fixture mocks AsyncClient.request; route it to the mock transport instead.
+    monkeypatch.setattr(httpx.AsyncClient, "request", send_request)
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    plugin.retry_budget = RetryBudget(ratio=0.1, min_per_second=1)
+    plugin.clients.get("https://example.com").client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    method = plugin._create_dynamic_method(
+        "upload",
+        "POST",
+        [("message", str)],
+        "https://example.com/upload",
+        headers={"Authorization": "key"},
+        stream_upload=ProxyStreamUploadConfig(enable=["/upload"], max_bytes=max_bytes),
+    )
+    request = _body_request([b"hello", b"world"], headers)
+
+    if error_status is not None:
+        with pytest.raises(HTTPException) as exc_info:
+            await method(message="hi", **{proxy_module.PROXY_BODY_PARAM: request})
+        assert exc_info.value.status_code == error_status
+    else:
+        assert await method(message="hi", **{proxy_module.PROXY_BODY_PARAM: request}) == {"ok": True}
+        [upstream_request] = received
+        assert upstream_request.content == b"helloworld"
+        assert upstream_request.url.params["message"] == "hi"
+        assert upstream_request.headers["content-type"] == "multipart/form-data; boundary=x"
+        assert upstream_request.headers["authorization"] == "key"
+    await plugin.clients.aclose()
+
+
+def test_proxy_stream_upload_is_configured_per_path():
+    from framex.plugins.proxy.config import ProxyPluginConfig
+
+    config = ProxyPluginConfig(
+        proxy_urls={"http://upstream:9000": {"stream_upload": {"enable": ["/files/*"], "max_bytes": 1024}}}
+    )
+
+    stream_upload = config.get_stream_upload("http://upstream:9000", "/files/upload")
+    assert stream_upload is not None
+    assert stream_upload.max_bytes == 1024
+    assert config.get_stream_upload("http://upstream:9000", "/items") is None
+    assert config.get_stream_upload("http://other:9000", "/files/upload") is None
+
+
+async def test_proxy_discovery_uses_snapshots_and_revalidates(monkeypatch, tmp_path):
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig, settings
+    from framex.plugins.proxy.discovery import SpecSnapshotStore
+
+    proxy_module = importlib.import_module("framex.plugins.proxy")
+    proxy_plugin_class = getattr(proxy_module, "ProxyPlugin")
+    specs: dict[str, dict[str, Any]] = {
+        "http://fast:9000": {"paths": {"/a": {}}},
+        "http://slow:9000": {"paths": {"/b": {}}},
+    }
+    received: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request)
+        if request.url.host == "slow":
+            await asyncio.sleep(1)
+        spec = specs[f"http://{request.url.host}:9000"]
+        etag = f'"{len(spec["paths"])}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json=spec, headers={"etag": etag})
+
+    async def send_get(self: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.send(self.build_request("GET", url, **kwargs))
+
+    parsed: list[tuple[str, dict[str, Any]]] = []
+
+    async def parse_openai_docs(url: str, openapi_data: dict[str, Any]) -> int:
+        parsed.append((url, openapi_data))
+        return len(openapi_data["paths"])
+
+    # The session app fixture mocks AsyncClient.get; route it to the mock transport instead.
+    monkeypatch.setattr(httpx.AsyncClient, "get", send_get)
+    monkeypatch.setattr(settings, "discovery_timeout", 0.2)
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    plugin.spec_store = SpecSnapshotStore(tmp_path)
+    plugin.specs = {}
+    plugin._background_tasks = set()
+    plugin._discovery_locks = {}
+    monkeypatch.setattr(plugin, "_parse_openai_docs", parse_openai_docs)
+    for url in specs:
+        plugin.clients.get(url).client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    fast, slow = await asyncio.gather(*(plugin._discover(url) for url in specs))
+    assert (fast.source, fast.routes, fast.error) == ("network", 1, None)
+    assert (slow.source, slow.routes) == ("failed", 0)
+    assert "TimeoutError" in slow.error
+    assert slow.fetch_ms < 1000
+    assert parsed == [("http://fast:9000", specs["http://fast:9000"])]
+    assert plugin.spec_store.load("http://fast:9000").etag == '"1"'
+    assert plugin.spec_store.load("http://slow:9000") is None
+
+    # A restart serves the snapshot first and revalidates it with its etag in background.
+    received.clear()
+    parsed.clear()
+    plugin.discovery = {}
+    report = await plugin._discover("http://fast:9000")
+    assert (report.source, report.routes, report.fetch_ms) == ("snapshot", 1, 0.0)
+    await asyncio.gather(*plugin._background_tasks)
+    assert received[0].headers["if-none-match"] == '"1"'
+    assert len(parsed) == 1
+
+    # A changed upstream spec replaces the snapshot and registers the new routes.
+    specs["http://fast:9000"] = {"paths": {"/a": {}, "/c": {}}}
+    await plugin._discover("http://fast:9000")
+    await asyncio.gather(*plugin._background_tasks)
+    assert parsed[-1] == ("http://fast:9000", specs["http://fast:9000"])
+    assert plugin.discovery["http://fast:9000"].routes == 2
+    assert plugin.spec_store.load("http://fast:9000").etag == '"2"'
+
+    # Overlapping refreshes of one upstream take turns, so a change is diffed and applied once.
+    specs["http://fast:9000"] = {"paths": {"/a": {}}}
+    parsed.clear()
+    await asyncio.gather(plugin._revalidate("http://fast:9000"), plugin._revalidate("http://fast:9000"))
+    assert parsed == [("http://fast:9000", specs["http://fast:9000"])]
+    await plugin.clients.aclose()
+
+
+async def test_proxy_refresh_only_touches_changed_routes(monkeypatch):
+    from framex.plugins.proxy.config import ProxyUrlRuleConfig, settings
+
+    proxy_module = importlib.import_module("framex.plugins.proxy")
+    proxy_plugin_class = getattr(proxy_module, "ProxyPlugin")
+    calls: list[tuple[str, str, tuple[str, ...]]] = []
+
+    class FakeAdapter:
+        def get_handle(self, _):
+            return None
+
+        async def call_func(self, api, **kwargs):
+            calls.append((api.func_name, kwargs["path"], tuple(kwargs["methods"])))
+            return True
+
+    def spec(item_type: str, paths: list[str]) -> dict[str, Any]:
+        operations = {
+            "/a": {"get": {"operationId": "get_a", "parameters": [{"name": "q", "schema": {"type": "string"}}]}},
+            "/b": {
+                "post": {
+                    "operationId": "post_b",
+                    "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/B"}}}},
+                }
+            },
+            "/c": {"get": {"operationId": "get_c"}},
+        }
+        return {
+            "paths": {path: operations[path] for path in paths},
+            "components": {
+                "schemas": {
+                    "B": {"type": "object", "properties": {"item": {"$ref": "#/components/schemas/Item"}}},
+                    "Item": {"type": "object", "properties": {"value": {"type": item_type}}},
+                }
+            },
+        }
+
+    url = "http://upstream:9000"
+    monkeypatch.setattr(proxy_module, "get_adapter", FakeAdapter)
+    assert isinstance(settings.proxy_urls, dict)
+    monkeypatch.setattr(settings, "proxy_urls", {**settings.proxy_urls, url: ProxyUrlRuleConfig()})
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.func_map = {}
+    plugin.route_digests = {}
+
+    assert await plugin._parse_openai_docs(url, spec("string", ["/a", "/b"])) == 2
+    assert calls == [("register_route", "/a", ("get",)), ("register_route", "/b", ("post",))]
+
+    # A nested schema change replaces /b only, /c is added and /a is left untouched.
+    calls.clear()
+    assert await plugin._parse_openai_docs(url, spec("integer", ["/a", "/b", "/c"])) == 3
+    assert calls == [
+        ("unregister_route", "/b", ("post",)),
+        ("register_route", "/b", ("post",)),
+        ("register_route", "/c", ("get",)),
+    ]
+
+    calls.clear()
+    assert await plugin._parse_openai_docs(url, spec("integer", ["/b", "/c"])) == 2
+    assert calls == [("unregister_route", "/a", ("GET",))]
+    assert set(plugin.func_map) == {"/b", "/c"}
+
+
+async def test_proxy_dynamic_method_trusts_route_values_and_validates_plugin_calls(monkeypatch):
+    from pydantic import ValidationError
+
+    proxy_module = importlib.import_module("framex.plugins.proxy")
+    proxy_plugin_class = getattr(proxy_module, "ProxyPlugin")
+
+    class Body(BaseModel):
+        count: int
+        tags: list[str]
+
+    sent: list[dict[str, Any]] = []
+
+    async def fetch_response(**kwargs: Any) -> dict[str, Any]:
+        sent.append(kwargs)
+        return {"ok": True}
+
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    monkeypatch.setattr(plugin, "fetch_response", fetch_response)
+    method = plugin._create_dynamic_method(
+        "create",
+        "POST",
+        [("model", Body), ("limit", int)],
+        "http://upstream/create",
+        body_param_names={"model"},
+        headers={"Authorization": "key"},
+    )
+    plugin.func_map = {"/create": method}
+
+    def fail_validation(*_: Any, **__: Any) -> None:
+        raise AssertionError("route calls must not be validated again")
+
+    # Route calls: FastAPI already validated the values, so they go straight to JSON bytes.
+    with monkeypatch.context() as patched:
+        patched.setattr(method, "request_model", fail_validation)
+        assert await method(model=Body(count=1, tags=["a"]), limit=5) == {"ok": True}
+    assert sent[-1]["content"] == b'{"count":1,"tags":["a"]}'
+    assert sent[-1]["headers"] == {"Authorization": "key", "Content-Type": "application/json"}
+    assert sent[-1]["params"] == {"limit": 5}
+    assert "json" not in sent[-1]
+
+    # Plugin calls skip FastAPI, so their raw values are validated first.
+    assert await plugin("/create", model={"count": "2", "tags": []}, limit="3") == {"ok": True}
+    assert sent[-1]["content"] == b'{"count":2,"tags":[]}'
+    assert sent[-1]["params"] == {"limit": 3}
+    with pytest.raises(ValidationError):
+        await plugin("/create", model={"count": "x", "tags": []}, limit=1)
+
+
+def _failing(status_code: int) -> Exception:
+    request = httpx.Request("GET", "http://replica")
+    return httpx.HTTPStatusError("failed", request=request, response=httpx.Response(status_code, request=request))
+
+
+async def test_upstream_group_balances_and_ejects_replicas():
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyBalancerConfig, ProxyClientConfig
+
+    pool = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    group = pool.add_group(
+        "http://svc-a:9000",
+        ["http://svc-a:9000", "http://svc-b:9000/"],
+        ProxyBalancerConfig(max_failures=2, ejection_time=60),
+    )
+    first, second = group.members
+
+    # Least outstanding requests, with the URL moved onto the selected replica.
+    with first.track():
+        assert pool.pick("http://svc-a:9000/api/items?q=1") == (second, "http://svc-b:9000/api/items?q=1")
+    assert pool.pick("http://other:9000/api") == (pool.get("http://other:9000/api"), "http://other:9000/api")
+
+    # Client errors are not health failures; connection errors and 5xx are.
+    for error in (_failing(404), _failing(404), httpx.ConnectError("down"), _failing(503)):
+        with pytest.raises(httpx.HTTPError), second.track():
+            raise error
+    assert second.ejected
+    assert all(pool.pick("http://svc-a:9000/api")[0] is first for _ in range(3))
+
+    # With every replica ejected the one due back first is still used.
+    first.eject(120)
+    assert group.select() is second
+    second.restore()
+    assert group.select() is second
+    assert pool.stats()["http://svc-b:9000"]["ejected"] is False
+
+    # 5xx responses handed back without raising, as passthrough does, count as failures too.
+    errors = second.errors
+    for _ in range(2):
+        with second.track() as call:
+            call.status_code = 502
+    assert second.ejected
+    assert second.errors == errors + 2
+    await pool.aclose()
+
+
+def test_upstream_group_ewma_prefers_faster_replicas():
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyBalancerConfig, ProxyClientConfig
+
+    pool = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    group = pool.add_group(
+        "http://svc-a:9000", ["http://svc-a:9000", "http://svc-b:9000"], ProxyBalancerConfig(strategy="ewma")
+    )
+    fast, slow = group.members
+    fast.ewma_ms, slow.ewma_ms = 10.0, 40.0
+
+    assert group.select() is fast
+    fast.in_flight = 4
+    assert group.select() is slow
+
+
+async def test_upstream_group_health_probes(monkeypatch):
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyBalancerConfig, ProxyClientConfig
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/health"
+        return httpx.Response(200 if request.url.host == "svc-a" else 503)
+
+    async def send_get(self: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.send(self.build_request("GET", url, **kwargs))
+
+    # The session app fixture mocks AsyncClient.get; route it to the mock transport instead.
+    monkeypatch.setattr(httpx.AsyncClient, "get", send_get)
+    pool = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    group = pool.add_group(
+        "http://svc-a:9000",
+        ["http://svc-a:9000", "http://svc-b:9000"],
+        ProxyBalancerConfig(health_path="/health", ejection_time=60),
+    )
+    healthy, unhealthy = group.members
+    for member in group.members:
+        member.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    healthy.eject(60)
+
+    await group.probe()
+
+    assert not healthy.ejected
+    assert unhealthy.ejected
+    await pool.aclose()
+
+
+def test_proxy_upstream_groups_are_configured_per_upstream():
+    from framex.plugins.proxy.config import ProxyPluginConfig
+
+    config = ProxyPluginConfig(
+        proxy_urls={
+            "http://svc-a:9000": {"replicas": ["http://svc-b:9000"], "balancer": {"strategy": "ewma"}},
+            "http://other:9000": {},
+        }
+    )
+
+    assert config.proxy_url_list == ["http://svc-a:9000", "http://other:9000"]
+    [(base_url, (members, balancer))] = config.get_upstream_groups().items()
+    assert (base_url, members, balancer.strategy) == (
+        "http://svc-a:9000",
+        ["http://svc-a:9000", "http://svc-b:9000"],
+        "ewma",
+    )
+
+
+def test_retry_budget_and_latency_window(monkeypatch):
+    from framex.plugins.proxy import resilience
+
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: 100.0)
+    budget = resilience.RetryBudget(ratio=0.5, min_per_second=0.1, window=10)
+
+    # The floor alone allows one retry per window.
+    assert budget.try_withdraw() is True
+    assert budget.try_withdraw() is False
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_withdraw() for _ in range(3)] == [True, True, False]
+    assert budget.stats() == {"window_requests": 4, "window_retries": 3, "rejected": 2}
+
+    # Buckets older than the window no longer count.
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: 111.0)
+    assert budget.stats()["window_retries"] == 0
+
+    window = resilience.LatencyWindow(size=4)
+    assert window.percentile(95) is None
+    for seconds in (0.5, 0.1, 0.2, 0.3, 0.4):
+        window.observe(seconds)
+    assert (len(window), window.percentile(50), window.percentile(95)) == (4, 0.2, 0.4)
+
+
+def _resilient_proxy_plugin(monkeypatch, handler: Callable, ratio: float = 1.0) -> Any:
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyBalancerConfig, ProxyClientConfig
+    from framex.plugins.proxy.resilience import RetryBudget
+
+    async def send_request(self: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.send(self.build_request(method, url, **kwargs))
+
+    # The session app fixture mocks AsyncClient.request; route it to the mock transport instead.
+    monkeypatch.setattr(httpx.AsyncClient, "request", send_request)
+    proxy_plugin_class = getattr(importlib.import_module("framex.plugins.proxy"), "ProxyPlugin")
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=5)
+    plugin.retry_budget = RetryBudget(ratio=ratio, min_per_second=0)
+    plugin.latencies = {}
+    group = plugin.clients.add_group(
+        "http://svc-a:9000", ["http://svc-a:9000", "http://svc-b:9000"], ProxyBalancerConfig()
+    )
+    for member in group.members:
+        member.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return plugin
+
+
+@pytest.mark.parametrize(("ratio", "expected"), [(1.0, {"replica": "svc-b"}), (0.0, 503)])
+async def test_proxy_retries_on_another_replica_within_budget(monkeypatch, ratio, expected):
+    from framex.plugins.proxy.config import ProxyHedgeConfig, ProxyRetryConfig
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "svc-a":
+            return httpx.Response(503)
+        return httpx.Response(200, json={"replica": request.url.host})
+
+    plugin = _resilient_proxy_plugin(monkeypatch, handler, ratio=ratio)
+    resilience = (ProxyRetryConfig(attempts=2, backoff=0), ProxyHedgeConfig())
+
+    if isinstance(expected, int):
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            await plugin.fetch_response(resilience=resilience, method="GET", url="http://svc-a:9000/items")
+        assert exc_info.value.response.status_code == expected
+        assert plugin.retry_budget.stats()["rejected"] == 1
+    else:
+        assert await plugin.fetch_response(resilience=resilience, method="GET", url="http://svc-a:9000/items") == (
+            expected
+        )
+        assert plugin.retry_budget.stats()["window_retries"] == 1
+    await plugin.clients.aclose()
+
+
+async def test_proxy_hedges_slow_calls_to_another_replica(monkeypatch):
+    from framex.plugins.proxy.config import ProxyHedgeConfig, ProxyRetryConfig
+    from framex.plugins.proxy.resilience import LatencyWindow
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "svc-a":
+            await asyncio.sleep(5)
+        return httpx.Response(200, json={"replica": request.url.host})
+
+    plugin = _resilient_proxy_plugin(monkeypatch, handler)
+    plugin.latencies["http://svc-a:9000/items"] = window = LatencyWindow()
+    for _ in range(20):
+        window.observe(0.001)
+    resilience = (ProxyRetryConfig(), ProxyHedgeConfig(enable=True, min_delay=0.01))
+
+    result = await asyncio.wait_for(
+        plugin.fetch_response(resilience=resilience, method="GET", url="http://svc-a:9000/items"), 2
+    )
+
+    assert result == {"replica": "svc-b"}
+    assert plugin.retry_budget.stats()["window_retries"] == 1
+    # The losing request was cancelled.
+    assert [member["in_flight"] for member in plugin.clients.stats().values()] == [0, 0]
+    await plugin.clients.aclose()
+
+
+def test_proxy_resilience_applies_to_idempotent_routes():
+    from framex.plugins.proxy.config import ProxyPluginConfig
+
+    config = ProxyPluginConfig(
+        proxy_urls={
+            "http://svc:9000": {"idempotent": ["/search"], "retry": {"attempts": 2}},
+            "http://plain:9000": {},
+        }
+    )
+
+    resilience = config.get_resilience("http://svc:9000", "/items", "get")
+    assert resilience is not None
+    assert resilience[0].attempts == 2
+    assert config.get_resilience("http://svc:9000", "/search", "POST") is not None
+    assert config.get_resilience("http://svc:9000", "/items", "POST") is None
+    assert config.get_resilience("http://plain:9000", "/items", "GET") is None
+
+
+async def test_concurrency_limiter_queues_and_fails_fast():
+    from fastapi import HTTPException
+
+    from framex.plugins.proxy.config import ProxyLimitConfig
+    from framex.plugins.proxy.limits import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter("http://svc:9000", ProxyLimitConfig(max_concurrency=1, max_queue=1))
+    release = asyncio.Event()
+    order: list[str] = []
+
+    async def call(name: str) -> None:
+        async with limiter.slot():
+            order.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(call("first"))
+    second = asyncio.create_task(call("second"))
+    await asyncio.sleep(0)
+    assert (limiter.in_flight, limiter.stats()["queued"]) == (1, 1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await call("third")
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert order == ["first", "second"]
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["queued"], stats["rejected"]) == (0, 0, 1)
+    assert stats["wait"]["count"] == 2
+
+
+async def test_concurrency_limiter_queue_timeout_and_cancellation():
+    from fastapi import HTTPException
+
+    from framex.plugins.proxy.config import ProxyLimitConfig
+    from framex.plugins.proxy.limits import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter("svc", ProxyLimitConfig(max_concurrency=1, max_queue=2, queue_timeout=0.01))
+    async with limiter.slot():
+        with pytest.raises(HTTPException) as exc_info:
+            async with limiter.slot():
+                pass
+        assert exc_info.value.status_code == 503
+        assert limiter.timeouts == 1
+
+        waiting = asyncio.create_task(limiter.slot().__aenter__())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.stats()["queued"] == 0
+    assert limiter.in_flight == 0
+
+
+def test_proxy_limits_are_shared_per_upstream_and_route_rule(monkeypatch):
+    from framex.plugins.proxy.config import ProxyUrlRuleConfig, settings
+
+    url = "http://limited:9000"
+    assert isinstance(settings.proxy_urls, dict)
+    monkeypatch.setattr(
+        settings,
+        "proxy_urls",
+        {
+            **settings.proxy_urls,
+            url: ProxyUrlRuleConfig(
+                limit={"max_concurrency": 10, "max_queue": 5},
+                route_limits={"/reports/*": {"max_concurrency": 2}},
+            ),
+        },
+    )
+    proxy_plugin_class = getattr(importlib.import_module("framex.plugins.proxy"), "ProxyPlugin")
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.limiters = {}
+
+    [upstream] = plugin._get_limiters(url, "/items")
+    route, shared = plugin._get_limiters(url, "/reports/daily")
+
+    assert shared is upstream
+    assert plugin._get_limiters(url, "/reports/weekly")[0] is route
+    assert set(plugin.limiters) == {url, f"{url}/reports/*"}
+    assert plugin._get_limiters("http://localhost:9527", "/proxy/mock/get") == ()
+
+
+async def test_proxy_http_cache_honors_upstream_caching_headers(monkeypatch):
+    from starlette.requests import Request
+
+    from framex.config import settings as framex_settings
+    from framex.driver.cache import request_cache
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig, ProxyHttpCacheConfig, ProxyPassthroughConfig
+    from framex.plugins.proxy.resilience import RetryBudget
+
+    monkeypatch.setattr(framex_settings.cache, "enabled", True)
+    monkeypatch.setattr(framex_settings.cache, "mode", "memory")
+    responses = {
+        "/ref": {"cache-control": "max-age=60"},
+        "/live": {"cache-control": "no-cache", "etag": '"v1"'},
+        "/private": {"cache-control": "private, max-age=60"},
+    }
+    seen: list[tuple[str, str | None]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.path, request.headers.get("if-none-match")))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(
+            200, json={"path": request.url.path, **request.url.params}, headers=responses[request.url.path]
+        )
+
+    async def send_request(self: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.send(self.build_request(method, url, **kwargs))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", send_request)
+    proxy_plugin_class = getattr(importlib.import_module("framex.plugins.proxy"), "ProxyPlugin")
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    plugin.clients.get("http://ref:9000").client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    plugin.retry_budget = RetryBudget(ratio=0.1, min_per_second=1)
+    config = ProxyHttpCacheConfig(enable=["/*"])
+
+    async def call(path: str, passthrough: ProxyPassthroughConfig | None = None, **params: Any) -> tuple[Any, str]:
+        request = Request({"type": "http", "headers": []})
+        result = await plugin.fetch_response(
+            http_cache=config,
+            passthrough=passthrough,
+            request=request,
+            method="GET",
+            url=f"http://ref:9000{path}",
+            params=params,
+        )
+        # The ingress reports this status for results that carry no headers of their own.
+        return result, request.state.framex_cache_status
+
+    try:
+        assert await call("/ref", q="a") == ({"path": "/ref", "q": "a"}, "MISS")
+        assert await call("/ref", q="a") == ({"path": "/ref", "q": "a"}, "HIT")
+        assert await call("/ref", q="b") == ({"path": "/ref", "q": "b"}, "MISS")
+        assert await call("/live") == ({"path": "/live"}, "MISS")
+        revalidated, cache_status = await call("/live", passthrough=ProxyPassthroughConfig(enable=True))
+        assert (revalidated.status_code, revalidated.body) == (200, b'{"path":"/live"}')
+        assert revalidated.headers["x-framex-cache-status"] == cache_status == "REFRESH"
+        assert await call("/private") == ({"path": "/private"}, "MISS")
+        await call("/private")
+
+        assert seen == [
+            ("/ref", None),
+            ("/ref", None),
+            ("/live", None),
+            ("/live", '"v1"'),
+            ("/private", None),
+            ("/private", None),
+        ]
+        entries = (await request_cache.metadata()).values()
+        assert {entry.path for entry in entries} == {"http://ref:9000/ref", "http://ref:9000/live"}
+        assert all("proxy" in entry.tags for entry in entries)
+    finally:
+        await request_cache.clear()
+        await plugin.clients.aclose()
+
+
+async def test_proxy_http_cache_actions_binary_bodies_and_retries(monkeypatch, tmp_path):
+    from starlette.requests import Request
+
+    from framex.config import settings as framex_settings
+    from framex.consts import CacheAction
+    from framex.driver.cache import request_cache
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import (
+        ProxyClientConfig,
+        ProxyHedgeConfig,
+        ProxyHttpCacheConfig,
+        ProxyPassthroughConfig,
+        ProxyRetryConfig,
+    )
+    from framex.plugins.proxy.http_cache import request_cache_action
+    from framex.plugins.proxy.resilience import RetryBudget
+
+    monkeypatch.setattr(framex_settings.cache, "enabled", True)
+    monkeypatch.setattr(framex_settings.cache, "mode", "file")
+    monkeypatch.setattr(framex_settings.cache, "file_dir", str(tmp_path))
+    logo = b"\x89PNG\r\n\x1a\n\x00\xff\xfe"
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.path == "/flaky" and seen.count("/flaky") == 1:
+            return httpx.Response(503)
+        headers = {"cache-control": "max-age=60", "content-type": "image/png"}
+        return httpx.Response(200, content=logo if request.url.path == "/logo" else b'{"ok":true}', headers=headers)
+
+    async def send_request(self: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.send(self.build_request(method, url, **kwargs))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", send_request)
+    proxy_plugin_class = getattr(importlib.import_module("framex.plugins.proxy"), "ProxyPlugin")
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    plugin.clients.get("http://ref:9000").client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    plugin.retry_budget = RetryBudget(ratio=0, min_per_second=10)
+    plugin.latencies = {}
+    passthrough = ProxyPassthroughConfig(enable=True, headers=["content-type"])
+
+    async def call(path: str, action: CacheAction = CacheAction.USE, **options: Any) -> Any:
+        return await plugin.fetch_response(
+            http_cache=ProxyHttpCacheConfig(enable=["/*"]),
+            request=request((b"x-framex-cache", action.encode())),
+            method="GET",
+            url=f"http://ref:9000{path}",
+            params={},
+            **options,
+        )
+
+    def request(*headers: tuple[bytes, bytes]) -> Request:
+        return Request({"type": "http", "headers": list(headers)})
+
+    try:
+        statuses = []
+        for action in [CacheAction.USE, CacheAction.USE, CacheAction.BYPASS, CacheAction.REFRESH, CacheAction.USE]:
+            response = await call("/logo", action, passthrough=passthrough)
+            assert (response.body, response.headers["content-type"]) == (logo, "image/png")
+            statuses.append(response.headers["x-framex-cache-status"])
+        assert statuses == ["MISS", "HIT", "BYPASS", "REFRESH", "HIT"]
+        assert seen == ["/logo"] * 3
+
+        # Misses go through the route's retries.
+        resilience = (ProxyRetryConfig(attempts=1, backoff=0), ProxyHedgeConfig())
+        assert await call("/flaky", resilience=resilience) == {"ok": True}
+        assert seen.count("/flaky") == 2
+
+        monkeypatch.setattr(framex_settings.cache, "enabled", False)
+        response = await call("/logo", passthrough=passthrough)
+        assert (response.body, response.headers["x-framex-cache-status"]) == (logo, "DISABLED")
+        assert seen.count("/logo") == 4
+    finally:
+        monkeypatch.setattr(framex_settings.cache, "enabled", True)
+        await request_cache.clear()
+        await plugin.clients.aclose()
+
+    assert request_cache_action(None) == CacheAction.USE
+    assert request_cache_action(request((b"x-framex-cache", b" Refresh "))) == CacheAction.REFRESH
+    assert request_cache_action(request((b"x-framex-cache", b"later"))) == CacheAction.USE
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({}, 60),
+        ({"cache-control": "public, max-age=30", "age": "10"}, 20),
+        ({"cache-control": "max-age=30, s-maxage=7200"}, 3600),
+        ({"cache-control": "no-cache"}, None),
+        ({"cache-control": "no-cache", "last-modified": "Mon, 19 Oct 2026 00:00:00 GMT"}, 0),
+        ({"cache-control": "no-store", "etag": '"v1"'}, None),
+    ],
+)
+def test_proxy_http_cache_freshness_lifetime(headers, expected):
+    from framex.plugins.proxy.config import ProxyHttpCacheConfig, ProxyPluginConfig
+    from framex.plugins.proxy.http_cache import freshness_lifetime
+
+    assert freshness_lifetime(headers, ProxyHttpCacheConfig(ttl=60, max_ttl=3600)) == expected
+
+    config = ProxyPluginConfig(proxy_urls={"http://svc:9000": {"http_cache": {"enable": ["/ref/*"]}}})
+    assert config.get_http_cache("http://svc:9000", "/ref/countries", "get") is not None
+    assert config.get_http_cache("http://svc:9000", "/ref/countries", "POST") is None
+    assert config.get_http_cache("http://svc:9000", "/items", "GET") is None
+
+
+async def test_proxy_func_batcher_coalesces_calls():
+    from framex.plugins.proxy.batch import ProxyFuncBatcher
+    from framex.plugins.proxy.config import ProxyFunctionBatchConfig
+    from framex.plugins.proxy.model import ProxyFuncHttpBody
+
+    batches: list[list[str]] = []
+
+    async def send(items: list[ProxyFuncHttpBody]) -> list[Any]:
+        batches.append([item.data for item in items])
+        if "boom" in batches[-1]:
+            raise RuntimeError("remote down")
+        return [{"status": 200, "data": item.data.upper()} for item in items]
+
+    batcher = ProxyFuncBatcher("http://remote:9000", send, ProxyFunctionBatchConfig(window=0.01, max_size=2))
+
+    def call(data: str) -> Any:
+        return batcher.submit(ProxyFuncHttpBody(func_name="f", data=data))
+
+    assert await asyncio.gather(call("a"), call("b"), call("c")) == [
+        {"status": 200, "data": "A"},
+        {"status": 200, "data": "B"},
+        {"status": 200, "data": "C"},
+    ]
+    with pytest.raises(RuntimeError, match="remote down"):
+        await asyncio.gather(call("boom"), call("d"))
+
+    assert batches == [["a", "b"], ["c"], ["boom", "d"]]
+    assert batcher.stats() == {"calls": 5, "batches": 3, "pending": 0, "in_flight": 0}
+    await batcher.aclose()
+
+
+async def test_proxy_function_calls_share_batch_requests(monkeypatch):
+    from framex.consts import PROXY_FUNC_BATCH_HTTP_PATH
+    from framex.plugins.proxy.client import UpstreamClientPool
+    from framex.plugins.proxy.config import ProxyClientConfig, ProxyFunctionBatchConfig, settings
+    from framex.plugins.proxy.resilience import RetryBudget
+    from framex.utils import cache_decode, cache_encode
+
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        items = json.loads(request.content)["items"]
+        data = [
+            {"status": 500, "message": "failed"}
+            if cache_decode(item["data"]) == {"x": 0}
+            else {"status": 200, "data": cache_encode(cache_decode(item["data"])["x"] * 2)}
+            for item in items
+        ]
+        return httpx.Response(200, json={"status": 200, "data": data})
+
+    async def send_request(self: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.send(self.build_request(method, url, **kwargs))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", send_request)
+    monkeypatch.setattr(settings, "proxy_function_batch", ProxyFunctionBatchConfig(enable=True, window=0.01))
+    proxy_plugin_class = getattr(importlib.import_module("framex.plugins.proxy"), "ProxyPlugin")
+    plugin = proxy_plugin_class.__new__(proxy_plugin_class)
+    plugin.clients = UpstreamClientPool(ProxyClientConfig(), timeout=1)
+    plugin.clients.get("http://remote:9000").client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    plugin.retry_budget = RetryBudget(ratio=0.1, min_per_second=1)
+    plugin.limiters = {}
+    plugin.batchers = {}
+    plugin.proxy_func_map = {}
+    plugin.init_proxy_func_route = True
+
+    await plugin._parse_proxy_function("tests.remote.double", "http://remote:9000")
+    results = await asyncio.gather(
+        *(plugin.call_proxy_function(cache_encode("tests.remote.double"), cache_encode({"x": x})) for x in range(3))
+    )
+
+    assert [request.url.path for request in requests] == [PROXY_FUNC_BATCH_HTTP_PATH]
+    assert results[0] == {"status": 500, "message": "failed"}
+    assert [cache_decode(result["data"]) for result in results[1:]] == [2, 4]
+    await plugin.batchers["http://remote:9000"].aclose()
+    await plugin.clients.aclose()
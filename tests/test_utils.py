@@ -152,6 +152,74 @@ def test_recovery_failure_fallback():
     assert decoded.info == "test"
 
 
+def test_cache_encode_frames_and_compresses_large_payloads(monkeypatch):
+    import base64
+
+    from framex.config import settings
+    from framex.utils.cache import COMPRESSION_NONE, COMPRESSION_ZLIB, MAGIC
+
+    monkeypatch.setattr(settings.server, "framed_codec", True)
+    small, large = {"a": 1}, {"rows": [{"id": i, "name": f"row-{i}"} for i in range(500)]}
+
+    for data, compression in ((small, COMPRESSION_NONE), (large, COMPRESSION_ZLIB)):
+        raw = base64.b64decode(cache_encode(data))
+        assert raw[: len(MAGIC)] == MAGIC
+        assert raw[len(MAGIC) : len(MAGIC) + 3] == bytes([1, 1, compression])
+        assert cache_decode(cache_encode(data)) == data
+    # Strings come back as they went in, even when they look like JSON.
+    assert cache_decode(cache_encode("123")) == "123"
+
+
+def test_cache_encode_writes_legacy_payloads_by_default():
+    import base64
+    import zlib
+
+    from framex.utils.cache import MAGIC, xor_crypt
+
+    data = {"status": "success", "rows": [{"id": i} for i in range(100)]}
+    encoded = cache_encode(data)
+    raw = base64.b64decode(encoded)
+
+    assert not raw.startswith(MAGIC)
+    # Nodes without the framed codec decode it the legacy way.
+    assert json.loads(zlib.decompress(xor_crypt(raw))) == data
+    assert cache_decode(encoded) == data
+    assert base64.b64decode(cache_encode(data, framed=True)).startswith(MAGIC)
+
+
+def test_cache_decode_accepts_legacy_payloads():
+    import base64
+    import zlib
+    from itertools import cycle
+
+    from framex.utils.cache import xor_crypt
+
+    data = {"status": "success", "model": SubModel(id=1, name="sub_name").model_dump()}
+    compressed = zlib.compress(json.dumps(data).encode())
+    legacy_xor = bytes(a ^ b for a, b in zip(compressed, cycle(b"01234567890abcdefghijklmnopqrstuvwxyz")))
+
+    assert xor_crypt(compressed) == legacy_xor
+    assert cache_decode(base64.b64encode(legacy_xor).decode()) == data
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"FXC hello",
+        b"FXC",
+        b"FXC" + bytes([9, 1, 0]) + b"{}",
+        b"FXC" + bytes([1, 1, 7]) + b"{}",
+        b"FXC" + bytes([1, 1, 1]) + b"not zlib",
+    ],
+)
+def test_cache_decode_leaves_strings_without_a_valid_frame(raw):
+    import base64
+
+    encoded = base64.b64encode(raw).decode()
+
+    assert cache_decode(encoded) == encoded
+
+
 def test_format_uptime():
     """Test format_uptime function"""
     # Test seconds only
@@ -0,0 +1,119 @@
+"""Benchmark the `cache_encode` / `cache_decode` codec against the legacy pipeline.
+
+The legacy pipeline is rebuilt here as it was: recursive transform, JSON, zlib, XOR byte by
+byte in a Python generator, base64. Each size is a list of rows with nested dicts and hashes,
+plus a pydantic model.
+
+    python -m tools.benchmarks.cache_codec [rounds] [rows ...]
+"""
+
+import base64
+import hashlib
+import json
+import sys
+import time
+import zlib
+from datetime import datetime
+from enum import Enum
+from itertools import cycle
+from typing import Any
+
+from pydantic import BaseModel
+
+from framex.utils import cache_decode, cache_encode
+from framex.utils.cache import XOR_KEY
+
+
+class Vendor(BaseModel):
+    name: str
+    country: str
+
+
+def _payload(rows: int) -> dict[str, Any]:
+    return {
+        "rows": [
+            {
+                "id": i,
+                "name": f"row-{i}",
+                "score": i * 0.5,
+                "tags": ["a", "b", "c"],
+                "meta": {"level": i % 7},
+                # Hashes do not compress, like most real-world ids and tokens.
+                "digest": hashlib.sha256(str(i).encode()).hexdigest(),
+            }
+            for i in range(rows)
+        ],
+        "vendor": Vendor(name="vendor", country="NL"),
+    }
+
+
+def _legacy_transform(obj: Any) -> Any:
+    if hasattr(obj, "__dict__"):
+        raw_attributes = {k: _legacy_transform(v) for k, v in obj.__dict__.items() if not k.startswith("_")}
+        return {
+            "__type__": "dynamic_obj",
+            "__module__": obj.__class__.__module__,
+            "__class__": obj.__class__.__name__,
+            "data": raw_attributes,
+        }
+    if isinstance(obj, list):
+        return [_legacy_transform(i) for i in obj]
+    if isinstance(obj, dict):
+        return {k: _legacy_transform(v) for k, v in obj.items()}
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    return obj
+
+
+def _legacy_xor(data: bytes) -> bytes:
+    return bytes(a ^ b for a, b in zip(data, cycle(XOR_KEY)))
+
+
+def legacy_encode(data: Any) -> str:
+    compressed = zlib.compress(json.dumps(_legacy_transform(data), ensure_ascii=False).encode("utf-8"))
+    return base64.b64encode(_legacy_xor(compressed)).decode("ascii")
+
+
+def legacy_decode(encoded: str) -> Any:
+    return cache_decode(json.loads(zlib.decompress(_legacy_xor(base64.b64decode(encoded))).decode("utf-8")))
+
+
+def _timed(rounds: int, func: Any) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def _run(rounds: int, rows: int) -> None:
+    payload = _payload(rows)
+    legacy, current = legacy_encode(payload), cache_encode(payload, framed=True)
+    if (
+        not cache_decode(legacy)
+        == cache_decode(current)
+        == cache_decode(cache_encode(payload))
+        == legacy_decode(legacy)
+    ):
+        raise RuntimeError("codecs disagree")
+    results = {
+        "legacy encode": _timed(rounds, lambda: legacy_encode(payload)),
+        "legacy decode": _timed(rounds, lambda: legacy_decode(legacy)),
+        "encode": _timed(rounds, lambda: cache_encode(payload, framed=True)),
+        "decode": _timed(rounds, lambda: cache_decode(current)),
+        "encode (unframed)": _timed(rounds, lambda: cache_encode(payload, framed=False)),
+        "decode (legacy)": _timed(rounds, lambda: cache_decode(legacy)),
+    }
+    sys.stdout.write(f"{rows} rows: legacy {len(legacy)} chars, framed {len(current)} chars, {rounds} rounds\n")
+    for name, elapsed in results.items():
+        sys.stdout.write(f"  {name:<16} {elapsed:10.3f} ms/call\n")
+
+
+def main(rounds: int, sizes: list[int]) -> None:
+    for rows in sizes:
+        _run(rounds, rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5, [int(arg) for arg in sys.argv[2:]] or [10, 1000, 50000])
@@ -0,0 +1,113 @@
+"""Benchmark the proxy dynamic method on a large nested JSON body.
+
+Compares the trusted route path (already validated by FastAPI, encoded straight to JSON
+bytes) with a plugin call that still has to validate a plain dict, and with the former
+validate + model_dump + json.dumps pipeline. The upstream request is not sent.
+
+    python -m tools.benchmarks.proxy_request_body [items] [rounds]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+from framex.log import logger
+from framex.plugins.proxy import ProxyPlugin
+from framex.plugins.proxy.builder import create_pydantic_model
+
+COMPONENTS: dict[str, Any] = {
+    "Order": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            "items": {"type": "array", "items": {"$ref": "#/components/schemas/Item"}},
+        },
+        "required": ["id", "items"],
+    },
+    "Item": {
+        "type": "object",
+        "properties": {
+            "sku": {"type": "string"},
+            "quantity": {"type": "integer"},
+            "price": {"type": "number"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+            "vendor": {"$ref": "#/components/schemas/Vendor"},
+        },
+        "required": ["sku", "quantity", "price", "tags", "vendor"],
+    },
+    "Vendor": {
+        "type": "object",
+        "properties": {"name": {"type": "string"}, "country": {"type": "string"}},
+        "required": ["name", "country"],
+    },
+}
+
+
+def _payload(items: int) -> dict[str, Any]:
+    return {
+        "id": "order-1",
+        "items": [
+            {
+                "sku": f"sku-{i}",
+                "quantity": i,
+                "price": i * 1.5,
+                "tags": ["a", "b", "c"],
+                "vendor": {"name": f"vendor-{i % 10}", "country": "NL"},
+            }
+            for i in range(items)
+        ],
+    }
+
+
+def _timed(rounds: int, func: Any) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+async def _atimed(rounds: int, func: Any) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await func()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+async def main(items: int, rounds: int) -> None:
+    logger.remove()
+    order_model = create_pydantic_model("Order", COMPONENTS["Order"], COMPONENTS, "benchmark")
+    plugin = ProxyPlugin.__new__(ProxyPlugin)
+    sent: list[dict[str, Any]] = []
+
+    async def fetch_response(**kwargs: Any) -> dict[str, Any]:
+        sent.append(kwargs)
+        return {}
+
+    plugin.fetch_response = fetch_response  # type: ignore[method-assign,assignment]
+    method = plugin._create_dynamic_method(
+        "create_order", "POST", [("model", order_model)], "http://upstream/orders", body_param_names={"model"}
+    )
+    plugin.func_map = {"/orders": method}
+    payload = _payload(items)
+    body = order_model.model_validate(payload)
+    request_model = method.request_model  # type: ignore[attr-defined]
+
+    def legacy() -> bytes:
+        validated = request_model(model=body)
+        return json.dumps(validated.model.model_dump(), separators=(",", ":")).encode()
+
+    results = {
+        "legacy validate + dump + dumps": _timed(rounds, legacy),
+        "route call (trusted)": await _atimed(rounds, lambda: method(model=body)),
+        "plugin call (dict, validated)": await _atimed(rounds, lambda: plugin("/orders", model=payload)),
+    }
+
+    sys.stdout.write(f"{items} items, {len(sent[-1]['content'])} body bytes, {rounds} rounds\n")
+    for name, elapsed in results.items():
+        sys.stdout.write(f"  {name:<32} {elapsed:8.3f} ms/call\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000, int(sys.argv[2]) if len(sys.argv) > 2 else 50))